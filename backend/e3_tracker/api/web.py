@@ -1,6 +1,9 @@
+import atexit
 import base64
+import codecs
 import copy
 import io
+import itertools
 import json
 import math
 import os
@@ -10,22 +13,27 @@ import shutil
 import threading
 import time
 import hashlib
-from collections import Counter
-from concurrent.futures import ThreadPoolExecutor, as_completed
+import heapq
+from collections import Counter, OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
 from datetime import date, datetime, timedelta, timezone
 from difflib import SequenceMatcher
-from functools import wraps
+from functools import lru_cache, wraps
 from pathlib import Path
 from statistics import median
-from typing import Any, Callable, Dict, Iterable, List, Optional, Set, Tuple
-from urllib.parse import parse_qs, urlsplit, urlunsplit
+from typing import Any, Callable, Deque, Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlsplit
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
 from PIL import Image, ImageChops, ImageDraw, ImageFilter, ImageFont, ImageOps
-from flask import Flask, Response, flash, redirect, render_template_string, request, send_file, session, url_for, has_request_context
+from flask import Flask, Response, flash, g, redirect, render_template, request, send_file, session, url_for, has_request_context
+from flask.json.provider import DefaultJSONProvider
 from itsdangerous import BadSignature, SignatureExpired, URLSafeTimedSerializer
 from werkzeug.exceptions import RequestEntityTooLarge
 from werkzeug.http import http_date
+from werkzeug.sansio.utils import get_current_url
 from werkzeug.utils import secure_filename
 
 from ..services.collector import CollectOptions, collect_assignments
@@ -38,7 +46,7 @@ from ..services.google_calendar import (
     refresh_google_token,
     sync_assignments_to_google_calendar,
 )
-from ..services.http import login_with_password
+from ..services.http import login_with_password, pooled_session
 from ..services.youtube_playlists import (
     KNOWN_YOUTUBE_PLAYLISTS,
     YoutubePlaylistSyncBusyError,
@@ -82,10 +90,42 @@ from ..shared.study_math import (
     repair_math_delimiters,
     wrap_bare_math_candidate,
 )
-from ..shared.excel import build_excel
 from ..shared.utils import json_safe
 
-PASSIVE_TRAFFIC_ACTIONS = {"heartbeat", "refresh_assignments"}
+PASSIVE_TRAFFIC_ACTIONS = frozenset({"heartbeat", "refresh_assignments"})
+GUEST_EXPORT_MODE_PATTERN = re.compile(rb'\s*\{\s*"mode"\s*:\s*"([^"\\]*)"')
+PREFERENCE_KEY_ALIASES: Dict[str, Tuple[str, int]] = {
+    "view_mode": ("view_mode", 0),
+    "viewMode": ("view_mode", 1),
+    "status_filter": ("status_filter", 0),
+    "statusFilter": ("status_filter", 1),
+    "statusFilters": ("status_filter", 2),
+    "include_ignored_overdue": ("include_ignored_overdue", 0),
+    "includeIgnoredOverdue": ("include_ignored_overdue", 1),
+    "show_overdue": ("show_overdue", 0),
+    "showOverdue": ("show_overdue", 1),
+    "show_completed": ("show_completed", 0),
+    "showCompleted": ("show_completed", 1),
+    "show_graded": ("show_graded", 0),
+    "showGraded": ("show_graded", 1),
+    "ignored_overdue_uids": ("ignored_overdue_uids", 0),
+    "ignoredOverdueUids": ("ignored_overdue_uids", 1),
+}
+PREFERENCE_BOOL_STRINGS = {
+    "1": True,
+    "true": True,
+    "yes": True,
+    "on": True,
+    "0": False,
+    "false": False,
+    "no": False,
+    "off": False,
+}
+NO_STORE_HEADERS = {
+    "Cache-Control": "no-store, no-cache, must-revalidate, max-age=0",
+    "Pragma": "no-cache",
+    "Expires": "0",
+}
 
 ROOT_DIR = Path(__file__).resolve().parents[3]
 FRONTEND_TEMPLATE_DIR = ROOT_DIR / "frontend" / "templates"
@@ -959,6 +999,64 @@ def _study_plan_today_progress_days(
     return progress_days
 
 
+# Asia/Taipei has had a fixed UTC+8 offset since 1979, so bucket boundaries are plain integer math.
+_TAIPEI_OFFSET_SECONDS = int(datetime.now(TAIPEI_TZ).utcoffset().total_seconds())
+
+
+def _taipei_hour_start(ts: float) -> int:
+    return (int(ts) + _TAIPEI_OFFSET_SECONDS) // 3600 * 3600 - _TAIPEI_OFFSET_SECONDS
+
+
+def _taipei_day_start(ts: float) -> int:
+    return (int(ts) + _TAIPEI_OFFSET_SECONDS) // 86400 * 86400 - _TAIPEI_OFFSET_SECONDS
+
+
+def _taipei_ics_stamp(ts: float) -> str:
+    # Asia/Taipei has no DST, so a fixed offset over gmtime matches datetime.fromtimestamp(ts, TAIPEI_TZ).
+    return time.strftime("%Y%m%dT%H%M%S", time.gmtime(ts + _TAIPEI_OFFSET_SECONDS))
+
+
+_ICS_ESCAPES = str.maketrans({"\\": "\\\\", "\n": "\\n", ",": "\\,", ";": "\\;"})
+_ICS_HEADER = "\r\n".join(
+    [
+        "BEGIN:VCALENDAR",
+        "VERSION:2.0",
+        "PRODID:-//NYCU E3//EN",
+        "CALSCALE:GREGORIAN",
+        "X-WR-TIMEZONE:Asia/Taipei",
+    ]
+)
+_ICS_EVENT_TEMPLATE = "\r\n".join(
+    [
+        "BEGIN:VEVENT",
+        "UID=e3-{course_id}-{idx}@e3",
+        "DTSTAMP={dtstamp}",
+        "DTSTART;TZID=Asia/Taipei:{start}",
+        "DTEND;TZID=Asia/Taipei:{end}",
+        "SUMMARY:{summary}",
+        "DESCRIPTION:{description}",
+        "END:VEVENT",
+    ]
+)
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """Flask JSON provider backed by orjson; Flask's fallback handles the types orjson leaves alone."""
+
+    sort_keys = False
+
+    def dumps(self, obj: Any, **kwargs: Any) -> str:
+        option = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+        if kwargs.get("sort_keys", self.sort_keys):
+            option |= orjson.OPT_SORT_KEYS
+        if kwargs.get("indent"):
+            option |= orjson.OPT_INDENT_2
+        return orjson.dumps(obj, default=kwargs.get("default", self.default), option=option).decode("utf-8")
+
+    def loads(self, s: Any, **kwargs: Any) -> Any:
+        return orjson.loads(s)
+
+
 class TrafficTracker:
     def __init__(
         self,
@@ -971,7 +1069,9 @@ class TrafficTracker:
         state_saver: Optional[Callable[[Dict[str, Any]], None]] = None,
         event_loader: Optional[Callable[[int], List[Dict[str, Any]]]] = None,
         event_writer: Optional[Callable[[Dict[str, Any]], None]] = None,
+        event_batch_writer: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
         event_clearer: Optional[Callable[[], None]] = None,
+        flush_interval: float = 5.0,
     ) -> None:
         self._activity_window = activity_window
         self._count_interval = count_interval
@@ -979,27 +1079,55 @@ class TrafficTracker:
         self._last_total_increment: Dict[str, float] = {}
         self._ip_total_hits: Dict[str, int] = {}
         self._ip_users: Dict[str, str] = {}
+        self._user_ips: Dict[str, Set[str]] = {}
         self._active_users: Dict[str, float] = {}
+        # (expires_at, key) min-heaps; stale entries are skipped when popped.
+        self._active_ip_heap: List[Tuple[float, str]] = []
+        self._active_user_heap: List[Tuple[float, str]] = []
         self._user_total_hits: Dict[str, int] = {}
         self._user_last_count: Dict[str, float] = {}
         self._user_last_seen: Dict[str, float] = {}
         self._user_flags: Dict[str, bool] = {}
+        # Usernames whose flag is True, so guest counts never scan _user_flags.
+        self._guest_usernames: Set[str] = set()
+        # Non-guest usernames present in any of the per-user maps (snapshot "total_users").
+        self._known_users: Set[str] = set()
+        # Rolling 24h window of non-guest actors: hour -> usernames, plus how many hours each user spans.
+        self._daily_user_buckets: Dict[int, Set[str]] = {}
+        self._daily_user_refs: Counter = Counter()
         self._total_hits = 0
-        self._recent_events: List[Dict[str, Any]] = []
         self._max_events = max_events
-        self._version = 0
+        self._recent_events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
         self._version = 0
         self._lock = threading.Lock()
+        # Persistence runs outside ``_lock`` so request threads only contend on in-memory updates.
+        self._persist_lock = threading.Lock()
+        self._persisted_version = -1
+        self._flush_interval = max(0.0, float(flush_interval))
+        self._dirty = threading.Event()
+        self._writer_thread: Optional[threading.Thread] = None
+        # Event writes have their own lock so slow log I/O never blocks state readers.
+        self._log_lock = threading.Lock()
+        self._log_fh: Optional[io.BufferedWriter] = None
+        # Events waiting for the writer thread; older ones would be trimmed by the backend anyway.
+        self._pending_events: Deque[Dict[str, Any]] = deque(maxlen=max_events)
         self._storage_path = Path(storage_path) if storage_path else None
         self._log_path = Path(log_path) if log_path else None
-        self._concurrent_history: List[Dict[str, Any]] = []
-        self._concurrent_history: List[Dict[str, Any]] = []
+        self._concurrent_history: Deque[Dict[str, Any]] = deque(maxlen=max_events * 3)
+        # Hourly member sets are only kept for the open day. Closed days keep one
+        # 24-bit hour mask per user, which is enough to undo a user exactly.
         self._hourly_buckets: Dict[int, Set[str]] = {}
-        self._hourly_series: List[Dict[str, Any]] = []
+        self._closed_day_members: Dict[int, Dict[str, int]] = {}
+        self._open_day: Optional[int] = None
+        # Insertion-ordered by bucket timestamp; the oldest bucket is always first.
+        self._hourly_counts: Dict[int, int] = {}
+        # name -> (version, valid_until, value) for the read-only aggregate views.
+        self._view_cache: Dict[str, Tuple[int, float, Any]] = {}
         self._state_loader = state_loader
         self._state_saver = state_saver
         self._event_loader = event_loader
         self._event_writer = event_writer
+        self._event_batch_writer = event_batch_writer
         self._event_clearer = event_clearer
         if self._storage_path:
             self._storage_path.parent.mkdir(parents=True, exist_ok=True)
@@ -1011,20 +1139,151 @@ class TrafficTracker:
             self._load_from_disk()
         if self._event_loader:
             try:
-                self._recent_events = self._event_loader(self._max_events) or []
+                self._recent_events.extend(self._event_loader(self._max_events) or [])
             except Exception:
-                self._recent_events = []
+                self._recent_events.clear()
         elif self._log_path:
             self._load_recent_events()
+            try:
+                self._log_fh = self._log_path.open("ab", buffering=1 << 16)
+            except Exception:
+                self._log_fh = None
+        self._seed_daily_users(time.time())
+        if self._state_saver or self._storage_path or self._log_fh or self._event_batch_writer:
+            self._writer_thread = threading.Thread(
+                target=self._writer_loop,
+                name="traffic-state-writer",
+                daemon=True,
+            )
+            self._writer_thread.start()
+            atexit.register(self.close)
+
+    def _writer_loop(self) -> None:
+        while True:
+            self._dirty.wait()
+            # Coalesce every change made during the interval into one write.
+            time.sleep(self._flush_interval)
+            self._dirty.clear()
+            try:
+                self.flush()
+            except Exception:
+                pass
+
+    def flush(self) -> None:
+        """Write pending events and the current state to the backend if they changed since the last write."""
+        if self._log_fh or self._pending_events:
+            with self._log_lock:
+                if self._pending_events:
+                    batch = list(self._pending_events)
+                    self._pending_events.clear()
+                    try:
+                        self._event_batch_writer(batch)
+                    except Exception:
+                        pass
+                if self._log_fh:
+                    try:
+                        self._log_fh.flush()
+                    except Exception:
+                        pass
+        with self._lock:
+            if self._version <= self._persisted_version:
+                return
+            payload = self._state_payload()
+        self._save_to_disk(payload)
+
+    def _seed_daily_users(self, now: float) -> None:
+        cutoff = now - 86400
+        for ev in self._recent_events:
+            ts = ev.get("ts")
+            if not ts or ts < cutoff:
+                continue
+            meta = ev.get("meta") or {}
+            username = meta.get("username")
+            if username and not meta.get("is_guest"):
+                self._track_daily_user(str(username), float(ts))
+
+    def _track_daily_user(self, username: str, now: float) -> None:
+        self._purge_daily_users(now)
+        bucket = self._daily_user_buckets.setdefault(int(now) // 3600, set())
+        if username not in bucket:
+            bucket.add(username)
+            self._daily_user_refs[username] += 1
+
+    def _purge_daily_users(self, now: float) -> None:
+        oldest_kept = int(now) // 3600 - 23
+        buckets = self._daily_user_buckets
+        for hour in [hour for hour in buckets if hour < oldest_kept]:
+            for username in buckets.pop(hour):
+                self._daily_user_refs[username] -= 1
+                if self._daily_user_refs[username] <= 0:
+                    del self._daily_user_refs[username]
+
+    def close(self) -> None:
+        self.flush()
+        with self._log_lock:
+            if self._log_fh:
+                try:
+                    self._log_fh.close()
+                except Exception:
+                    pass
+                self._log_fh = None
 
     def _purge_expired(self, now: float) -> bool:
-        expired_ips = [ip for ip, ts in self._active_ips.items() if now - ts > self._activity_window]
-        for ip in expired_ips:
-            self._active_ips.pop(ip, None)
-        expired_users = [user for user, ts in self._active_users.items() if now - ts > self._activity_window]
-        for user in expired_users:
-            self._active_users.pop(user, None)
-        return bool(expired_ips or expired_users)
+        window = self._activity_window
+        expired = False
+        for heap, active in (
+            (self._active_ip_heap, self._active_ips),
+            (self._active_user_heap, self._active_users),
+        ):
+            while heap and heap[0][0] < now:
+                _, key = heapq.heappop(heap)
+                ts = active.get(key)
+                # A later touch pushed a newer entry; only drop keys that are really stale.
+                if ts is not None and now - ts > window:
+                    del active[key]
+                    expired = True
+                    if (
+                        active is self._active_users
+                        and key not in self._user_last_seen
+                        and key not in self._user_total_hits
+                    ):
+                        self._known_users.discard(key)
+        return expired
+
+    def _next_expiry(self) -> float:
+        deadlines = [heap[0][0] for heap in (self._active_ip_heap, self._active_user_heap) if heap]
+        return min(deadlines) if deadlines else math.inf
+
+    def _cached_view(
+        self,
+        name: str,
+        now: float,
+        compute: Callable[[float], Tuple[Any, float]],
+        *,
+        purged: bool = False,
+    ) -> Any:
+        """Reuse an aggregate until the version changes or its ``valid_until`` passes.
+
+        Callers must hold ``_lock``. ``purged`` views were computed right after
+        ``_purge_expired`` and also expire when the next active entry times out.
+        The returned value is the cached object itself: readers that hand out
+        lists or dicts copy them, down to the entry dicts, before returning.
+        """
+        cached = self._view_cache.get(name)
+        if cached and cached[0] == self._version and now < cached[1]:
+            return cached[2]
+        value, valid_until = compute(now)
+        if purged:
+            valid_until = min(valid_until, self._next_expiry())
+        self._view_cache[name] = (self._version, valid_until, value)
+        return value
+
+    def _rebuild_expiry_heaps(self) -> None:
+        window = self._activity_window
+        self._active_ip_heap = [(ts + window, ip) for ip, ts in self._active_ips.items()]
+        heapq.heapify(self._active_ip_heap)
+        self._active_user_heap = [(ts + window, user) for user, ts in self._active_users.items()]
+        heapq.heapify(self._active_user_heap)
 
     def remove_user_stats(self, username: str) -> bool:
         """Remove all tracked state for a specific username."""
@@ -1047,36 +1306,55 @@ class TrafficTracker:
             if username in self._user_flags:
                 self._user_flags.pop(username, None)
                 changed = True
+            self._guest_usernames.discard(username)
+            self._known_users.discard(username)
+            for members in self._daily_user_buckets.values():
+                members.discard(username)
+            self._daily_user_refs.pop(username, None)
             # detach IP mappings pointing to this user
-            ips_to_clear = [ip for ip, user in self._ip_users.items() if user == username]
+            ips_to_clear = self._user_ips.pop(username, set())
             for ip in ips_to_clear:
                 self._ip_users.pop(ip, None)
             if ips_to_clear:
                 changed = True
-            # prune hourly buckets and recalc series counts
-            if self._hourly_buckets:
-                for ts, members in list(self._hourly_buckets.items()):
-                    if username in members:
-                        members.discard(username)
-                        changed = True
-                        self._hourly_buckets[ts] = members
-                # rebuild hourly_series counts
-                rebuilt = []
-                for ts, members in self._hourly_buckets.items():
-                    rebuilt.append({"ts": ts, "count": len(members)})
-                self._hourly_series = sorted(rebuilt, key=lambda x: x["ts"])
+            # prune hourly buckets and refresh only the counts that changed
+            for ts, members in self._hourly_buckets.items():
+                if username in members:
+                    members.discard(username)
+                    self._hourly_counts[ts] = len(members)
+                    changed = True
+            for day_ts, day_members in self._closed_day_members.items():
+                hour_mask = day_members.pop(username, 0)
+                if not hour_mask:
+                    continue
+                changed = True
+                for hour in range(24):
+                    hour_ts = day_ts + hour * 3600
+                    if hour_mask >> hour & 1 and hour_ts in self._hourly_counts:
+                        self._hourly_counts[hour_ts] = max(0, self._hourly_counts[hour_ts] - 1)
             if changed:
                 self._version += 1
-                self._save_to_disk()
+                self._dirty.set()
         return changed
 
+    def _assign_ip_user(self, ip: str, username: str) -> None:
+        previous = self._ip_users.get(ip)
+        if previous == username:
+            return
+        if previous is not None:
+            previous_ips = self._user_ips.get(previous)
+            if previous_ips is not None:
+                previous_ips.discard(ip)
+                if not previous_ips:
+                    self._user_ips.pop(previous, None)
+        self._ip_users[ip] = username
+        self._user_ips.setdefault(username, set()).add(ip)
+
     def _is_guest_user(self, username: Optional[str]) -> bool:
+        # Every tracked username has a flag: record_visit sets it and state loading backfills it.
         if not username:
             return False
-        normalized = str(username)
-        if normalized in self._user_flags:
-            return bool(self._user_flags[normalized])
-        return normalized.startswith("訪客")
+        return self._user_flags.get(username, False)
 
     def record_visit(
         self,
@@ -1088,91 +1366,102 @@ class TrafficTracker:
     ) -> None:
         if not action:
             return
-        action_lc = str(action).lower()
+        # Stored lower-case so readers can test membership without normalizing again.
+        action_text = (action if isinstance(action, str) else str(action)).lower()
+        is_passive = action_text in PASSIVE_TRAFFIC_ACTIONS
+        username: Optional[str] = None
+        is_guest_user = False
+        if metadata:
+            raw_username = metadata.get("username")
+            if raw_username:
+                username = raw_username if isinstance(raw_username, str) else str(raw_username)
+                is_guest_user = bool(metadata.get("is_guest"))
         now = time.time()
+        window = self._activity_window
         with self._lock:
-            prev_ts = self._active_ips.get(ip) if ip else None
-            previously_online_ip = bool(prev_ts and now - prev_ts <= self._activity_window)
+            # Bind the hot maps once; this runs for every heartbeat.
+            active_ips = self._active_ips
+            active_users = self._active_users
+            last_total_increment = self._last_total_increment
+            ip_total_hits = self._ip_total_hits
+            prev_ts = active_ips.get(ip) if ip else None
+            previously_online_ip = bool(prev_ts and now - prev_ts <= window)
             if ip:
-                self._active_ips[ip] = now
-            username = None
-            is_guest_user = False
-            if metadata:
-                username = metadata.get("username")
-                is_guest_user = bool(metadata.get("is_guest"))
+                active_ips[ip] = now
+                heapq.heappush(self._active_ip_heap, (now + window, ip))
             if username:
-                username = str(username)
                 if ip:
-                    self._ip_users[ip] = username
+                    self._assign_ip_user(ip, username)
                 self._user_flags[username] = is_guest_user
+                if is_guest_user:
+                    self._guest_usernames.add(username)
+                    self._known_users.discard(username)
+                else:
+                    self._guest_usernames.discard(username)
+                    self._known_users.add(username)
                 self._user_last_seen[username] = now
                 if not is_guest_user:
-                    self._active_users[username] = now
-                if not is_guest_user and action_lc not in PASSIVE_TRAFFIC_ACTIONS:
+                    active_users[username] = now
+                    heapq.heappush(self._active_user_heap, (now + window, username))
+                if not is_guest_user and not is_passive:
                     self._update_hourly(username, now)
-            last_hit = self._last_total_increment.get(ip, 0) if ip else 0
+            last_hit = last_total_increment.get(ip, 0) if ip else 0
             stats_changed = True
             if ip and now - last_hit >= self._count_interval:
                 self._total_hits += 1
-                self._last_total_increment[ip] = now
-                self._ip_total_hits[ip] = self._ip_total_hits.get(ip, 0) + 1
+                last_total_increment[ip] = now
+                ip_total_hits[ip] = ip_total_hits.get(ip, 0) + 1
                 if username and not is_guest_user:
-                    self._user_total_hits[username] = self._user_total_hits.get(username, 0) + 1
+                    user_total_hits = self._user_total_hits
+                    user_total_hits[username] = user_total_hits.get(username, 0) + 1
                     self._user_last_count[username] = now
-            elif ip and ip not in self._ip_total_hits:
-                self._ip_total_hits[ip] = 0
-            if action_lc not in PASSIVE_TRAFFIC_ACTIONS:
-                self._append_event(
-                    {"ts": now, "ip": ip, "action": action, "status": status, "meta": metadata or {}}
+            elif ip and ip not in ip_total_hits:
+                ip_total_hits[ip] = 0
+            event: Optional[Dict[str, Any]] = None
+            if not is_passive:
+                event = self._append_event(
+                    {"ts": now, "ip": ip, "action": action_text, "status": status, "meta": metadata or {}}
                 )
+                if username and not is_guest_user:
+                    self._track_daily_user(username, now)
             self._purge_old_total_entries(now)
             previously_online_user = False
             if username and not is_guest_user:
-                last_seen = self._active_users.get(username)
-                previously_online_user = bool(last_seen and now - last_seen <= self._activity_window)
+                last_seen = active_users.get(username)
+                previously_online_user = bool(last_seen and now - last_seen <= window)
             if self._purge_expired(now) or not previously_online_ip or not previously_online_user:
                 stats_changed = True
             if stats_changed:
                 self._version += 1
                 self._store_concurrent_snapshot(now)
-            self._save_to_disk()
+            self._dirty.set()
+        if event is not None:
+            self._write_event(event)
 
     def snapshot(self) -> Dict[str, int]:
         now = time.time()
         with self._lock:
             self._purge_expired(now)
-            user_count, _ = self._online_counts(now)
-            unique_users: Set[str] = set()
-            for username in self._user_total_hits.keys():
-                if not self._is_guest_user(username):
-                    unique_users.add(username)
-            for username in self._user_last_seen.keys():
-                if not self._is_guest_user(username):
-                    unique_users.add(username)
-            for username in self._active_users.keys():
-                if not self._is_guest_user(username):
-                    unique_users.add(username)
-            cutoff = now - 86400
-            daily_users: Set[str] = set()
-            for ev in self._recent_events:
-                ts = ev.get("ts")
-                if not ts or ts < cutoff:
-                    continue
-                meta = ev.get("meta") or {}
-                username = meta.get("username")
-                if username and not meta.get("is_guest"):
-                    daily_users.add(str(username))
-            return {
-                "online": user_count,
-                "total": self._total_hits,
-                "total_users": len(unique_users),
-                "daily_users": len(daily_users),
-                "online_users": user_count,
-            }
+            return dict(self._cached_view("snapshot", now, self._compute_snapshot, purged=True))
+
+    def _compute_snapshot(self, now: float) -> Tuple[Dict[str, int], float]:
+        user_count, _ = self._online_counts(now)
+        self._purge_daily_users(now)
+        stats = {
+            "online": user_count,
+            "total": self._total_hits,
+            "total_users": len(self._known_users),
+            "daily_users": len(self._daily_user_refs),
+            "online_users": user_count,
+        }
+        # The daily count can only drop once the oldest hour bucket leaves the window.
+        buckets = self._daily_user_buckets
+        valid_until = (min(buckets) + 24) * 3600 if buckets else math.inf
+        return stats, valid_until
 
     def version(self) -> int:
-        with self._lock:
-            return self._version
+        # A single attribute read is atomic; polling clients should not queue behind writers.
+        return self._version
 
     def _load_from_backend(self) -> None:
         if not self._state_loader:
@@ -1187,7 +1476,7 @@ class TrafficTracker:
         if not self._storage_path or not self._storage_path.exists():
             return
         try:
-            data = json.loads(self._storage_path.read_text(encoding="utf-8"))
+            data = orjson.loads(self._storage_path.read_bytes())
         except Exception:
             return
         self._apply_state_payload(data)
@@ -1239,6 +1528,9 @@ class TrafficTracker:
                 except Exception:
                     continue
         self._ip_users = cleaned_users
+        self._user_ips = {}
+        for ip, name in cleaned_users.items():
+            self._user_ips.setdefault(name, set()).add(ip)
         active_users = data.get("active_users") or {}
         cleaned_active_users: Dict[str, float] = {}
         if isinstance(active_users, dict):
@@ -1248,6 +1540,7 @@ class TrafficTracker:
                 except (TypeError, ValueError):
                     continue
         self._active_users = cleaned_active_users
+        self._rebuild_expiry_heaps()
         user_totals = data.get("user_totals") or {}
         cleaned_user_totals: Dict[str, int] = {}
         if isinstance(user_totals, dict):
@@ -1283,7 +1576,16 @@ class TrafficTracker:
                     cleaned_flags[str(username)] = bool(flag)
                 except Exception:
                     continue
+        for username in (
+            cleaned_user_totals.keys()
+            | cleaned_last_seen.keys()
+            | cleaned_active_users.keys()
+            | set(cleaned_users.values())
+        ):
+            if username not in cleaned_flags:
+                cleaned_flags[username] = username.startswith("訪客")
         self._user_flags = cleaned_flags
+        self._guest_usernames = {username for username, flag in cleaned_flags.items() if flag}
         history = data.get("concurrent") or []
         cleaned_history: List[Dict[str, Any]] = []
         if isinstance(history, list):
@@ -1299,7 +1601,8 @@ class TrafficTracker:
                 except (TypeError, ValueError):
                     continue
                 cleaned_history.append({"ts": ts, "count": count})
-        self._concurrent_history = cleaned_history[-(self._max_events * 3) :]
+        self._concurrent_history.clear()
+        self._concurrent_history.extend(cleaned_history)
         hourly_series = data.get("hourly_series") or []
         cleaned_hourly_series: List[Dict[str, Any]] = []
         if isinstance(hourly_series, list):
@@ -1319,7 +1622,7 @@ class TrafficTracker:
         max_hourly = self._max_events * 24
         if len(cleaned_hourly_series) > max_hourly:
             cleaned_hourly_series = cleaned_hourly_series[-max_hourly:]
-        self._hourly_series = cleaned_hourly_series
+        self._hourly_counts = {entry["ts"]: entry["count"] for entry in cleaned_hourly_series}
         hourly_buckets = data.get("hourly_buckets") or {}
         cleaned_buckets: Dict[int, Set[str]] = {}
         if isinstance(hourly_buckets, dict):
@@ -1339,10 +1642,33 @@ class TrafficTracker:
                             continue
                 cleaned_buckets[bucket_ts] = bucket_set
         self._hourly_buckets = cleaned_buckets
-        for entry in list(self._hourly_series):
-            ts = entry.get("ts")
-            if ts not in self._hourly_buckets:
-                self._hourly_buckets[ts] = set()
+        daily_members = data.get("daily_members") or {}
+        cleaned_daily: Dict[int, Dict[str, int]] = {}
+        if isinstance(daily_members, dict):
+            for ts, members in daily_members.items():
+                if not isinstance(members, dict):
+                    continue
+                try:
+                    day_ts = int(ts)
+                except (TypeError, ValueError):
+                    continue
+                day_set: Dict[str, int] = {}
+                for name, hour_mask in members.items():
+                    try:
+                        day_set[str(name)] = int(hour_mask)
+                    except (TypeError, ValueError):
+                        continue
+                cleaned_daily[day_ts] = day_set
+        self._closed_day_members = cleaned_daily
+        self._open_day = _taipei_day_start(time.time())
+        self._compact_closed_days(self._open_day)
+        self._known_users = {
+            username
+            for username in (
+                self._user_total_hits.keys() | self._user_last_seen.keys() | self._active_users.keys()
+            )
+            if not self._is_guest_user(username)
+        }
         self._purge_expired(time.time())
 
     def _persist_state_payload(self, payload: Dict[str, Any]) -> None:
@@ -1354,29 +1680,41 @@ class TrafficTracker:
             return
         if not self._storage_path:
             return
+        tmp_path = self._storage_path.with_name(f"{self._storage_path.name}.tmp")
         try:
-            self._storage_path.write_text(json.dumps(payload, ensure_ascii=False), encoding="utf-8")
+            tmp_path.write_bytes(orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS))
+            os.replace(tmp_path, self._storage_path)
         except Exception:
             pass
 
-    def _save_to_disk(self) -> None:
-        payload = {
+    def _state_payload(self) -> Dict[str, Any]:
+        """Copy the persisted state; callers must hold ``_lock``."""
+        return {
             "total": self._total_hits,
-            "active": self._active_ips,
-            "last_total": self._last_total_increment,
-            "ip_totals": self._ip_total_hits,
+            "active": dict(self._active_ips),
+            "last_total": dict(self._last_total_increment),
+            "ip_totals": dict(self._ip_total_hits),
             "version": self._version,
-            "ip_users": self._ip_users,
-            "active_users": self._active_users,
-            "user_totals": self._user_total_hits,
-            "user_last_count": self._user_last_count,
-            "user_last_seen": self._user_last_seen,
-            "user_flags": self._user_flags,
-            "concurrent": self._concurrent_history,
-            "hourly_series": self._hourly_series,
+            "ip_users": dict(self._ip_users),
+            "active_users": dict(self._active_users),
+            "user_totals": dict(self._user_total_hits),
+            "user_last_count": dict(self._user_last_count),
+            "user_last_seen": dict(self._user_last_seen),
+            "user_flags": dict(self._user_flags),
+            "concurrent": list(self._concurrent_history),
+            "hourly_series": [{"ts": ts, "count": count} for ts, count in self._hourly_counts.items()],
             "hourly_buckets": {ts: list(names) for ts, names in self._hourly_buckets.items()},
+            "daily_members": {ts: dict(members) for ts, members in self._closed_day_members.items()},
         }
-        self._persist_state_payload(payload)
+
+    def _save_to_disk(self, payload: Dict[str, Any]) -> None:
+        with self._persist_lock:
+            version = int(payload.get("version") or 0)
+            if version <= self._persisted_version:
+                # A newer snapshot already reached the backend while this thread waited.
+                return
+            self._persisted_version = version
+            self._persist_state_payload(payload)
 
     def _purge_old_total_entries(self, now: float) -> None:
         expire_after = self._count_interval * 2
@@ -1385,10 +1723,11 @@ class TrafficTracker:
             self._last_total_increment.pop(ip, None)
 
     def _online_counts(self, now: float) -> Tuple[int, int]:
+        guests = self._guest_usernames
         active_usernames = [
             user
             for user, ts in self._active_users.items()
-            if ts and now - ts <= self._activity_window and not self._is_guest_user(user)
+            if ts and now - ts <= self._activity_window and user not in guests
         ]
         active_ips = [
             ip for ip, ts in self._active_ips.items() if ts and now - ts <= self._activity_window
@@ -1399,45 +1738,59 @@ class TrafficTracker:
         now = time.time()
         with self._lock:
             self._purge_expired(now)
-            unique_ips = set(self._ip_total_hits.keys()) | set(self._active_ips.keys())
-            online_ips = sum(
-                1 for ts in self._active_ips.values() if ts and now - ts <= self._activity_window
-            )
-            return {
-                "unique": len(unique_ips),
-                "online": online_ips,
-                "total": self._total_hits,
-            }
+            return dict(self._cached_view("ip_summary", now, self._compute_ip_summary, purged=True))
+
+    def _compute_ip_summary(self, now: float) -> Tuple[Dict[str, int], float]:
+        unique_ips = set(self._ip_total_hits.keys()) | set(self._active_ips.keys())
+        online_ips = sum(
+            1 for ts in self._active_ips.values() if ts and now - ts <= self._activity_window
+        )
+        summary = {
+            "unique": len(unique_ips),
+            "online": online_ips,
+            "total": self._total_hits,
+        }
+        return summary, math.inf
 
     def reset(self) -> None:
         with self._lock:
             self._active_ips.clear()
+            self._active_ip_heap.clear()
             self._last_total_increment.clear()
             self._ip_total_hits.clear()
             self._ip_users.clear()
+            self._user_ips.clear()
             self._active_users.clear()
+            self._active_user_heap.clear()
             self._user_total_hits.clear()
             self._user_last_count.clear()
             self._user_last_seen.clear()
             self._user_flags.clear()
-            self._recent_events = []
-            self._concurrent_history = []
-            self._concurrent_history = []
+            self._guest_usernames.clear()
+            self._known_users.clear()
+            self._daily_user_buckets.clear()
+            self._daily_user_refs.clear()
+            self._recent_events.clear()
+            self._concurrent_history.clear()
             self._total_hits = 0
             self._version += 1
-            self._save_to_disk()
+            payload = self._state_payload()
+        with self._log_lock:
+            self._pending_events.clear()
             if self._event_clearer:
                 try:
                     self._event_clearer()
                 except Exception:
                     pass
-            elif self._log_path:
+            elif self._log_fh:
                 try:
-                    self._log_path.write_text("", encoding="utf-8")
+                    self._log_fh.seek(0)
+                    self._log_fh.truncate()
                 except Exception:
                     pass
+        self._save_to_disk(payload)
 
-    def _append_event(self, event: Dict[str, Any]) -> None:
+    def _append_event(self, event: Dict[str, Any]) -> Dict[str, Any]:
         cleaned = {
             "ts": event.get("ts"),
             "ip": event.get("ip"),
@@ -1446,61 +1799,126 @@ class TrafficTracker:
             "meta": event.get("meta") or {},
         }
         self._recent_events.append(cleaned)
-        if len(self._recent_events) > self._max_events:
-            self._recent_events = self._recent_events[-self._max_events :]
-        if self._event_writer:
-            try:
-                self._event_writer(cleaned)
-            except Exception:
-                pass
-            return
-        if not self._log_path:
-            return
-        try:
-            with self._log_path.open("a", encoding="utf-8") as fh:
-                fh.write(json.dumps(cleaned, ensure_ascii=False) + "\n")
-        except Exception:
-            pass
+        return cleaned
+
+    def _write_event(self, event: Dict[str, Any]) -> None:
+        with self._log_lock:
+            if self._event_batch_writer:
+                self._pending_events.append(event)
+            elif self._event_writer:
+                try:
+                    self._event_writer(event)
+                except Exception:
+                    pass
+                return
+            elif not self._log_fh:
+                return
+            else:
+                try:
+                    self._log_fh.write(orjson.dumps(event, option=orjson.OPT_NON_STR_KEYS | orjson.OPT_APPEND_NEWLINE))
+                except Exception:
+                    return
+        self._dirty.set()
 
     def _load_recent_events(self) -> None:
         if self._event_loader:
+            self._recent_events.clear()
             try:
-                self._recent_events = self._event_loader(self._max_events) or []
+                self._recent_events.extend(self._event_loader(self._max_events) or [])
             except Exception:
-                self._recent_events = []
+                self._recent_events.clear()
             return
         if not self._log_path or not self._log_path.exists():
             return
         try:
-            lines = self._log_path.read_text(encoding="utf-8").splitlines()
+            # Stream the append-only log and keep only its tail instead of reading the whole file.
+            with self._log_path.open("rb") as fh:
+                lines = deque(fh, maxlen=self._max_events)
         except Exception:
             return
         events: List[Dict[str, Any]] = []
-        for raw in lines[-self._max_events :]:
+        for raw in lines:
             try:
-                event = json.loads(raw)
+                event = orjson.loads(raw)
             except Exception:
                 continue
             if isinstance(event, dict):
                 events.append(event)
-        self._recent_events = events
+        self._recent_events.clear()
+        self._recent_events.extend(events)
 
-    def recent_events(self, limit: int = 100) -> List[Dict[str, Any]]:
+    # The readers below share one immutable snapshot per tracker version instead of copying
+    # the underlying collections on every call; callers must treat the entries as read-only.
+    def recent_events(self, limit: int = 100) -> Tuple[Dict[str, Any], ...]:
         with self._lock:
-            subset = self._recent_events[-limit:]
-            return list(subset)
+            events = self._cached_view("recent_events", time.time(), lambda _now: (tuple(self._recent_events), math.inf))
+            return events[max(0, len(events) - limit) :]
 
-    def concurrent_history(self) -> List[Dict[str, Any]]:
+    def concurrent_history(self) -> Tuple[Dict[str, Any], ...]:
         with self._lock:
-            return list(self._concurrent_history)
+            return self._cached_view(
+                "concurrent_history",
+                time.time(),
+                lambda _now: (tuple(self._concurrent_history), math.inf),
+            )
 
-    def hourly_series(self) -> List[Dict[str, Any]]:
+    def hourly_series(self) -> Tuple[Dict[str, Any], ...]:
         with self._lock:
-            return list(self._hourly_series)
+            return self._cached_view(
+                "hourly_series",
+                time.time(),
+                lambda _now: (tuple({"ts": ts, "count": count} for ts, count in self._hourly_counts.items()), math.inf),
+            )
 
-    def hourly_buckets(self) -> Dict[int, Set[str]]:
+    def hourly_buckets(self) -> Dict[int, FrozenSet[str]]:
         with self._lock:
-            return {ts: set(names) for ts, names in self._hourly_buckets.items()}
+            buckets = self._cached_view(
+                "hourly_buckets",
+                time.time(),
+                self._compute_hourly_buckets,
+            )
+            return dict(buckets)
+
+    def _compute_hourly_buckets(self, now: float) -> Tuple[Dict[int, FrozenSet[str]], float]:
+        closed: Dict[int, Set[str]] = {}
+        for day_ts, members in self._closed_day_members.items():
+            for name, hour_mask in members.items():
+                for hour in range(24):
+                    if hour_mask >> hour & 1:
+                        closed.setdefault(day_ts + hour * 3600, set()).add(name)
+        # Every series timestamp gets a bucket, even when its members are no longer known.
+        buckets = {ts: frozenset(closed.get(ts, ())) for ts in self._hourly_counts}
+        for ts, names in self._hourly_buckets.items():
+            buckets[ts] = frozenset(names)
+        return buckets, math.inf
+
+    def daily_series(self) -> List[Dict[str, Any]]:
+        with self._lock:
+            return [dict(entry) for entry in self._cached_view("daily_series", time.time(), self._compute_daily_series)]
+
+    def _compute_daily_series(self, now: float) -> Tuple[List[Dict[str, Any]], float]:
+        counts = {_taipei_day_start(ts): 0 for ts in self._hourly_counts}
+        for day_ts, members in self._closed_day_members.items():
+            counts[day_ts] = len(members)
+        open_days: Dict[int, Set[str]] = {}
+        for ts, members in self._hourly_buckets.items():
+            open_days.setdefault(_taipei_day_start(ts), set()).update(members)
+        for day_ts, members in open_days.items():
+            counts[day_ts] = len(members)
+        return [{"ts": day_ts, "count": counts[day_ts]} for day_ts in sorted(counts)], math.inf
+
+    def _compact_closed_days(self, open_day: int) -> None:
+        """Fold the hourly member sets of days before ``open_day`` into per-user hour masks."""
+        for ts in [ts for ts in self._hourly_buckets if _taipei_day_start(ts) < open_day]:
+            day_ts = _taipei_day_start(ts)
+            hour_bit = 1 << (ts - day_ts) // 3600
+            day_members = self._closed_day_members.setdefault(day_ts, {})
+            for name in self._hourly_buckets.pop(ts):
+                day_members[name] = day_members.get(name, 0) | hour_bit
+        # Closed days share the hourly series' retention window.
+        oldest_day = _taipei_day_start(next(iter(self._hourly_counts))) if self._hourly_counts else open_day
+        for day_ts in [day_ts for day_ts in self._closed_day_members if day_ts < oldest_day]:
+            self._closed_day_members.pop(day_ts, None)
 
     def _store_concurrent_snapshot(self, now: float) -> None:
         user_count, _ = self._online_counts(now)
@@ -1509,121 +1927,115 @@ class TrafficTracker:
             self._concurrent_history[-1] = entry
         else:
             self._concurrent_history.append(entry)
-        max_len = self._max_events * 3
-        if len(self._concurrent_history) > max_len:
-            self._concurrent_history = self._concurrent_history[-max_len:]
 
     def _update_hourly(self, username: str, now: float) -> None:
         if not username or self._is_guest_user(username):
             return
-        bucket_dt = datetime.fromtimestamp(now, tz=TAIPEI_TZ).replace(minute=0, second=0, microsecond=0)
-        bucket_ts = int(bucket_dt.timestamp())
+        bucket_ts = _taipei_hour_start(now)
+        day_ts = _taipei_day_start(bucket_ts)
+        if self._open_day is None or day_ts > self._open_day:
+            self._open_day = day_ts
+            self._compact_closed_days(day_ts)
         bucket = self._hourly_buckets.setdefault(bucket_ts, set())
-        before = len(bucket)
+        if username in bucket:
+            return
         bucket.add(username)
-        if len(bucket) != before:
-            # update series entry for this bucket
-            self._hourly_series = [entry for entry in self._hourly_series if entry.get("ts") != bucket_ts]
-            self._hourly_series.append({"ts": bucket_ts, "count": len(bucket)})
-            self._hourly_series = sorted(self._hourly_series, key=lambda x: x["ts"])
-            max_len = self._max_events * 24
-            if len(self._hourly_series) > max_len:
-                drop = len(self._hourly_series) - max_len
-                old = self._hourly_series[:drop]
-                self._hourly_series = self._hourly_series[-max_len:]
-                for entry in old:
-                    ts = entry.get("ts")
-                    if ts in self._hourly_buckets:
-                        self._hourly_buckets.pop(ts, None)
+        counts = self._hourly_counts
+        if counts and bucket_ts not in counts and bucket_ts < next(reversed(counts)):
+            # Clock went backwards: keep the mapping ordered by bucket timestamp.
+            counts[bucket_ts] = len(bucket)
+            self._hourly_counts = counts = dict(sorted(counts.items()))
+        else:
+            counts[bucket_ts] = len(bucket)
+        max_len = self._max_events * 24
+        while len(counts) > max_len:
+            oldest = next(iter(counts))
+            counts.pop(oldest, None)
+            self._hourly_buckets.pop(oldest, None)
     def user_breakdown(self) -> List[Dict[str, Any]]:
-        now = time.time()
         with self._lock:
-            aggregated: Dict[str, Dict[str, Any]] = {}
-            def _entry(username: str) -> Dict[str, Any]:
-                return aggregated.setdefault(
-                    username,
-                    {"username": username, "count": 0, "last_seen": 0.0, "last_counted": None, "online": False},
-                )
-
-            for username, count in self._user_total_hits.items():
-                if self._is_guest_user(username):
-                    continue
-                entry = _entry(username)
-                entry["count"] = count
-                if username in self._user_last_count:
-                    entry["last_counted"] = self._user_last_count[username]
-                entry["last_seen"] = max(
-                    entry.get("last_seen") or 0.0,
-                    self._user_last_seen.get(username, 0.0),
-                    self._user_last_count.get(username, 0.0) or 0.0,
-                )
-
-            for username, last_seen in self._active_users.items():
-                if self._is_guest_user(username):
-                    continue
-                entry = _entry(username)
-                entry["last_seen"] = max(
-                    entry.get("last_seen") or 0.0,
-                    last_seen or 0.0,
-                    self._user_last_seen.get(username, 0.0),
-                )
-                if last_seen and now - last_seen <= self._activity_window:
-                    entry["online"] = True
-                if username in self._user_last_count:
-                    entry["last_counted"] = self._user_last_count[username]
-
-            for username, last_seen in self._user_last_seen.items():
-                if self._is_guest_user(username):
-                    continue
-                entry = _entry(username)
-                entry["last_seen"] = max(
-                    entry.get("last_seen") or 0.0,
-                    last_seen or 0.0,
-                    self._user_last_count.get(username, 0.0),
-                )
-                if username in self._user_total_hits:
-                    entry["count"] = self._user_total_hits.get(username, entry.get("count", 0))
-
-            entries = list(aggregated.values())
-            entries.sort(key=lambda item: item["count"], reverse=True)
-            return entries
+            return [dict(entry) for entry in self._cached_view("user_breakdown", time.time(), self._compute_user_breakdown)]
+
+    def _compute_user_breakdown(self, now: float) -> Tuple[List[Dict[str, Any]], float]:
+        totals = self._user_total_hits
+        active_users = self._active_users
+        last_seen_map = self._user_last_seen
+        last_count = self._user_last_count
+        flags = self._user_flags
+        window = self._activity_window
+        entries: List[Dict[str, Any]] = []
+        next_offline = math.inf
+        # One pass over the union of user keys, in first-seen order so ties keep their ordering.
+        for username in dict.fromkeys(itertools.chain(totals, active_users, last_seen_map)):
+            if flags.get(username, False):
+                continue
+            active_ts = active_users.get(username)
+            counted_ts = last_count.get(username)
+            counted = username in totals
+            last_seen = last_seen_map.get(username, 0.0) or 0.0
+            if active_ts:
+                last_seen = max(last_seen, active_ts)
+            if counted_ts and (counted or username in last_seen_map):
+                last_seen = max(last_seen, counted_ts)
+            online = bool(active_ts and now - active_ts <= window)
+            if online:
+                next_offline = min(next_offline, active_ts + window)
+            entries.append(
+                {
+                    "username": username,
+                    "count": totals.get(username, 0),
+                    "last_seen": last_seen,
+                    "last_counted": counted_ts if counted or username in active_users else None,
+                    "online": online,
+                }
+            )
+        entries.sort(key=lambda item: item["count"], reverse=True)
+        return entries, next_offline
 
     def ip_breakdown(self) -> List[Dict[str, Any]]:
-        now = time.time()
         with self._lock:
-            entries = []
-            for ip, count in self._ip_total_hits.items():
-                last_seen = self._active_ips.get(ip)
-                entries.append(
-                    {
-                        "ip": ip,
-                        "count": count,
-                        "last_seen": last_seen,
-                        "last_counted": self._last_total_increment.get(ip),
-                        "online": bool(last_seen and now - last_seen <= self._activity_window),
-                        "username": self._ip_users.get(ip),
-                    }
-                )
-            entries.sort(key=lambda item: item["count"], reverse=True)
-            return entries
+            return [dict(entry) for entry in self._cached_view("ip_breakdown", time.time(), self._compute_ip_breakdown)]
+
+    def _compute_ip_breakdown(self, now: float) -> Tuple[List[Dict[str, Any]], float]:
+        entries = []
+        next_offline = math.inf
+        for ip, count in self._ip_total_hits.items():
+            last_seen = self._active_ips.get(ip)
+            online = bool(last_seen and now - last_seen <= self._activity_window)
+            if online:
+                next_offline = min(next_offline, last_seen + self._activity_window)
+            entries.append(
+                {
+                    "ip": ip,
+                    "count": count,
+                    "last_seen": last_seen,
+                    "last_counted": self._last_total_increment.get(ip),
+                    "online": online,
+                    "username": self._ip_users.get(ip),
+                }
+            )
+        entries.sort(key=lambda item: item["count"], reverse=True)
+        return entries, next_offline
 
     def guest_summary(self) -> Dict[str, int]:
         now = time.time()
+        window = self._activity_window
         with self._lock:
             self._purge_expired(now)
-            total_guests = sum(1 for flag in self._user_flags.values() if flag)
-            active_guests: Set[str] = set()
-            for ip, ts in self._active_ips.items():
-                if not ts or now - ts > self._activity_window:
-                    continue
-                username = self._ip_users.get(ip)
-                if username and self._is_guest_user(username):
-                    active_guests.add(username)
-            return {"total": total_guests, "online": len(active_guests)}
+            guests = self._guest_usernames
+            ip_users = self._ip_users
+            active_users = {
+                ip_users.get(ip) for ip, ts in self._active_ips.items() if ts and now - ts <= window
+            }
+            return {"total": len(guests), "online": len(active_users & guests)}
+
 
+_TRUTHY_FLAG_VALUES = frozenset({"1", "true", "yes", "on"})
 
+
+@lru_cache(maxsize=64)
 def _env_flag_truthy(value: Optional[str]) -> bool:
-    return str(value or "").strip().lower() in ("1", "true", "yes", "on")
+    return str(value or "").strip().lower() in _TRUTHY_FLAG_VALUES
 
 
 
@@ -1654,6 +2066,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     storage.sync_study_plan_videos(STUDY_PLAN_VIDEO_INVENTORY)
 
     app = Flask(__name__)
+    app.json = OrjsonProvider(app)
     app.secret_key = env_defaults["web_secret"]
     app.extensions["e3_storage"] = storage
     app.jinja_env.globals["study_upload_tracker"] = STUDY_UPLOAD_TRACKER_TEMPLATE
@@ -1668,6 +2081,32 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         MAX_CONTENT_LENGTH=STUDY_NOTE_MAX_REQUEST_BYTES,
     )
 
+    compiled_templates: Dict[str, Any] = {}
+
+    def _render_page(source: str, **context: Any) -> str:
+        # Template sources are final once create_app runs (runtime installers patch them at
+        # import time), so each page is parsed and compiled once instead of on every request.
+        template = compiled_templates.get(source)
+        if template is None:
+            template = app.jinja_env.from_string(source)
+            compiled_templates[source] = template
+        return render_template(template, **context)
+
+    # Pages the runtime installers never patch are compiled up front, so the first visitor
+    # after a deploy (anonymous or admin) does not pay for parsing them.
+    for static_template in (
+        LOGIN_TEMPLATE,
+        PRIVACY_TEMPLATE,
+        TERMS_TEMPLATE,
+        HOME_TEMPLATE,
+        FEEDBACK_TEMPLATE,
+        WEB_TEMPLATE,
+        TRAFFIC_TEMPLATE,
+        ADMIN_FEEDBACK_TEMPLATE,
+        ANNOUNCEMENTS_TEMPLATE,
+    ):
+        compiled_templates[static_template] = app.jinja_env.from_string(static_template)
+
     @app.get("/favicon.ico")
     def favicon():
         return Response(status=204)
@@ -1684,6 +2123,11 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     canonical_host = (env_defaults.get("canonical_host") or "").strip()
     if canonical_host == "":
         canonical_host = None
+    canonical_netloc = None
+    if canonical_host:
+        canonical_netloc = canonical_host.lower().rstrip("./")
+        if "://" in canonical_netloc:
+            canonical_netloc = (urlsplit(canonical_netloc).netloc or canonical_netloc).rstrip(".")
     support_email = (env_defaults.get("support_email") or "support@e3hwtool.space").strip()
     if not support_email:
         support_email = "support@e3hwtool.space"
@@ -1697,6 +2141,9 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     legal_entity_name = env_defaults.get("legal_entity_name") or "E3 Homework Tracker Project"
     openai_api_key = (env_defaults.get("openai_api_key") or "").strip()
     openai_model = (env_defaults.get("openai_model") or DEFAULT_OPENAI_MODEL).strip()
+    # Study uploads and recall chats call the Responses API back to back; keep those TLS connections alive.
+    openai_http = requests.Session()
+    openai_http.mount("https://", HTTPAdapter(pool_connections=1, pool_maxsize=8))
     configured_upload_dir = (env_defaults.get("study_upload_dir") or "").strip()
     study_upload_root = Path(configured_upload_dir).expanduser() if configured_upload_dir else data_root / "study_note_images"
     _ensure_private_dir(study_upload_root)
@@ -1712,7 +2159,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         state_loader=storage.load_traffic_state,
         state_saver=storage.save_traffic_state,
         event_loader=lambda limit: storage.recent_traffic_events(limit),
-        event_writer=lambda event: storage.append_traffic_event(event, traffic_event_limit),
+        event_batch_writer=lambda events: storage.append_traffic_events_many(events, traffic_event_limit),
         event_clearer=storage.clear_traffic_events,
     )
 
@@ -1743,6 +2190,19 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     NEW_ASSIGNMENT_WINDOW_SECONDS = 5 * 60
     refresh_jobs_lock = threading.Lock()
     refresh_jobs: Dict[str, Dict[str, Any]] = {}
+    # Short follow-up work (login-time Excel exports, Google token refreshes) kept off the request path.
+    background_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="e3-background")
+    # Assignment crawls take seconds each; they get their own bounded pool so a burst of refreshes
+    # neither spawns a thread per request nor starves the short jobs above.
+    refresh_executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="e3-refresh")
+    excel_jobs_lock = threading.Lock()
+    excel_jobs: Dict[str, Future] = {}
+    google_refresh_lock = threading.Lock()
+    google_refreshing: Set[str] = set()
+    # Bumped on unlink/logout so a refresh that started earlier never stores the tokens again.
+    google_token_generation: Dict[str, int] = {}
+    google_token_cache: Dict[str, Dict[str, Any]] = {}
+    google_token_cache_lock = threading.Lock()
     study_upload_jobs_lock = threading.Lock()
     study_upload_jobs: Dict[str, Dict[str, Any]] = {}
     study_source_jobs_lock = threading.Lock()
@@ -1906,11 +2366,45 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 job.pop("error", None)
             refresh_jobs[username] = job
 
+    def prefetch_user_bundle(username: str) -> Dict[str, Any]:
+        """Load the cache, preferences and Google tokens once and reuse them for the rest of the request."""
+        cache, stored_prefs, google_tokens = storage.load_user_bundle(username)
+        bundle = {
+            "username": username,
+            "cache": cache,
+            "preferences": stored_prefs,
+            "google_tokens": google_tokens,
+        }
+        g.user_bundle = bundle
+        _remember_preferences(username, _merge_preferences(stored_prefs))
+        return bundle
+
+    def _prefetched_bundle(username: Optional[str]) -> Optional[Dict[str, Any]]:
+        if not username or not has_request_context():
+            return None
+        bundle = g.get("user_bundle")
+        if bundle is not None and bundle["username"] == username:
+            return bundle
+        return None
+
+    def _drop_prefetched_bundle(username: Optional[str]) -> None:
+        if _prefetched_bundle(username) is not None:
+            g.pop("user_bundle", None)
+
     def load_cache_from_disk(username: str) -> Optional[Dict[str, Any]]:
-        return storage.load_user_cache(username)
+        bundle = _prefetched_bundle(username)
+        if bundle is None:
+            return storage.load_user_cache(username)
+        cache = bundle["cache"]
+        if cache is not None and bundle["preferences"]:
+            cache["preferences"] = bundle["preferences"]
+        return cache
 
     def save_cache_to_disk(username: str, payload: Dict[str, Any]) -> None:
         storage.save_user_cache(username, payload)
+        _drop_prefetched_bundle(username)
+        if "preferences" in payload:
+            _forget_preferences(username)
 
     def _start_web_session(username: str, *, moodle_session: Optional[str], is_guest: bool, is_admin: bool, permanent: bool) -> None:
         session.clear()
@@ -1926,17 +2420,25 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     def current_user() -> Optional[Dict[str, Any]]:
         username = session.get("username")
         session_token = session.get("session_token")
+        # Memoized per request; a login, logout or invalidation changes the key and forces a re-check.
+        cache_key = (username, session_token)
+        cached = g.get("current_user_cache")
+        if cached is not None and cached[0] == cache_key:
+            return cached[1]
+        user: Optional[Dict[str, Any]] = None
         if username and session_token and storage.is_valid_web_session(session_token, username):
-            return {
+            user = {
                 "username": username,
                 "moodle_session": session.get("moodle_session"),
                 "is_guest": bool(session.get("is_guest")),
                 "is_admin": bool(session.get("is_admin")),
             }
-        if username or session_token:
+        elif username or session_token:
             session.clear()
             session.modified = True
-        return None
+            cache_key = (None, None)
+        g.current_user_cache = (cache_key, user)
+        return user
 
     def login_required(fn):
         @wraps(fn)
@@ -1964,23 +2466,35 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         if isinstance(value, bool):
             return value
         if isinstance(value, str):
-            lowered = value.strip().lower()
-            if lowered in {"1", "true", "yes", "on"}:
-                return True
-            if lowered in {"0", "false", "no", "off"}:
-                return False
-            return None
+            return PREFERENCE_BOOL_STRINGS.get(value.strip().lower())
         if isinstance(value, (int, float)):
             return bool(value)
         return None
 
     def _sanitize_preferences(raw: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         clean: Dict[str, Any] = {}
-        if not isinstance(raw, dict):
+        if not isinstance(raw, dict) or not raw:
             return clean
-        view_mode = raw.get("view_mode")
-        if view_mode is None:
-            view_mode = raw.get("viewMode")
+        # One pass over the submitted keys; when several spellings are present the
+        # lowest-ranked one that is not None wins, matching the old lookup order.
+        values: Dict[str, Any] = {}
+        ranks: Dict[str, int] = {}
+        provided: Set[str] = set()
+        for key, value in raw.items():
+            alias = PREFERENCE_KEY_ALIASES.get(key)
+            if alias is None:
+                continue
+            canonical, rank = alias
+            provided.add(canonical)
+            if value is None:
+                continue
+            previous_rank = ranks.get(canonical)
+            if previous_rank is None or rank < previous_rank:
+                values[canonical] = value
+                ranks[canonical] = rank
+        if not provided:
+            return clean
+        view_mode = values.get("view_mode")
         if isinstance(view_mode, str):
             lowered = view_mode.strip().lower()
             if lowered in {"course", "due"}:
@@ -2013,41 +2527,13 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                     normalized.append(lowered)
             return normalized
 
-        status_filter_provided = False
-        status_filter = raw.get("status_filter")
-        if "status_filter" in raw:
-            status_filter_provided = True
-        if status_filter is None:
-            status_filter = raw.get("statusFilter")
-            if "statusFilter" in raw:
-                status_filter_provided = True
-        if status_filter is None:
-            status_filter = raw.get("statusFilters")
-            if "statusFilters" in raw:
-                status_filter_provided = True
-        normalized_status_filters = _normalize_status_filters(status_filter)
-        if status_filter_provided:
-            clean["status_filter"] = normalized_status_filters
-        include_ignored_overdue = raw.get("include_ignored_overdue")
-        if include_ignored_overdue is None:
-            include_ignored_overdue = raw.get("includeIgnoredOverdue")
-        coerced_include = _coerce_bool(include_ignored_overdue)
-        if coerced_include is not None:
-            clean["include_ignored_overdue"] = coerced_include
-        for key, alias in (
-            ("show_overdue", "showOverdue"),
-            ("show_completed", "showCompleted"),
-            ("show_graded", "showGraded"),
-        ):
-            value = raw.get(key)
-            if value is None and alias:
-                value = raw.get(alias)
-            coerced = _coerce_bool(value)
+        if "status_filter" in provided:
+            clean["status_filter"] = _normalize_status_filters(values.get("status_filter"))
+        for key in ("include_ignored_overdue", "show_overdue", "show_completed", "show_graded"):
+            coerced = _coerce_bool(values.get(key))
             if coerced is not None:
                 clean[key] = coerced
-        ignored_overdue_uids = raw.get("ignored_overdue_uids")
-        if ignored_overdue_uids is None:
-            ignored_overdue_uids = raw.get("ignoredOverdueUids")
+        ignored_overdue_uids = values.get("ignored_overdue_uids")
         if isinstance(ignored_overdue_uids, list):
             clean["ignored_overdue_uids"] = [
                 str(item).strip()
@@ -2117,13 +2603,54 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             )
         return items
 
-    def get_user_preferences(username: Optional[str] = None) -> Dict[str, Any]:
+    PREFERENCES_CACHE_SIZE = 2048
+    PREFERENCES_CACHE_TTL_SECONDS = 60.0
+    preferences_cache: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+    preferences_cache_lock = threading.Lock()
+
+    def _copy_preferences(prefs: Dict[str, Any]) -> Dict[str, Any]:
+        return {key: list(value) if isinstance(value, list) else value for key, value in prefs.items()}
+
+    def _cached_preferences(username: str) -> Optional[Dict[str, Any]]:
+        with preferences_cache_lock:
+            entry = preferences_cache.get(username)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del preferences_cache[username]
+                return None
+            preferences_cache.move_to_end(username)
+            return _copy_preferences(entry[1])
+
+    def _remember_preferences(username: str, prefs: Dict[str, Any]) -> None:
+        with preferences_cache_lock:
+            preferences_cache[username] = (time.monotonic() + PREFERENCES_CACHE_TTL_SECONDS, _copy_preferences(prefs))
+            preferences_cache.move_to_end(username)
+            while len(preferences_cache) > PREFERENCES_CACHE_SIZE:
+                preferences_cache.popitem(last=False)
+
+    def _forget_preferences(username: Optional[str]) -> None:
+        if not username:
+            return
+        with preferences_cache_lock:
+            preferences_cache.pop(username, None)
+
+    def _merge_preferences(stored: Optional[Dict[str, Any]]) -> Dict[str, Any]:
         prefs = dict(DEFAULT_PREFERENCES)
+        prefs.update(_sanitize_preferences(stored))
+        return prefs
+
+    def get_user_preferences(username: Optional[str] = None) -> Dict[str, Any]:
         resolved_username = _selected_view_username(username)
         if not resolved_username:
-            return prefs
-        stored = storage.load_user_preferences(resolved_username)
-        prefs.update(_sanitize_preferences(stored))
+            return dict(DEFAULT_PREFERENCES)
+        cached = _cached_preferences(resolved_username)
+        if cached is not None:
+            return cached
+        bundle = _prefetched_bundle(resolved_username)
+        stored = bundle["preferences"] if bundle is not None else storage.load_user_preferences(resolved_username)
+        prefs = _merge_preferences(stored)
+        _remember_preferences(resolved_username, prefs)
         return prefs
 
     def update_user_preferences(partial: Dict[str, Any], *, username: Optional[str] = None) -> Dict[str, Any]:
@@ -2134,6 +2661,8 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         if not resolved_username:
             return prefs
         storage.save_user_preferences(resolved_username, prefs)
+        _drop_prefetched_bundle(resolved_username)
+        _remember_preferences(resolved_username, prefs)
         return prefs
 
     def get_assign_cache(username: Optional[str] = None) -> Optional[Dict[str, Any]]:
@@ -2202,43 +2731,114 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 item["is_new"] = bool(first_seen_ts is not None and now_ts - int(first_seen_ts) <= NEW_ASSIGNMENT_WINDOW_SECONDS)
                 item["new_until_ts"] = (int(first_seen_ts) + NEW_ASSIGNMENT_WINDOW_SECONDS) if first_seen_ts is not None else None
 
-    def set_assign_cache_for_user(username: str, result: Dict[str, Any], excel_data: Optional[str]) -> None:
+    def set_assign_cache_for_user(
+        username: str,
+        result: Dict[str, Any],
+        excel_data: Optional[str],
+        *,
+        existing: Optional[Dict[str, Any]] = None,
+    ) -> Optional[int]:
         if not username:
-            return
-        existing = load_cache_from_disk(username) or {}
+            return None
+        if existing is None:
+            existing = load_cache_from_disk(username) or {}
         slim = dict(result)
         slim.pop("debug_files", None)
         slim.pop("login_method", None)
         payload = {
             "result": json_safe(slim),
             "excel_data": excel_data,
-            "ts": int(datetime.now(TAIPEI_TZ).timestamp()),
+            "ts": int(time.time()),
         }
         stored_prefs = _sanitize_preferences(existing.get("preferences"))
         if stored_prefs:
             payload["preferences"] = stored_prefs
         save_cache_to_disk(username, payload)
+        return payload["ts"]
 
-    def set_assign_cache(result: Dict[str, Any], excel_data: Optional[str]) -> None:
+    def set_assign_cache(
+        result: Dict[str, Any],
+        excel_data: Optional[str],
+        *,
+        existing: Optional[Dict[str, Any]] = None,
+    ) -> Optional[int]:
         user = current_user()
         if not user:
-            return
-        set_assign_cache_for_user(user["username"], result, excel_data)
+            return None
+        return set_assign_cache_for_user(user["username"], result, excel_data, existing=existing)
+
+    EXCEL_CACHE_SIZE = 32
+    excel_cache: "OrderedDict[str, str]" = OrderedDict()
+    excel_cache_lock = threading.Lock()
 
     def _generate_excel_data(assignments: Optional[List[Dict[str, Any]]]) -> Optional[str]:
         if not assignments:
             return None
         try:
+            # The workbook is a pure function of the assignment list, so identical lists
+            # (re-imports, dashboard fallbacks, unchanged refreshes) reuse the encoded file.
+            fingerprint = hashlib.blake2b(
+                orjson.dumps(assignments, option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS),
+                digest_size=16,
+            ).hexdigest()
+        except Exception:
+            fingerprint = None
+        if fingerprint is not None:
+            with excel_cache_lock:
+                cached = excel_cache.get(fingerprint)
+                if cached is not None:
+                    excel_cache.move_to_end(fingerprint)
+                    return cached
+        try:
+            # openpyxl is the slowest import in the app and only this background job needs it.
+            from ..shared.excel import build_excel
+
             excel_stream = build_excel(assignments, return_bytes=True)
-            return base64.b64encode(excel_stream.getvalue()).decode("ascii")
+            excel_data = base64.b64encode(excel_stream.getvalue()).decode("ascii")
         except Exception:
             return None
+        if fingerprint is not None:
+            with excel_cache_lock:
+                excel_cache[fingerprint] = excel_data
+                excel_cache.move_to_end(fingerprint)
+                while len(excel_cache) > EXCEL_CACHE_SIZE:
+                    excel_cache.popitem(last=False)
+        return excel_data
+
+    def _schedule_excel_build(username: str, result: Dict[str, Any], fetched_ts: Optional[int]) -> None:
+        assignments = result.get("all_assignments")
+        if not username or not assignments or fetched_ts is None:
+            return
+
+        def _build() -> Optional[str]:
+            try:
+                excel_data = _generate_excel_data(assignments)
+                if excel_data:
+                    storage.save_user_excel_data(username, excel_data, fetched_ts=fetched_ts)
+                return excel_data
+            finally:
+                with excel_jobs_lock:
+                    if excel_jobs.get(username) is future:
+                        del excel_jobs[username]
+
+        with excel_jobs_lock:
+            future = background_executor.submit(_build)
+            excel_jobs[username] = future
+
+    def _excel_build_pending(username: Optional[str]) -> bool:
+        if not username:
+            return False
+        with excel_jobs_lock:
+            future = excel_jobs.get(username)
+        return bool(future and not future.done())
 
     def clear_assign_cache() -> None:
         user = current_user()
         if not user:
             return
         storage.delete_user_cache(user["username"])
+        _drop_prefetched_bundle(user["username"])
+        _forget_preferences(user["username"])
 
     ANNOUNCEMENT_LIMIT = 50
 
@@ -2281,17 +2881,34 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             "user_vote": user_vote,
         }
 
+    ANNOUNCEMENT_CACHE_SIZE = 512
+    announcements_cache: Dict[str, List[Dict[str, Any]]] = {}
+    announcements_cache_lock = threading.Lock()
+
+    def _invalidate_announcements() -> None:
+        with announcements_cache_lock:
+            announcements_cache.clear()
+
     def load_announcements(username: Optional[str] = None) -> List[Dict[str, Any]]:
         if username is None and has_request_context():
             user = current_user()
             if user:
                 username = user.get("username")
+        cache_key = username or ""
+        with announcements_cache_lock:
+            cached = announcements_cache.get(cache_key)
+        if cached is not None:
+            return [dict(item) for item in cached]
         items: List[Dict[str, Any]] = []
         for raw in storage.list_announcements_with_votes(ANNOUNCEMENT_LIMIT, username=username):
             parsed = _serialize_announcement(raw)
             if parsed:
                 items.append(parsed)
-        return items
+        with announcements_cache_lock:
+            if len(announcements_cache) >= ANNOUNCEMENT_CACHE_SIZE:
+                announcements_cache.clear()
+            announcements_cache[cache_key] = items
+        return [dict(item) for item in items]
 
     def add_announcement(title: str, content: str, author: Optional[str]) -> None:
         title = title.strip()
@@ -2308,20 +2925,25 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             "created_label": now.strftime("%Y-%m-%d %H:%M"),
         }
         storage.insert_announcement(entry, ANNOUNCEMENT_LIMIT)
+        _invalidate_announcements()
 
     def delete_announcement_entry(announcement_id: str) -> bool:
         announcement_id = (announcement_id or "").strip()
         if not announcement_id:
             return False
-        return storage.delete_announcement(announcement_id)
+        deleted = storage.delete_announcement(announcement_id)
+        if deleted:
+            _invalidate_announcements()
+        return deleted
 
     def set_announcement_vote(announcement_id: str, username: str, vote_type: Optional[str]) -> Optional[Dict[str, Any]]:
         updated = storage.set_announcement_vote(announcement_id, username, vote_type)
         if not updated:
             return None
+        _invalidate_announcements()
         return _serialize_announcement(updated)
 
-    FEEDBACK_LIMIT = 200
+    FEEDBACK_PAGE_SIZE = 50
     VALID_FEEDBACK_STATUS = {"open", "resolved"}
 
     def add_feedback_entry(message: str, email: Optional[str], username: Optional[str]) -> int:
@@ -2337,32 +2959,28 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             "message": message,
             "status": "open",
             "created_at": now.isoformat(),
+            "created_label": now.strftime("%Y-%m-%d %H:%M"),
         }
         return storage.add_feedback(entry)
 
-    def list_feedback_entries() -> List[Dict[str, Any]]:
+    def list_feedback_entries(
+        before_id: Optional[int] = None, limit: int = FEEDBACK_PAGE_SIZE
+    ) -> List[Dict[str, Any]]:
         items: List[Dict[str, Any]] = []
-        for raw in storage.list_feedback(FEEDBACK_LIMIT):
-            parsed = {
-                "id": raw.get("id"),
-                "username": (raw.get("username") or "-"),
-                "email": (raw.get("email") or "-"),
-                "message": raw.get("message") or "",
-                "status": raw.get("status") or "open",
-                "created_at": raw.get("created_at") or "",
-            }
-            ts_raw = parsed["created_at"]
-            if ts_raw:
-                try:
-                    dt = datetime.fromisoformat(ts_raw)
-                    if not dt.tzinfo:
-                        dt = dt.replace(tzinfo=TAIPEI_TZ)
-                    parsed["created_label"] = dt.astimezone(TAIPEI_TZ).strftime("%Y-%m-%d %H:%M")
-                except Exception:
-                    parsed["created_label"] = ts_raw
-            else:
-                parsed["created_label"] = "-"
-            items.append(parsed)
+        for raw in storage.list_feedback(limit, before_id=before_id):
+            created_at = raw.get("created_at") or ""
+            items.append(
+                {
+                    "id": raw.get("id"),
+                    "username": (raw.get("username") or "-"),
+                    "email": (raw.get("email") or "-"),
+                    "message": raw.get("message") or "",
+                    "status": raw.get("status") or "open",
+                    "created_at": created_at,
+                    # Labels are stored at insert time; older rows were backfilled by the schema check.
+                    "created_label": raw.get("created_label") or created_at or "-",
+                }
+            )
         return items
 
     def update_feedback_status_entry(feedback_id: int, status: str) -> bool:
@@ -2374,27 +2992,29 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             return False
         return storage.update_feedback_status(fid, status)
 
-    def _google_ready() -> bool:
-        return bool(google_client_id and google_client_secret and google_redirect_uri)
+    # OAuth settings are read from the environment once; every Google route is gated on
+    # google_ready, which also guarantees the configured redirect URI is set.
+    google_ready = bool(google_client_id and google_client_secret and google_redirect_uri)
 
     def _assignment_uid(item: Dict[str, Any]) -> str:
         return f"{item.get('course_id')}|{item.get('title')}|{item.get('url')}"
 
-    def _select_assignments_from_result(result: Optional[Dict[str, Any]], selected_uids: List[str]) -> List[Dict[str, Any]]:
+    def _select_assignments_from_result(
+        result: Optional[Dict[str, Any]], selected_uids: FrozenSet[str]
+    ) -> List[Dict[str, Any]]:
         if not isinstance(result, dict) or not selected_uids:
             return []
-        selected = set(selected_uids)
+        uid = _assignment_uid
         return [
             item
             for item in result.get("all_assignments", [])
-            if _assignment_uid(item) in selected
+            if uid(item) in selected_uids
         ]
 
-    def _google_redirect_uri() -> str:
-        return google_redirect_uri or url_for("google_callback", _external=True)
+    google_state_serializer = URLSafeTimedSerializer(app.secret_key, salt="google-calendar")
 
     def _google_state_signer() -> URLSafeTimedSerializer:
-        return URLSafeTimedSerializer(app.secret_key, salt="google-calendar")
+        return google_state_serializer
 
     def _build_google_state() -> str:
         token = secrets.token_urlsafe(16)
@@ -2410,25 +3030,63 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             flash("Google 授權驗證失敗，請重新操作。", "error")
         return False
 
+    def _remember_google_tokens(username: str, tokens: Optional[Dict[str, Any]]) -> None:
+        with google_token_cache_lock:
+            if tokens and tokens.get("access_token"):
+                google_token_cache[username] = dict(tokens)
+            else:
+                google_token_cache.pop(username, None)
+
+    def _cached_google_tokens(username: str) -> Optional[Dict[str, Any]]:
+        # Tokens are served from memory until they enter the prefetch window; past that point
+        # storage is consulted again so a background refresh or an unlink is picked up.
+        with google_token_cache_lock:
+            cached = google_token_cache.get(username)
+            if cached is None:
+                return None
+            if cached.get("expires_at", 0) - time.time() <= GOOGLE_TOKEN_PREFETCH_SECONDS:
+                google_token_cache.pop(username, None)
+                return None
+            return dict(cached)
+
     def load_google_tokens(username: str) -> Optional[Dict[str, Any]]:
-        return storage.load_google_tokens(username)
+        cached = _cached_google_tokens(username)
+        if cached is not None:
+            return cached
+        bundle = _prefetched_bundle(username)
+        if bundle is not None:
+            tokens = bundle["google_tokens"]
+        else:
+            tokens = storage.load_google_tokens(username)
+        _remember_google_tokens(username, tokens)
+        return tokens
 
     def save_google_tokens(username: str, payload: Dict[str, Any]) -> None:
         storage.save_google_tokens(username, dict(payload))
+        _drop_prefetched_bundle(username)
+        _remember_google_tokens(username, payload)
 
     def clear_google_tokens(username: str) -> None:
+        with google_refresh_lock:
+            google_token_generation[username] = google_token_generation.get(username, 0) + 1
         storage.clear_google_tokens(username)
+        _drop_prefetched_bundle(username)
+        _remember_google_tokens(username, None)
 
     def _client_ip() -> Optional[str]:
         if not has_request_context():
             return None
+        cached = g.get("client_ip", False)
+        if cached is not False:
+            return cached
+        ip = None
         forwarded = request.headers.get("X-Forwarded-For", "")
         if forwarded:
-            for part in forwarded.split(","):
-                ip = part.strip()
-                if ip:
-                    return ip
-        return request.remote_addr
+            ip = forwarded.partition(",")[0].strip()
+            if not ip:
+                ip = next((part.strip() for part in forwarded.split(",") if part.strip()), None)
+        g.client_ip = ip or request.remote_addr
+        return g.client_ip
 
     def record_ui_event(action: str, status: str = "success", meta: Optional[Dict[str, Any]] = None) -> None:
         if not action:
@@ -2447,15 +3105,21 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     def current_stats_version() -> int:
         return traffic_tracker.version()
 
-    def _ensure_google_access_token(username: str, tokens: Dict[str, Any]) -> Dict[str, Any]:
-        if not _google_ready():
-            raise RuntimeError("尚未設定 Google OAuth。")
-        expires_at = tokens.get("expires_at", 0)
-        if time.time() < expires_at - 60:
-            return tokens
+    GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS = 60
+    GOOGLE_TOKEN_PREFETCH_SECONDS = 300
+
+    def _google_token_generation(username: str) -> int:
+        with google_refresh_lock:
+            return google_token_generation.get(username, 0)
+
+    def _refresh_google_access_token(
+        username: str, tokens: Dict[str, Any], generation: Optional[int] = None
+    ) -> Dict[str, Any]:
         refresh_token = tokens.get("refresh_token")
         if not refresh_token:
             raise RuntimeError("Google access token 已過期，請重新授權。")
+        if generation is None:
+            generation = _google_token_generation(username)
         refreshed = refresh_google_token(
             refresh_token,
             client_id=google_client_id,
@@ -2463,51 +3127,71 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         )
         tokens["access_token"] = refreshed.get("access_token")
         tokens["expires_at"] = compute_expiry(refreshed.get("expires_in", 3600))
-        save_google_tokens(username, tokens)
+        # Saving under the lock keeps clear_google_tokens from slipping in between the check and the write.
+        with google_refresh_lock:
+            if google_token_generation.get(username, 0) == generation:
+                save_google_tokens(username, tokens)
         return tokens
 
-    def _escape_ics_text(value: Optional[str]) -> str:
-        text = (value or "").replace("\\", "\\\\")
-        text = text.replace("\n", "\\n").replace(",", "\\,").replace(";", "\\;")
-        return text
+    def _schedule_google_token_refresh(username: str, tokens: Dict[str, Any]) -> None:
+        if not tokens.get("refresh_token"):
+            return
+        with google_refresh_lock:
+            if username in google_refreshing:
+                return
+            google_refreshing.add(username)
+            generation = google_token_generation.get(username, 0)
 
-    def _build_calendar(assignments: List[Dict[str, Any]]) -> Optional[str]:
-        if not assignments:
-            return None
-        dtstamp = datetime.now(TAIPEI_TZ).strftime("%Y%m%dT%H%M%S")
-        lines = [
-            "BEGIN:VCALENDAR",
-            "VERSION:2.0",
-            "PRODID:-//NYCU E3//EN",
-            "CALSCALE:GREGORIAN",
-            "X-WR-TIMEZONE:Asia/Taipei",
-        ]
+        def _refresh() -> None:
+            try:
+                _refresh_google_access_token(username, dict(tokens), generation)
+            except Exception:
+                # The next request past the hard margin retries synchronously and reports the error.
+                pass
+            finally:
+                with google_refresh_lock:
+                    google_refreshing.discard(username)
+
+        background_executor.submit(_refresh)
+
+    def _ensure_google_access_token(username: str, tokens: Dict[str, Any]) -> Dict[str, Any]:
+        if not google_ready:
+            raise RuntimeError("尚未設定 Google OAuth。")
+        remaining = tokens.get("expires_at", 0) - time.time()
+        if remaining > GOOGLE_TOKEN_REFRESH_MARGIN_SECONDS:
+            if remaining < GOOGLE_TOKEN_PREFETCH_SECONDS:
+                # Still usable: serve it now and renew it before the next request needs a new one.
+                _schedule_google_token_refresh(username, tokens)
+            return tokens
+        return _refresh_google_access_token(username, tokens)
+
+    def _escape_ics_text(value: Optional[str]) -> str:
+        return (value or "").translate(_ICS_ESCAPES)
+
+    def _iter_calendar(assignments: List[Dict[str, Any]]) -> Iterator[str]:
+        """Yield the iCalendar body one VEVENT at a time so the response can be streamed."""
+        dtstamp = _taipei_ics_stamp(time.time())
+        render_event = _ICS_EVENT_TEMPLATE.format
+        escape = _escape_ics_text
+        yield _ICS_HEADER
         for idx, entry in enumerate(assignments):
-            due_ts = entry.get("due_ts")
-            if not due_ts:
+            if not entry.get("due_ts"):
                 continue
-            due_dt = datetime.fromtimestamp(due_ts, tz=TAIPEI_TZ)
-            end_dt = due_dt + timedelta(hours=1)
-            dt_value = due_dt.strftime("%Y%m%dT%H%M%S")
-            dt_end_value = end_dt.strftime("%Y%m%dT%H%M%S")
-            summary = entry.get("title", "").strip()
-            description = entry.get("url") or ""
-            lines += [
-                "BEGIN:VEVENT",
-                f"UID=e3-{entry.get('course_id', 'unknown')}-{idx}@e3",
-                f"DTSTAMP={dtstamp}",
-                f"DTSTART;TZID=Asia/Taipei:{dt_value}",
-                f"DTEND;TZID=Asia/Taipei:{dt_end_value}",
-                f"SUMMARY:{_escape_ics_text(summary)}",
-                f"DESCRIPTION:{_escape_ics_text(description)}",
-                "END:VEVENT",
-            ]
-        lines.append("END:VCALENDAR")
-        return "\r\n".join(lines)
+            yield "\r\n" + render_event(
+                course_id=entry.get("course_id", "unknown"),
+                idx=idx,
+                dtstamp=dtstamp,
+                start=_taipei_ics_stamp(entry["due_ts"]),
+                end=_taipei_ics_stamp(entry["due_ts"] + 3600),
+                summary=escape(entry.get("title", "").strip()),
+                description=escape(entry.get("url") or ""),
+            )
+        yield "\r\nEND:VCALENDAR"
 
     def _build_dashboard_context(user: Dict[str, Any]) -> Dict[str, Any]:
         admin_view_options: List[Dict[str, Any]] = []
         viewed_username = user["username"]
+        prefetch_user_bundle(user["username"])
         if user.get("is_admin"):
             admin_view_options = list_admin_view_options()
             requested_view_username = (_request_view_username() or "").strip()
@@ -2539,10 +3223,12 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         result = cache.get("result") if cache else None
         excel_data = cache.get("excel_data") if cache else None
         guest_mode = bool(user.get("is_guest"))
-        if result and not excel_data:
+        # A post-login build still running is left to finish; the page polls /api/cache for it.
+        excel_pending = bool(result and not excel_data and _excel_build_pending(viewed_username))
+        if result and not excel_data and not excel_pending:
             excel_data = _generate_excel_data(result.get("all_assignments"))
             if excel_data:
-                set_assign_cache_for_user(viewed_username, result, excel_data)
+                set_assign_cache_for_user(viewed_username, result, excel_data, existing=cache)
         if not result and not guest_mode and not is_admin_view:
             flash("正在載入資料，請稍候...", "info")
         google_linked = bool(not is_admin_view and load_google_tokens(user["username"]))
@@ -2550,7 +3236,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         stats_version_value = current_stats_version()
         announcements_list = load_announcements(None if is_admin_view else user["username"])
         cache_ts_val = cache.get("ts") if cache else None
-        now_ts = int(datetime.now(TAIPEI_TZ).timestamp())
+        now_ts = int(time.time())
         _annotate_new_assignments(
             result,
             username=viewed_username,
@@ -2566,8 +3252,9 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         return {
             "result": result,
             "excel_data": excel_data,
+            "excel_pending": excel_pending,
             "user": user,
-            "google_ready": _google_ready(),
+            "google_ready": google_ready,
             "google_linked": google_linked,
             "guest_mode": guest_mode,
             "stats": stats,
@@ -3692,7 +4379,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         for attempt in range(6):
             _raise_if_study_upload_cancelled()
             try:
-                response = requests.post(
+                response = openai_http.post(
                     "https://api.openai.com/v1/responses",
                     headers={"Authorization": f"Bearer {openai_api_key}", "Content-Type": "application/json"},
                     json=request_body,
@@ -10544,7 +11231,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         }
         try:
             _raise_if_study_upload_cancelled()
-            response = requests.post(
+            response = openai_http.post(
                 "https://api.openai.com/v1/responses",
                 headers={"Authorization": f"Bearer {openai_api_key}", "Content-Type": "application/json"},
                 json=request_body,
@@ -10642,7 +11329,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         storage.replace_study_recall_concepts_bulk(concepts_by_session)
         return None
 
-    def fetch_assignments_for(user: Dict[str, str]) -> Tuple[Dict[str, Any], Optional[str]]:
+    def fetch_assignments_for(user: Dict[str, str], *, with_excel: bool = True) -> Tuple[Dict[str, Any], Optional[str]]:
         opts = CollectOptions(
             base_url=base_url,
             scope=default_scope,
@@ -10658,44 +11345,62 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             debug=False,
         )
         result = collect_assignments(opts)
-        excel_data = _generate_excel_data(result.get("all_assignments"))
+        excel_data = _generate_excel_data(result.get("all_assignments")) if with_excel else None
         return result, excel_data
 
+    def _start_background_refresh(username: str, moodle_session_val: Optional[str]) -> bool:
+        """Fetch, cache and export a user's assignments off the request path; False if one is already running."""
+        if not _mark_refresh_job_started(username):
+            return False
+
+        def _run_background():
+            with app.app_context():
+                try:
+                    result, _ = fetch_assignments_for(
+                        {"username": username, "moodle_session": moodle_session_val},
+                        with_excel=False,
+                    )
+                    fetched_ts = set_assign_cache_for_user(username, result, None)
+                    _schedule_excel_build(username, result, fetched_ts)
+                    record_ui_event(
+                        "refresh_assignments",
+                        "success",
+                        {"items": len(result.get("all_assignments", [])), "mode": "background"},
+                    )
+                except Exception as exc:  # pragma: no cover - background logging
+                    record_ui_event("refresh_assignments", "error", {"reason": str(exc), "mode": "background"})
+                    _mark_refresh_job_done(username, status="error", error=str(exc))
+                else:
+                    _mark_refresh_job_done(username, status="success")
+
+        refresh_executor.submit(_run_background)
+        return True
+
     @app.before_request
     def enforce_canonical_host():
-        if not canonical_host:
+        if not canonical_netloc:
             return
-        forwarded_host = request.headers.get("X-Forwarded-Host")
-        host = (forwarded_host or request.host).split(",", 1)[0].strip()
-        normalized_host = host.lower().rstrip(".")
-        desired_host = canonical_host.lower().strip().rstrip("./")
-        if "://" in desired_host:
-            desired_host = (urlsplit(desired_host).netloc or desired_host).rstrip(".")
-        proto = request.headers.get("X-Forwarded-Proto", request.scheme)
-        needs_host_redirect = normalized_host != desired_host
-        needs_proto_redirect = proto != "https"
-        if needs_host_redirect or needs_proto_redirect:
-            parts = urlsplit(request.url)
-            new_url = urlunsplit(
-                (
-                    "https",
-                    desired_host,
-                    parts.path,
-                    parts.query,
-                    parts.fragment,
-                )
+        host = request.headers.get("X-Forwarded-Host") or request.host
+        if host != canonical_netloc:
+            host = host.split(",", 1)[0].strip().lower().rstrip(".")
+        if host != canonical_netloc or request.headers.get("X-Forwarded-Proto", request.scheme) != "https":
+            new_url = get_current_url(
+                "https",
+                canonical_netloc,
+                root_path=request.root_path,
+                path=request.path,
+                query_string=request.query_string,
             )
             return redirect(new_url, code=301)
 
     @app.after_request
     def add_no_store_headers(resp):
-        cache_control = resp.headers.get("Cache-Control", "")
-        content_disposition = resp.headers.get("Content-Disposition", "")
-        if "attachment" in content_disposition.lower() or cache_control.startswith("public"):
+        headers = resp.headers
+        if headers.get("Cache-Control", "").startswith("public") or headers.get(
+            "Content-Disposition", ""
+        ).startswith(("attachment", "Attachment")):
             return resp
-        resp.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-        resp.headers["Pragma"] = "no-cache"
-        resp.headers["Expires"] = "0"
+        headers.update(NO_STORE_HEADERS)
         return resp
 
     @app.route("/login", methods=["GET", "POST"])
@@ -10711,13 +11416,14 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 else:
                     digest = hashlib.sha1(raw_session.encode("utf-8")).hexdigest()[:10]
                     session_label = f"Session-{digest}"
-                    existing_cache = load_cache_from_disk(session_label)
+                    existing_cache = prefetch_user_bundle(session_label)["cache"]
                     try:
                         result = None
                         excel_data = None
                         if not existing_cache:
                             result, excel_data = fetch_assignments_for(
-                                {"username": session_label, "moodle_session": raw_session}
+                                {"username": session_label, "moodle_session": raw_session},
+                                with_excel=False,
                             )
                         _start_web_session(
                             session_label,
@@ -10731,14 +11437,13 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                             flash("已載入先前的課程資料，系統將在背景自動更新最新內容。", "info")
                         else:
                             try:
-                                set_assign_cache(result, excel_data)
+                                fetched_ts = set_assign_cache(result, excel_data, existing=existing_cache or {})
+                                _schedule_excel_build(session_label, result, fetched_ts)
                                 flash("已成功透過 E3 Session 取得最新資訊。", "success")
                             except Exception:
                                 flash("Session 登入成功，但暫存資料寫入失敗。", "warning")
                         response = redirect(url_for("index"))
-                        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-                        response.headers["Pragma"] = "no-cache"
-                        response.headers["Expires"] = "0"
+                        response.headers.update(NO_STORE_HEADERS)
                         return response
                     except Exception as exc:
                         flash(f"Session 驗證失敗：{exc}，請確認 MoodleSession 是否正確。", "error")
@@ -10749,7 +11454,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                     flash("請輸入帳號與密碼。", "error")
                 else:
                     try:
-                        sess = requests.Session()
+                        sess = pooled_session(base_url)
                         login_with_password(sess, base_url, raw_username, raw_password, timeout=default_timeout)
                         cookie_val = sess.cookies.get("MoodleSession")
                         if not cookie_val:
@@ -10762,27 +11467,19 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                             permanent=True,
                         )
                         record_ui_event("login_success", meta={"username": raw_username})
-                        existing_cache = load_cache_from_disk(raw_username)
+                        existing_cache = prefetch_user_bundle(raw_username)["cache"]
                         if existing_cache:
                             flash("已載入先前的課程資料，系統將在背景自動更新最新內容。", "info")
                         else:
-                            try:
-                                result, excel_data = fetch_assignments_for(
-                                    {"username": raw_username, "moodle_session": cookie_val}
-                                )
-                                set_assign_cache(result, excel_data)
-                                flash("已成功獲取最新資訊。", "success")
-                            except Exception as exc:
-                                flash(f"登入成功但獲取資料失敗：{exc}，程式將在背景重試。", "warning")
+                            # Credentials are already verified; the first fetch streams in while the dashboard polls.
+                            _start_background_refresh(raw_username, cookie_val)
                         response = redirect(url_for("index"))
-                        response.headers["Cache-Control"] = "no-store, no-cache, must-revalidate, max-age=0"
-                        response.headers["Pragma"] = "no-cache"
-                        response.headers["Expires"] = "0"
+                        response.headers.update(NO_STORE_HEADERS)
                         return response
                     except Exception as exc:
                         flash(f"{exc}", "error")
         announcements_list = load_announcements()
-        return render_template_string(
+        return _render_page(
             LOGIN_TEMPLATE,
             stats=usage_stats(),
             stats_version=current_stats_version(),
@@ -10808,7 +11505,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
 
     @app.route("/privacy", methods=["GET"])
     def privacy_policy():
-        return render_template_string(
+        return _render_page(
             PRIVACY_TEMPLATE,
             app_home_url=app_home_url,
             support_email=support_email,
@@ -10819,7 +11516,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
 
     @app.route("/terms", methods=["GET"])
     def terms_of_service():
-        return render_template_string(
+        return _render_page(
             TERMS_TEMPLATE,
             app_home_url=app_home_url,
             support_email=support_email,
@@ -10852,8 +11549,13 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     def api_cache():
         user = current_user()
         viewed_username = get_viewed_username(actor=user)
-        cache = get_assign_cache(viewed_username) or {}
-        preferences = get_user_preferences(viewed_username)
+        cache, stored_prefs = storage.load_user_cache_and_preferences(viewed_username or "")
+        cache = cache or {}
+        if cache and stored_prefs:
+            cache["preferences"] = stored_prefs
+        preferences = _merge_preferences(stored_prefs)
+        if viewed_username:
+            _remember_preferences(viewed_username, preferences)
         include_cache = str(request.args.get("include_cache") or "").lower() in {"1", "true", "yes"}
         refresh_state = _refresh_job_state(viewed_username)
         payload = {
@@ -10868,6 +11570,8 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             "refresh_in_progress": bool(refresh_state and refresh_state.get("status") == "running"),
             "refresh_started_at": refresh_state.get("started_at") if refresh_state else None,
             "refresh_finished_at": refresh_state.get("finished_at") if refresh_state else None,
+            "excel_ready": bool(cache.get("excel_data")),
+            "excel_pending": _excel_build_pending(viewed_username),
         }
         if include_cache:
             payload["cache"] = cache
@@ -10897,10 +11601,21 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         record_ui_event("guest_login", meta={"username": guest_name})
         return redirect(url_for("index"))
 
+    def _stat_tool_file(name: str) -> Tuple[Path, Optional[os.stat_result]]:
+        path = ROOT_DIR / "backend" / "tools" / name
+        try:
+            return path, path.stat()
+        except OSError:
+            return path, None
+
+    # The export tool ships with the deployment and does not change while the process runs,
+    # so its existence and stat are looked up once instead of on every download.
+    guest_tool_files = {name: _stat_tool_file(name) for name in ("guest_export.exe", "guest_export.py")}
+
     @app.route("/guest-tool", methods=["GET"])
     def guest_tool():
-        tool_path = ROOT_DIR / "backend" / "tools" / "guest_export.exe"
-        if not tool_path.exists():
+        tool_path, stat = guest_tool_files["guest_export.exe"]
+        if stat is None:
             flash("找不到匯出工具。", "error")
             return redirect(url_for("login"))
         payload = send_file(
@@ -10911,7 +11626,6 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             max_age=604800,
             etag=True,
         )
-        stat = tool_path.stat()
         payload.headers["Cache-Control"] = "public, max-age=604800, immutable"
         payload.headers["Last-Modified"] = http_date(stat.st_mtime)
         payload.headers["Content-Length"] = str(stat.st_size)
@@ -10919,8 +11633,8 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
 
     @app.route("/guest-tool.py", methods=["GET"])
     def guest_tool_source():
-        source_path = ROOT_DIR / "backend" / "tools" / "guest_export.py"
-        if not source_path.exists():
+        source_path, stat = guest_tool_files["guest_export.py"]
+        if stat is None:
             flash("找不到匯出工具原始碼。", "error")
             return redirect(url_for("login"))
         payload = send_file(
@@ -10929,7 +11643,6 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             download_name="guest_export.py",
             mimetype="text/x-python",
         )
-        stat = source_path.stat()
         payload.headers["Cache-Control"] = "public, max-age=604800, immutable"
         payload.headers["Last-Modified"] = http_date(stat.st_mtime)
         payload.headers["Content-Length"] = str(stat.st_size)
@@ -10948,24 +11661,36 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             flash("請上傳由 guest_export 匯出工具產生的 JSON 檔。", "warning")
             record_ui_event("guest_import", "error", {"reason": "missing_file"})
             return redirect(url_for("index"))
+        raw_payload = uploaded.stream.read()
+        if raw_payload.startswith(codecs.BOM_UTF8):
+            raw_payload = raw_payload[len(codecs.BOM_UTF8) :]
+        # guest_export writes "mode" as the first key, so foreign files are rejected
+        # from the head of the upload without parsing the whole document.
+        mode_match = GUEST_EXPORT_MODE_PATTERN.match(raw_payload, 0, 4096)
+        if mode_match and mode_match.group(1) != b"guest_export_v1":
+            flash("檔案格式不支援，請使用 guest_export 匯出工具產生的 JSON。", "warning")
+            record_ui_event("guest_import", "error", {"reason": "unsupported_mode"})
+            return redirect(url_for("index"))
         try:
-            payload = json.load(uploaded.stream)
+            payload = orjson.loads(raw_payload)
         except Exception as exc:
             flash(f"解析上傳檔案失敗：{exc}", "error")
             record_ui_event("guest_import", "error", {"reason": "parse_failed"})
             return redirect(url_for("index"))
-        if payload.get("mode") != "guest_export_v1":
+        if not isinstance(payload, dict) or payload.get("mode") != "guest_export_v1":
             flash("檔案格式不支援，請使用 guest_export 匯出工具產生的 JSON。", "warning")
             record_ui_event("guest_import", "error", {"reason": "unsupported_mode"})
             return redirect(url_for("index"))
         result = payload.get("result")
         excel_data = payload.get("excel_data")
-        if not result:
+        # The shape is checked right after parsing so a malformed export fails here with a clear
+        # message instead of deep inside the cache write or the workbook builder.
+        if not result or not isinstance(result, dict) or not isinstance(result.get("all_assignments", []), list):
             flash("檔案內容缺少作業資料。", "error")
             record_ui_event("guest_import", "error", {"reason": "missing_result"})
             return redirect(url_for("index"))
-        if not excel_data:
-            excel_data = _generate_excel_data((result or {}).get("all_assignments"))
+        if not isinstance(excel_data, str) or not excel_data:
+            excel_data = _generate_excel_data(result.get("all_assignments"))
         set_assign_cache(result, excel_data)
         flash("已匯入訪客資料（檔案）。", "success")
         record_ui_event(
@@ -10998,7 +11723,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     @app.route("/google/authorize")
     @login_required
     def google_authorize():
-        if not _google_ready():
+        if not google_ready:
             flash("尚未設定 Google OAuth，請先在伺服器端提供 Client ID/Secret。", "warning")
             record_ui_event("google_link", "error", {"stage": "authorize", "reason": "not_ready"})
             return redirect(url_for("index"))
@@ -11008,7 +11733,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         return redirect(
             build_google_authorize_url(
                 google_client_id,
-                _google_redirect_uri(),
+                google_redirect_uri,
                 scope=GOOGLE_CALENDAR_SCOPE,
                 state=state,
             )
@@ -11021,7 +11746,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             flash("請先登入 E3，再進行 Google 授權。", "warning")
             record_ui_event("google_link", "error", {"stage": "callback", "reason": "not_logged_in"})
             return redirect(url_for("login"))
-        if not _google_ready():
+        if not google_ready:
             flash("尚未設定 Google OAuth。", "warning")
             record_ui_event("google_link", "error", {"stage": "callback", "reason": "not_ready"})
             return redirect(url_for("index"))
@@ -11046,7 +11771,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 code,
                 client_id=google_client_id,
                 client_secret=google_client_secret,
-                redirect_uri=_google_redirect_uri(),
+                redirect_uri=google_redirect_uri,
             )
         except Exception as exc:  # pragma: no cover
             flash(f"換取 Google Token 失敗：{exc}", "error")
@@ -11083,7 +11808,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     @app.post("/google/sync")
     @login_required
     def google_sync():
-        if not _google_ready():
+        if not google_ready:
             flash("尚未設定 Google OAuth，無法同步日曆。", "warning")
             record_ui_event("google_sync", "error", {"reason": "not_ready"})
             return redirect(url_for("index"))
@@ -11093,12 +11818,14 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             record_ui_event("google_sync", "error", {"reason": "not_logged_in"})
             return redirect(url_for("login"))
         raw_selected = request.form.get("selected_uids", "")
-        selected_uids: List[str] = []
+        selected_uids: FrozenSet[str] = frozenset()
         if raw_selected:
             try:
-                selected_uids = json.loads(raw_selected)
+                parsed_selected = orjson.loads(raw_selected)
             except Exception:
-                selected_uids = []
+                parsed_selected = None
+            if isinstance(parsed_selected, list):
+                selected_uids = frozenset(uid for uid in parsed_selected if isinstance(uid, str))
         if not selected_uids:
             flash("請先選擇要導入的作業。", "warning")
             record_ui_event("google_sync", "error", {"reason": "no_selection"})
@@ -11156,6 +11883,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             if was_guest:
                 storage.delete_user_cache(old_user)
             clear_google_tokens(old_user)
+            _forget_preferences(old_user)
         if session_token:
             storage.clear_web_session(session_token)
         if old_user:
@@ -11188,7 +11916,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         moodle_session_val = session.get("moodle_session")
         prev_cache = get_assign_cache() or {}
         prev_ts = prev_cache.get("ts") or 0
-        if not _mark_refresh_job_started(username):
+        if not _start_background_refresh(username, moodle_session_val):
             return {
                 "ok": True,
                 "message": "背景更新已在進行中。",
@@ -11196,24 +11924,6 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 "in_progress": True,
                 "ts": prev_ts,
             }
-
-        def _run_background():
-            with app.app_context():
-                try:
-                    result, excel_data = fetch_assignments_for({"username": username, "moodle_session": moodle_session_val})
-                    set_assign_cache_for_user(username, result, excel_data)
-                    record_ui_event(
-                        "refresh_assignments",
-                        "success",
-                        {"items": len(result.get("all_assignments", [])), "mode": "background"},
-                    )
-                except Exception as exc:  # pragma: no cover - background logging
-                    record_ui_event("refresh_assignments", "error", {"reason": str(exc), "mode": "background"})
-                    _mark_refresh_job_done(username, status="error", error=str(exc))
-                else:
-                    _mark_refresh_job_done(username, status="success")
-
-        threading.Thread(target=_run_background, daemon=True).start()
         return {
             "ok": True,
             "message": "已啟動背景更新，稍後將自動刷新。",
@@ -11226,14 +11936,13 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     def calendar_export():
         cache = get_assign_cache()
         assignments = cache.get("result", {}).get("all_assignments", []) if cache else []
-        calendar = _build_calendar(assignments)
-        if not calendar:
+        if not assignments:
             flash("尚無可匯出的作業資料。", "info")
             record_ui_event("export_calendar", "error", {"reason": "no_assignments"})
             return redirect(url_for("index"))
         record_ui_event("export_calendar", "success", {"items": len(assignments)})
         return Response(
-            calendar,
+            _iter_calendar(assignments),
             mimetype="text/calendar",
             headers={"Content-Disposition": "attachment; filename=pending_assignments.ics"},
         )
@@ -11242,7 +11951,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     def public_study_progress():
         user = current_user()
         context = _load_study_progress_context()
-        return render_template_string(
+        return _render_page(
             PUBLIC_STUDY_TEMPLATE,
             **context,
             share_url=request.url,
@@ -11259,7 +11968,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     def admin_study_home():
         user = current_user()
         home_context = _load_study_progress_context()
-        return render_template_string(
+        return _render_page(
             STUDY_HOME_TEMPLATE,
             admin_user=user,
             recall_widget=_build_recall_widget_context(),
@@ -11565,7 +12274,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             start_date=today,
             concept_filter=_is_recall_concept_eligible,
         )
-        return render_template_string(
+        return _render_page(
             STUDY_RECALL_TEMPLATE,
             admin_user=user,
             subjects=STUDY_PLAN_SUBJECTS,
@@ -12027,7 +12736,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             f"學生這次的問題：{question}"
         )
         def request_answer(request_prompt: str) -> Tuple[str, bool]:
-            response = requests.post(
+            response = openai_http.post(
                 "https://api.openai.com/v1/responses",
                 headers={"Authorization": f"Bearer {openai_api_key}", "Content-Type": "application/json"},
                 json={
@@ -12534,7 +13243,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         videos = storage.list_study_plan_videos_with_records()
         if selected_subject:
             videos = [video for video in videos if video["subject"] == selected_subject]
-        return render_template_string(
+        return _render_page(
             STUDY_SETTINGS_TEMPLATE,
             admin_user=user,
             subjects=STUDY_PLAN_SUBJECTS,
@@ -12663,7 +13372,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         study_time_sessions = storage.list_study_time_sessions(
             day=_study_plan_business_date().isoformat()
         )
-        return render_template_string(
+        return _render_page(
             STUDY_PLAN_TEMPLATE,
             admin_user=user,
             week_rows=week_rows,
@@ -12938,14 +13647,23 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             if requested_view_username in valid_usernames:
                 selected_view_username = requested_view_username
 
+        formatted_ts: Dict[int, str] = {}
+
         def _fmt_ts(ts: Optional[float]) -> str:
             if not ts:
                 return "-"
             try:
-                dt = datetime.fromtimestamp(ts, tz=TAIPEI_TZ)
-            except Exception:
+                key = int(ts)
+            except (TypeError, ValueError, OverflowError):
                 return "-"
-            return dt.strftime("%Y-%m-%d %H:%M:%S")
+            label = formatted_ts.get(key)
+            if label is None:
+                try:
+                    label = time.strftime("%Y-%m-%d %H:%M:%S", time.gmtime(key + _TAIPEI_OFFSET_SECONDS))
+                except (OverflowError, OSError, ValueError):
+                    label = "-"
+                formatted_ts[key] = label
+            return label
 
         ACTION_LABELS = {
             "login_success": "登入成功",
@@ -12973,11 +13691,31 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             for entry in user_breakdown
         ]
         raw_events = traffic_tracker.recent_events(500)
-        filtered_events = [
-            ev
-            for ev in raw_events
-            if (ev.get("action") or "").lower() not in PASSIVE_TRAFFIC_ACTIONS
-        ]
+        # One pass over the event dicts fills parallel columns; the counters and the fallback
+        # trend below loop over these flat lists instead of re-reading the nested meta dicts.
+        filtered_events: List[Dict[str, Any]] = []
+        event_ts: List[Any] = []
+        event_actions: List[str] = []
+        event_usernames: List[Optional[str]] = []
+        event_is_guest: List[bool] = []
+        recent_unique_keys = set()
+        for ev in raw_events:
+            meta = ev.get("meta") or {}
+            username = meta.get("username")
+            is_guest = bool(meta.get("is_guest"))
+            if username and not is_guest:
+                recent_unique_keys.add(username)
+            elif not username and ev.get("ip"):
+                recent_unique_keys.add(ev.get("ip"))
+            action = ev.get("action") or ""
+            # New events are stored lower-case, but rows logged before that may not be.
+            if action.lower() in PASSIVE_TRAFFIC_ACTIONS:
+                continue
+            filtered_events.append(ev)
+            event_ts.append(ev.get("ts"))
+            event_actions.append(action or "-")
+            event_usernames.append(username)
+            event_is_guest.append(is_guest)
         formatted_events = []
         for ev in reversed(filtered_events[-200:]):
             meta = ev.get("meta") or {}
@@ -12995,7 +13733,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
             }
             if extra:
                 try:
-                    detail_parts.append(json.dumps(extra, ensure_ascii=False))
+                    detail_parts.append(orjson.dumps(extra, option=orjson.OPT_NON_STR_KEYS).decode("utf-8"))
                 except Exception:
                     detail_parts.append(str(extra))
             formatted_events.append(
@@ -13012,95 +13750,47 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         trend_window = request.args.get("trend", "hour")
         if trend_window not in {"hour", "day"}:
             trend_window = "hour"
-        hourly_series = traffic_tracker.hourly_series()
         if trend_window == "day":
-            daily_map: Dict[int, Set[str]] = {}
-            for ts, members in traffic_tracker.hourly_buckets().items():
-                day_dt = datetime.fromtimestamp(ts, tz=TAIPEI_TZ).replace(hour=0, minute=0, second=0, microsecond=0)
-                day_ts = int(day_dt.timestamp())
-                day_set = daily_map.setdefault(day_ts, set())
-                day_set.update(members)
-            
-            if daily_map:
-                sorted_days_keys = sorted(daily_map.keys())
-                min_day_ts = sorted_days_keys[0]
-                max_day_ts = sorted_days_keys[-1]
-                
-                full_daily_series = []
-                current_ts = min_day_ts
-                while current_ts <= max_day_ts:
-                    full_daily_series.append({
-                        "ts": current_ts,
-                        "count": len(daily_map.get(current_ts, []))
-                    })
-                    current_ts += 86400
-
-                chart_labels = [datetime.fromtimestamp(item["ts"], tz=TAIPEI_TZ).strftime("%Y-%m-%d") for item in full_daily_series]
-                chart_values = [item["count"] for item in full_daily_series]
-            else:
-                chart_labels = []
-                chart_values = []
+            trend_series = traffic_tracker.daily_series()
+            bucket_step, label_format = 86400, "%Y-%m-%d"
         else:
-            if hourly_series:
-                full_series = []
-                series_dict = {item["ts"]: item["count"] for item in hourly_series}
-                min_ts = hourly_series[0]["ts"]
-                max_ts = hourly_series[-1]["ts"]
-                
-                current_ts = min_ts
-                while current_ts <= max_ts:
-                    full_series.append({
-                        "ts": current_ts,
-                        "count": series_dict.get(current_ts, 0)
-                    })
-                    current_ts += 3600
-                
-                hourly_series = full_series
-
-            chart_labels = [datetime.fromtimestamp(item["ts"], tz=TAIPEI_TZ).strftime("%m-%d %H:00") for item in hourly_series]
-            chart_values = [item["count"] for item in hourly_series]
+            trend_series = traffic_tracker.hourly_series()
+            bucket_step, label_format = 3600, "%m-%d %H:00"
+        chart_labels: List[str] = []
+        chart_values: List[int] = []
+        if trend_series:
+            # Gaps are filled so the axis stays evenly spaced; labels are formatted from
+            # Taipei-shifted epoch seconds rather than one tz-aware datetime per bucket.
+            series_counts = {item["ts"]: item["count"] for item in trend_series}
+            bucket_range = range(int(trend_series[0]["ts"]), int(trend_series[-1]["ts"]) + 1, bucket_step)
+            chart_labels = [
+                time.strftime(label_format, time.gmtime(bucket_ts + _TAIPEI_OFFSET_SECONDS))
+                for bucket_ts in bucket_range
+            ]
+            chart_values = [series_counts.get(bucket_ts, 0) for bucket_ts in bucket_range]
         if not chart_labels or not chart_values:
             # fallback to on-the-fly aggregation of filtered events to avoid空白圖
-            buckets: Dict[datetime, Set[str]] = {}
-            for ev in filtered_events:
-                ts = ev.get("ts")
-                if not ts:
-                    continue
-                meta = ev.get("meta") or {}
-                username = meta.get("username")
-                if not username or meta.get("is_guest"):
+            # Buckets are computed on Taipei-shifted epoch seconds, so only the bucket keys are formatted.
+            bucket_seconds = 86400 if trend_window == "day" else 3600
+            buckets: Dict[int, Set[str]] = {}
+            for ts, username, is_guest in zip(event_ts, event_usernames, event_is_guest):
+                if not ts or not username or is_guest:
                     continue
                 try:
-                    dt = datetime.fromtimestamp(float(ts), tz=TAIPEI_TZ)
-                except Exception:
-                    continue
-                action = (ev.get("action") or "").lower()
-                if action in PASSIVE_TRAFFIC_ACTIONS:
+                    local_ts = int(float(ts)) + _TAIPEI_OFFSET_SECONDS
+                except (TypeError, ValueError, OverflowError):
                     continue
-                if trend_window == "day":
-                    bucket = dt.replace(hour=0, minute=0, second=0, microsecond=0)
-                else:
-                    bucket = dt.replace(minute=0, second=0, microsecond=0)
-                bucket_set = buckets.setdefault(bucket, set())
+                bucket = local_ts - local_ts % bucket_seconds
+                bucket_set = buckets.get(bucket)
+                if bucket_set is None:
+                    bucket_set = buckets[bucket] = set()
                 bucket_set.add(str(username))
-            sorted_keys = sorted(buckets.keys())
-            chart_labels = [
-                key.strftime("%Y-%m-%d") if trend_window == "day" else key.strftime("%m-%d %H:00")
-                for key in sorted_keys
-            ]
+            sorted_keys = sorted(buckets)
+            label_format = "%Y-%m-%d" if trend_window == "day" else "%m-%d %H:00"
+            chart_labels = [time.strftime(label_format, time.gmtime(key)) for key in sorted_keys]
             chart_values = [len(buckets[key]) for key in sorted_keys]
-        action_counter: Counter = Counter()
-        for ev in filtered_events:
-            action_counter[ev.get("action") or "-"] += 1
+        action_counter = Counter(event_actions)
         top_actions = [{"action": action, "count": count} for action, count in action_counter.most_common(5)]
-        recent_unique_keys = set()
-        for ev in raw_events:
-            meta = ev.get("meta") or {}
-            username = meta.get("username")
-            if username and not meta.get("is_guest"):
-                recent_unique_keys.add(username)
-            elif not username and ev.get("ip"):
-                recent_unique_keys.add(ev.get("ip"))
         summary = {
             "unique_users": len(formatted_users),
             "online_users": sum(1 for entry in formatted_users if entry["online"]),
@@ -13120,7 +13810,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
         summary["online_ips"] = ip_overview["online"]
         summary["guest_total"] = guest_overview.get("total", 0)
         summary["guest_online"] = guest_overview.get("online", 0)
-        return render_template_string(
+        return _render_page(
             TRAFFIC_TEMPLATE,
             stats=usage_stats(),
             stats_version=current_stats_version(),
@@ -13186,14 +13876,23 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 flash("狀態已更新。", "success")
             else:
                 flash("更新失敗，請稍後再試。", "error")
-            return redirect(url_for("admin_feedback"))
-        feedback_items = list_feedback_entries()
-        open_count = sum(1 for item in feedback_items if (item.get("status") or "open") == "open")
-        return render_template_string(
+            return redirect(url_for("admin_feedback", before=request.args.get("before")))
+        before_id = request.args.get("before", type=int)
+        # Keyset paging on the autoincrement id; one extra row tells whether an older page exists.
+        feedback_items = list_feedback_entries(before_id, FEEDBACK_PAGE_SIZE + 1)
+        older_before_id = None
+        if len(feedback_items) > FEEDBACK_PAGE_SIZE:
+            feedback_items = feedback_items[:FEEDBACK_PAGE_SIZE]
+            older_before_id = feedback_items[-1]["id"]
+        counts = storage.feedback_counts()
+        return _render_page(
             ADMIN_FEEDBACK_TEMPLATE,
             admin_user=user,
             feedback_entries=feedback_items,
-            open_count=open_count,
+            open_count=counts["open"],
+            total_count=counts["total"],
+            is_first_page=before_id is None,
+            older_before_id=older_before_id,
         )
 
     @app.route("/admin/announcements", methods=["GET", "POST"])
@@ -13212,7 +13911,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 add_announcement(title, content, user["username"])
                 flash("公告已發布。", "success")
                 return redirect(url_for("admin_announcements"))
-        return render_template_string(
+        return _render_page(
             ANNOUNCEMENTS_TEMPLATE,
             admin_user=user,
             announcements=load_announcements(),
@@ -13245,7 +13944,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 record_ui_event("feedback_submitted", "success", {"feedback_id": feedback_id})
                 return redirect(url_for("feedback"))
             flash("請輸入回報內容。", "error")
-        return render_template_string(
+        return _render_page(
             FEEDBACK_TEMPLATE,
             admin_user=user,
             support_email=support_email,
@@ -13257,7 +13956,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
     def index():
         user = current_user()
         if not user:
-            return render_template_string(
+            return _render_page(
                 HOME_TEMPLATE,
                 stats=usage_stats(),
                 stats_version=current_stats_version(),
@@ -13266,7 +13965,7 @@ def create_app(*, default_base_url: Optional[str] = None, default_scope: str = "
                 support_email=support_email,
             )
         context = _build_dashboard_context(user)
-        return render_template_string(
+        return _render_page(
             WEB_TEMPLATE,
             **context,
             app_home_url=app_home_url,
@@ -1,26 +1,36 @@
+import html
+import re
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Any, Dict, List, Optional, Sequence, Set
+from typing import Any, Dict, Iterator, List, Optional, Pattern, Sequence, Set, Tuple
+from urllib.parse import urljoin
 
 import requests
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 
-from ..shared.constants import COURSE_LINK_RE, HEADERS, TAIPEI_TZ
+from ..shared.constants import COURSE_ANCHOR_RE, COURSE_LINK_RE, HEADERS, TAIPEI_TZ
 from .http import (
     apply_cookie,
-    configure_tls,
     login_with_password,
     need_login_redirect,
+    pooled_session,
     safe_request,
 )
 from ..shared.parsing import (
     extract_text,
     find_due_and_status_from_assign_page,
+    fragment_text,
     gather_assign_links_from_list_page,
     parse_due_text_to_dt,
+    status_text_flags,
 )
 from ..shared.utils import cleanup_debug_glob
 
+COLLECT_FETCH_WORKERS = 8
+# Course lists are large pages; only their links are needed.
+COURSE_LINK_STRAINER = SoupStrainer("a", href=True)
+
 
 @dataclass
 class CollectOptions:
@@ -62,6 +72,23 @@ def _current_term_labels(now: Optional[datetime] = None) -> Sequence[str]:
     return tags
 
 
+def _current_term_pattern(now: Optional[datetime] = None) -> Pattern[str]:
+    return re.compile("|".join(re.escape(tag) for tag in _current_term_labels(now)), re.IGNORECASE)
+
+
+def _iter_course_anchors(page_text: str) -> Iterator[Tuple[str, str]]:
+    found_any = False
+    for anchor in COURSE_ANCHOR_RE.finditer(page_text):
+        found_any = True
+        yield html.unescape(anchor.group(2)), fragment_text(anchor.group(3))
+    if found_any:
+        return
+    # Unusual markup (unquoted attributes and the like) still goes through the HTML parser.
+    soup = BeautifulSoup(page_text, "html.parser", parse_only=COURSE_LINK_STRAINER)
+    for a_tag in soup.find_all("a", href=True):
+        yield a_tag["href"], extract_text(a_tag)
+
+
 def gather_my_courses(
     sess: requests.Session,
     base_url: str,
@@ -75,21 +102,20 @@ def gather_my_courses(
         f"{base_url}/course/index.php?mycourses=1",
     ]
     found: Dict[int, Dict[str, str]] = {}
-    current_tags = _current_term_labels()
+    current_term_re = _current_term_pattern()
+    site_root = base_url.rstrip("/") + "/"
     for url in pages:
         try:
             resp = safe_request(sess, "GET", url, headers=HEADERS, timeout=timeout)
-            soup = BeautifulSoup(resp.text, "html.parser")
-            for a_tag in soup.find_all("a", href=True):
-                match = COURSE_LINK_RE.search(a_tag["href"])
+            for href, title in _iter_course_anchors(resp.text):
+                match = COURSE_LINK_RE.search(href)
                 if not match:
                     continue
                 cid = int(match.group(1))
-                title = extract_text(a_tag)
-                if only_current_term and not any(tag.lower() in title.lower() for tag in current_tags):
+                if only_current_term and not current_term_re.search(title):
                     continue
                 if cid not in found or (title and len(title) > len(found[cid]["title"])):
-                    course_url = a_tag["href"] if a_tag["href"].startswith("http") else base_url.rstrip("/") + "/" + a_tag["href"].lstrip("/")
+                    course_url = urljoin(site_root, href)
                     found[cid] = {"id": cid, "title": title, "url": course_url}
         except Exception:
             continue
@@ -108,21 +134,191 @@ def _global_sort_key(item: Dict[str, Any]):
     return (item.get("course_title", ""), 0, item["due_ts"])
 
 
-def _save_debug_file(path: str, text: str, created_paths: Set[str]) -> None:
+def _save_debug_file(path: str, data: bytes, created_paths: Set[str]) -> None:
+    # The raw response bytes are written as received instead of re-encoding the decoded text.
     try:
-        with open(path, "w", encoding="utf-8") as fh:
-            fh.write(text)
+        with open(path, "wb") as fh:
+            fh.write(data)
         created_paths.add(path)
     except Exception:
         pass
 
 
+def _gather_course_links(
+    sess: requests.Session,
+    options: CollectOptions,
+    course: Dict[str, Any],
+    created_debug: Set[str],
+) -> Tuple[List[Any], Optional[Dict[str, Any]]]:
+    cid = course["id"]
+    ctitle = course.get("title", f"Course {cid}")
+    list_url = f"{options.base_url}/local/courseextension/index.php?courseid={cid}&scope={options.scope}"
+    # Keyed by assignment URL so fallback pages only add links not seen yet.
+    links_by_url: Dict[str, Tuple[Any, ...]] = {}
+    error: Optional[Dict[str, Any]] = None
+    try:
+        resp = safe_request(
+            sess,
+            "GET",
+            list_url,
+            headers=HEADERS,
+            timeout=options.timeout,
+            allow_redirects=True,
+        )
+        if options.debug:
+            _save_debug_file(f"debug_list_{cid}.html", resp.content, created_debug)
+        if need_login_redirect(resp.text):
+            raise RuntimeError("尚未登入或 Cookie 過期：請重新提供有效的 MoodleSession 或帳密。")
+        for link in gather_assign_links_from_list_page(resp.text, options.base_url):
+            links_by_url.setdefault(link[1], link)
+    except RuntimeError:
+        raise
+    except Exception as exc:
+        error = {"course_id": cid, "course_title": ctitle, "message": f"取得作業列表失敗：{exc}"}
+
+    if not links_by_url:
+        fallback_urls = [
+            f"{options.base_url}/course/view.php?id={cid}",
+            f"{options.base_url}/mod/assign/index.php?id={cid}",
+        ]
+        for idx, url in enumerate(fallback_urls):
+            try:
+                resp = safe_request(
+                    sess,
+                    "GET",
+                    url,
+                    headers=HEADERS,
+                    timeout=options.timeout,
+                )
+                if options.debug:
+                    _save_debug_file(f"debug_fallback_{cid}_{idx+1}.html", resp.content, created_debug)
+                for link in gather_assign_links_from_list_page(resp.text, options.base_url):
+                    links_by_url.setdefault(link[1], link)
+            except RuntimeError:
+                raise
+            except Exception:
+                pass
+    return list(links_by_url.values()), error
+
+
+def _skip_by_list_status(link: Tuple[Any, ...], options: CollectOptions) -> bool:
+    # Completed work is dropped anyway unless requested, so a clear list-page status saves the page fetch.
+    list_status = link[5]
+    if options.include_completed or not list_status:
+        return False
+    return status_text_flags(list_status)[0]
+
+
+def _collect_course_results(
+    options: CollectOptions,
+    course: Dict[str, Any],
+    assign_links: List[Any],
+    list_error: Optional[Dict[str, Any]],
+    page_futures: List[Optional["Future[requests.Response]"]],
+    per_course: List[Dict[str, Any]],
+    all_results: List[Dict[str, Any]],
+    errors: List[Dict[str, Any]],
+    created_debug: Set[str],
+) -> None:
+    cid = course["id"]
+    ctitle = course.get("title", f"Course {cid}")
+    if list_error:
+        errors.append(list_error)
+
+    now = datetime.now(TAIPEI_TZ)
+    course_results: List[Dict[str, Any]] = []
+    for idx, ((title, url, due_text_from_list, submitted_count, participant_count, _), future) in enumerate(
+        zip(assign_links, page_futures), start=1
+    ):
+        if future is None:
+            continue
+        try:
+            resp = future.result()
+            if options.debug:
+                _save_debug_file(f"debug_assign_{cid}_{idx}.html", resp.content, created_debug)
+
+            is_complete, is_incomplete, due_dt, raw_status, grade_text, submitted_dt, remaining_text = find_due_and_status_from_assign_page(resp.text)
+            if not due_dt and due_text_from_list:
+                due_dt = parse_due_text_to_dt(due_text_from_list)
+
+            if is_complete and not options.include_completed:
+                continue
+            if (is_incomplete is None) or (not is_incomplete and not is_complete):
+                is_incomplete = True
+
+            if is_incomplete or (is_complete and options.include_completed):
+                if not due_dt:
+                    continue
+                due_str = due_dt.astimezone(TAIPEI_TZ).strftime("%Y-%m-%d %H:%M")
+                overdue = bool(due_dt and due_dt < now)
+                due_ts = int(due_dt.timestamp())
+                submitted_ts = int(submitted_dt.timestamp()) if submitted_dt else None
+                item = {
+                    "course_id": cid,
+                    "course_title": ctitle,
+                    "title": title,
+                    "url": url,
+                    "due_at": due_str,
+                    "due_ts": due_ts,
+                    "submitted_at": submitted_dt.astimezone(TAIPEI_TZ).strftime("%Y-%m-%d %H:%M") if submitted_dt else None,
+                    "submitted_ts": submitted_ts,
+                    "remaining_text": remaining_text,
+                    "overdue": overdue,
+                    "completed": bool(is_complete),
+                    "raw_status_text": raw_status,
+                    "grade_text": grade_text,
+                    "submitted_count": submitted_count,
+                    "participant_count": participant_count,
+                }
+                course_results.append(item)
+                all_results.append(item)
+        except RuntimeError:
+            raise
+        except Exception as exc:
+            all_results.append(
+                {
+                    "course_id": cid,
+                    "course_title": ctitle,
+                    "title": title,
+                    "url": url,
+                    "due_at": "",
+                    "due_ts": None,
+                    "submitted_at": None,
+                    "submitted_ts": None,
+                    "remaining_text": None,
+                    "overdue": False,
+                    "completed": False,
+                    "raw_status_text": f"解析失敗：{exc}",
+                    "grade_text": None,
+                    "submitted_count": None,
+                    "participant_count": None,
+                }
+            )
+            errors.append(
+                {
+                    "course_id": cid,
+                    "course_title": ctitle,
+                    "assignment_title": title,
+                    "message": f"解析失敗：{exc}",
+                }
+            )
+
+    course_results.sort(key=_course_sort_key)
+    per_course.append(
+        {
+            "id": cid,
+            "title": ctitle,
+            "url": course.get("url"),
+            "assignments": course_results,
+            "detected_assign_links": len(assign_links),
+        }
+    )
+
+
 def collect_assignments(options: CollectOptions) -> Dict[str, Any]:
-    sess = requests.Session()
+    sess = pooled_session(options.base_url, cafile=options.cafile, insecure=options.insecure)
     created_debug: Set[str] = set()
 
-    configure_tls(sess, cafile=options.cafile, insecure=options.insecure)
-
     if options.debug:
         cleanup_debug_glob("debug_*.html")
 
@@ -165,147 +361,38 @@ def collect_assignments(options: CollectOptions) -> Dict[str, Any]:
     all_results: List[Dict[str, Any]] = []
     errors: List[Dict[str, Any]] = []
 
-    for course in courses:
-        cid = course["id"]
-        ctitle = course.get("title", f"Course {cid}")
-        list_url = f"{options.base_url}/local/courseextension/index.php?courseid={cid}&scope={options.scope}"
-        assign_links: List[Any] = []
-        try:
-            resp = safe_request(
-                sess,
-                "GET",
-                list_url,
-                headers=HEADERS,
-                timeout=options.timeout,
-                allow_redirects=True,
-            )
-            if options.debug:
-                _save_debug_file(f"debug_list_{cid}.html", resp.text, created_debug)
-            if need_login_redirect(resp.text):
-                raise RuntimeError("尚未登入或 Cookie 過期：請重新提供有效的 MoodleSession 或帳密。")
-            assign_links = gather_assign_links_from_list_page(resp.text, options.base_url)
-        except RuntimeError:
-            raise
-        except Exception as exc:
-            errors.append({"course_id": cid, "course_title": ctitle, "message": f"取得作業列表失敗：{exc}"})
-
-        if not assign_links:
-            fallback_urls = [
-                f"{options.base_url}/course/view.php?id={cid}",
-                f"{options.base_url}/mod/assign/index.php?id={cid}",
+    # Every page is an independent GET on the same logged-in session, so the
+    # list pages and then all assignment pages are fetched concurrently while
+    # results are still assembled in course and link order below.
+    pool = ThreadPoolExecutor(max_workers=COLLECT_FETCH_WORKERS, thread_name_prefix="e3-collect")
+    try:
+        link_futures = [
+            pool.submit(_gather_course_links, sess, options, course, created_debug) for course in courses
+        ]
+        course_links = [future.result() for future in link_futures]
+        page_futures = [
+            [
+                None
+                if _skip_by_list_status(link, options)
+                else pool.submit(safe_request, sess, "GET", link[1], headers=HEADERS, timeout=options.timeout)
+                for link in assign_links
             ]
-            for idx, url in enumerate(fallback_urls):
-                try:
-                    resp = safe_request(
-                        sess,
-                        "GET",
-                        url,
-                        headers=HEADERS,
-                        timeout=options.timeout,
-                    )
-                    if options.debug:
-                        _save_debug_file(f"debug_fallback_{cid}_{idx+1}.html", resp.text, created_debug)
-                    more = gather_assign_links_from_list_page(resp.text, options.base_url)
-                    # When falling back, we need to merge results carefully
-                    existing_urls = {link[1] for link in assign_links}
-                    assign_links.extend([link for link in more if link[1] not in existing_urls])
-                except RuntimeError:
-                    raise
-                except Exception:
-                    pass
-        
-        now = datetime.now(TAIPEI_TZ)
-        course_results: List[Dict[str, Any]] = []
-        for idx, (title, url, due_text_from_list, submitted_count, participant_count) in enumerate(
-            assign_links, start=1
-        ):
-            try:
-                resp = safe_request(
-                    sess,
-                    "GET",
-                    url,
-                    headers=HEADERS,
-                    timeout=options.timeout,
-                )
-                if options.debug:
-                    _save_debug_file(f"debug_assign_{cid}_{idx}.html", resp.text, created_debug)
-                
-                is_complete, is_incomplete, due_dt, raw_status, grade_text, submitted_dt, remaining_text = find_due_and_status_from_assign_page(resp.text)
-                if not due_dt and due_text_from_list:
-                    due_dt = parse_due_text_to_dt(due_text_from_list)
-
-                if is_complete and not options.include_completed:
-                    continue
-                if (is_incomplete is None) or (not is_incomplete and not is_complete):
-                    is_incomplete = True
-
-                if is_incomplete or (is_complete and options.include_completed):
-                    if not due_dt:
-                        continue
-                    due_str = due_dt.astimezone(TAIPEI_TZ).strftime("%Y-%m-%d %H:%M")
-                    overdue = bool(due_dt and due_dt < now)
-                    due_ts = int(due_dt.timestamp())
-                    submitted_ts = int(submitted_dt.timestamp()) if submitted_dt else None
-                    item = {
-                        "course_id": cid,
-                        "course_title": ctitle,
-                        "title": title,
-                        "url": url,
-                        "due_at": due_str,
-                        "due_ts": due_ts,
-                        "submitted_at": submitted_dt.astimezone(TAIPEI_TZ).strftime("%Y-%m-%d %H:%M") if submitted_dt else None,
-                        "submitted_ts": submitted_ts,
-                        "remaining_text": remaining_text,
-                        "overdue": overdue,
-                        "completed": bool(is_complete),
-                        "raw_status_text": raw_status,
-                        "grade_text": grade_text,
-                        "submitted_count": submitted_count,
-                        "participant_count": participant_count,
-                    }
-                    course_results.append(item)
-                    all_results.append(item)
-            except RuntimeError:
-                raise
-            except Exception as exc:
-                all_results.append(
-                    {
-                        "course_id": cid,
-                        "course_title": ctitle,
-                        "title": title,
-                        "url": url,
-                        "due_at": "",
-                        "due_ts": None,
-                        "submitted_at": None,
-                        "submitted_ts": None,
-                        "remaining_text": None,
-                        "overdue": False,
-                        "completed": False,
-                        "raw_status_text": f"解析失敗：{exc}",
-                        "grade_text": None,
-                        "submitted_count": None,
-                        "participant_count": None,
-                    }
-                )
-                errors.append(
-                    {
-                        "course_id": cid,
-                        "course_title": ctitle,
-                        "assignment_title": title,
-                        "message": f"解析失敗：{exc}",
-                    }
-                )
-
-        course_results.sort(key=_course_sort_key)
-        per_course.append(
-            {
-                "id": cid,
-                "title": ctitle,
-                "url": course.get("url"),
-                "assignments": course_results,
-                "detected_assign_links": len(assign_links),
-            }
-        )
+            for assign_links, _ in course_links
+        ]
+        for course, (assign_links, list_error), futures in zip(courses, course_links, page_futures):
+            _collect_course_results(
+                options,
+                course,
+                assign_links,
+                list_error,
+                futures,
+                per_course,
+                all_results,
+                errors,
+                created_debug,
+            )
+    finally:
+        pool.shutdown(cancel_futures=True)
 
     all_results.sort(key=_global_sort_key)
 
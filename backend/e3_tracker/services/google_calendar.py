@@ -1,19 +1,44 @@
 import hashlib
 import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
+from functools import lru_cache, partial
 from typing import Dict, Iterable, List, Tuple
 from urllib.parse import quote, urlencode
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
-from ..shared.constants import TAIPEI_TZ
+from ..shared.constants import TAIPEI_TZ, TAIPEI_TZ_NAME
 
 GOOGLE_AUTH_URL = "https://accounts.google.com/o/oauth2/v2/auth"
 GOOGLE_TOKEN_URL = "https://oauth2.googleapis.com/token"
 GOOGLE_CAL_BASE = "https://www.googleapis.com/calendar/v3"
+GOOGLE_BATCH_URL = "https://www.googleapis.com/batch/calendar/v3"
+GOOGLE_BATCH_SIZE = 50
+GOOGLE_BATCH_WORKERS = 4
 GOOGLE_CALENDAR_SCOPE = "https://www.googleapis.com/auth/calendar.events"
 
 
+def _build_google_session() -> requests.Session:
+    sess = requests.Session()
+    # Only connection failures are retried: POSTs are not in Retry's default method allowlist.
+    adapter = HTTPAdapter(
+        pool_connections=4,
+        pool_maxsize=GOOGLE_BATCH_WORKERS * 2,
+        max_retries=Retry(total=2, backoff_factor=0.2),
+    )
+    sess.mount("https://", adapter)
+    return sess
+
+
+# Shared across requests and batch workers so token and calendar calls reuse kept-alive TLS connections.
+_GOOGLE_SESSION = _build_google_session()
+
+
 class GoogleUnauthorizedError(RuntimeError):
     """Raised when Google API returns 401/403 and token refresh is required."""
 
@@ -53,7 +78,7 @@ def exchange_code_for_google_token(
         "redirect_uri": redirect_uri,
         "grant_type": "authorization_code",
     }
-    resp = requests.post(GOOGLE_TOKEN_URL, data=payload, timeout=timeout)
+    resp = _GOOGLE_SESSION.post(GOOGLE_TOKEN_URL, data=payload, timeout=timeout)
     resp.raise_for_status()
     return resp.json()
 
@@ -71,17 +96,22 @@ def refresh_google_token(
         "client_secret": client_secret,
         "grant_type": "refresh_token",
     }
-    resp = requests.post(GOOGLE_TOKEN_URL, data=payload, timeout=timeout)
+    resp = _GOOGLE_SESSION.post(GOOGLE_TOKEN_URL, data=payload, timeout=timeout)
     resp.raise_for_status()
     return resp.json()
 
 
-def _event_id_for(item: Dict[str, str]) -> str:
-    raw = f"{item.get('course_id','na')}|{item.get('title','') or ''}|{item.get('url','') or ''}"
+@lru_cache(maxsize=4096)
+def _event_id_from_key(raw: str) -> str:
     digest = hashlib.sha256(raw.encode("utf-8")).hexdigest()[:32]
     return f"e3-{digest}"
 
 
+def _event_id_for(item: Dict[str, str]) -> str:
+    # The same assignments come back on every sync, so their ids are memoized by key.
+    return _event_id_from_key(f"{item.get('course_id','na')}|{item.get('title','') or ''}|{item.get('url','') or ''}")
+
+
 def _event_body_for(item: Dict[str, str]) -> Tuple[str, Dict[str, object]]:
     due_ts = item.get("due_ts")
     if not due_ts:
@@ -98,8 +128,8 @@ def _event_body_for(item: Dict[str, str]) -> Tuple[str, Dict[str, object]]:
     body: Dict[str, object] = {
         "summary": summary[:250] or "E3 Assignment",
         "description": description,
-        "start": {"dateTime": due_dt.isoformat(), "timeZone": "Asia/Taipei"},
-        "end": {"dateTime": end_dt.isoformat(), "timeZone": "Asia/Taipei"},
+        "start": {"dateTime": due_dt.isoformat(), "timeZone": TAIPEI_TZ_NAME},
+        "end": {"dateTime": end_dt.isoformat(), "timeZone": TAIPEI_TZ_NAME},
         "reminders": {"useDefault": False, "overrides": [{"method": "popup", "minutes": 2880}]},
         "source": {"title": "NYCU E3", "url": item.get("url")},
         "location": location,
@@ -116,6 +146,85 @@ def _iter_event_payloads(assignments: Iterable[Dict[str, object]]) -> Iterable[T
             continue
 
 
+def _import_payload_for(event_id: str, body: Dict[str, object]) -> Dict[str, object]:
+    payload = dict(body)
+    payload["iCalUID"] = f"{event_id}@e3.hwtool"
+    ext = payload.setdefault("extendedProperties", {}).setdefault("private", {})
+    ext["e3_uid"] = event_id
+    ext["category"] = "作業"
+    return payload
+
+
+def _build_batch_body(boundary: str, path: str, payloads: List[Dict[str, object]]) -> bytes:
+    parts: List[bytes] = []
+    for index, payload in enumerate(payloads):
+        parts.append(
+            (
+                f"--{boundary}\r\n"
+                "Content-Type: application/http\r\n"
+                f"Content-ID: <item-{index}>\r\n"
+                "\r\n"
+                f"POST {path}\r\n"
+                "Content-Type: application/json; charset=UTF-8\r\n"
+                "\r\n"
+            ).encode("utf-8")
+        )
+        # orjson already emits UTF-8 bytes, so event JSON is never round-tripped through str.
+        parts.append(orjson.dumps(payload))
+        parts.append(b"\r\n")
+    parts.append(f"--{boundary}--\r\n".encode("utf-8"))
+    return b"".join(parts)
+
+
+def _parse_batch_response(resp: requests.Response) -> List[Tuple[int, str]]:
+    content_type = resp.headers.get("Content-Type", "")
+    boundary = ""
+    for param in content_type.split(";")[1:]:
+        key, _, value = param.strip().partition("=")
+        if key.lower() == "boundary":
+            boundary = value.strip('"')
+    if not boundary:
+        raise RuntimeError(f"Google API error: unexpected batch response {content_type!r}")
+    results: List[Tuple[int, str]] = []
+    for part in resp.text.split(f"--{boundary}")[1:]:
+        if part.startswith("--"):
+            break
+        # Each part wraps a full HTTP response: part headers, blank line, status line, headers, body.
+        _, _, inner = part.partition("\r\n\r\n")
+        status_line, _, rest = inner.partition("\r\n")
+        _, _, body = rest.partition("\r\n\r\n")
+        try:
+            status = int(status_line.split(" ", 2)[1])
+        except (IndexError, ValueError):
+            raise RuntimeError(f"Google API error: malformed batch part {status_line!r}") from None
+        results.append((status, body.strip()))
+    return results
+
+
+def _post_import_batch(
+    payloads: List[Dict[str, object]],
+    *,
+    path: str,
+    access_token: str,
+    timeout: int,
+) -> List[Tuple[int, str]]:
+    boundary = f"e3_batch_{uuid.uuid4().hex}"
+    resp = _GOOGLE_SESSION.post(
+        GOOGLE_BATCH_URL,
+        headers={
+            "Authorization": f"Bearer {access_token}",
+            "Content-Type": f"multipart/mixed; boundary={boundary}",
+        },
+        data=_build_batch_body(boundary, path, payloads),
+        timeout=timeout,
+    )
+    if resp.status_code in (401, 403):
+        raise GoogleUnauthorizedError("Google API authorization required")
+    if resp.status_code >= 400:
+        raise RuntimeError(f"Google API error: {resp.status_code} {resp.text}")
+    return _parse_batch_response(resp)
+
+
 def sync_assignments_to_google_calendar(
     assignments: Iterable[Dict[str, object]],
     *,
@@ -123,26 +232,27 @@ def sync_assignments_to_google_calendar(
     calendar_id: str,
     timeout: int = 15,
 ) -> int:
-    headers = {
-        "Authorization": f"Bearer {access_token}",
-        "Content-Type": "application/json",
-    }
-    encoded_calendar = quote(calendar_id, safe="")
-    updated = 0
-    for event_id, body in _iter_event_payloads(assignments):
-        payload = dict(body)
-        payload["iCalUID"] = f"{event_id}@e3.hwtool"
-        ext = payload.setdefault("extendedProperties", {}).setdefault("private", {})
-        ext["e3_uid"] = event_id
-        ext["category"] = "作業"
-        url = f"{GOOGLE_CAL_BASE}/calendars/{encoded_calendar}/events/import"
-        resp = requests.post(url, headers=headers, json=payload, timeout=timeout)
-        if resp.status_code in (401, 403):
-            raise GoogleUnauthorizedError("Google API authorization required")
-        if resp.status_code >= 400:
-            raise RuntimeError(f"Google API error: {resp.status_code} {resp.text}")
-        updated += 1
-    return updated
+    """Import events through the Calendar batch endpoint, up to GOOGLE_BATCH_SIZE per round-trip.
+
+    Selections larger than one batch send their batches concurrently.
+    """
+    path = f"/calendar/v3/calendars/{quote(calendar_id, safe='')}/events/import"
+    payloads = [_import_payload_for(event_id, body) for event_id, body in _iter_event_payloads(assignments)]
+    chunks = [payloads[offset : offset + GOOGLE_BATCH_SIZE] for offset in range(0, len(payloads), GOOGLE_BATCH_SIZE)]
+    post_batch = partial(_post_import_batch, path=path, access_token=access_token, timeout=timeout)
+    if len(chunks) > 1:
+        with ThreadPoolExecutor(max_workers=min(GOOGLE_BATCH_WORKERS, len(chunks))) as pool:
+            batch_results = list(pool.map(post_batch, chunks))
+    else:
+        batch_results = [post_batch(chunk) for chunk in chunks]
+    results = [result for batch in batch_results for result in batch]
+    if any(status in (401, 403) for status, _ in results):
+        raise GoogleUnauthorizedError("Google API authorization required")
+    failures = [(status, text) for status, text in results if status >= 400]
+    if failures:
+        status, text = failures[0]
+        raise RuntimeError(f"Google API error: {status} {text}")
+    return len(results)
 
 
 def compute_expiry(expires_in: int) -> float:
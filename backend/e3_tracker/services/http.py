@@ -1,12 +1,35 @@
-import re
-from typing import Optional
+import threading
+from typing import Dict, Optional, Tuple
+from urllib.parse import urlsplit
 
 import requests
 import urllib3
-from bs4 import BeautifulSoup
+from requests.adapters import HTTPAdapter
+from bs4 import BeautifulSoup, SoupStrainer
 
 from ..shared.constants import HEADERS
 
+LOGIN_TOKEN_STRAINER = SoupStrainer("input", attrs={"name": "logintoken"})
+# A refresh fans out over several fetch threads and several users can refresh at once.
+# It is also the cap on in-flight requests per site across every pooled session.
+E3_POOL_MAXSIZE = 32
+
+_base_sessions: Dict[Tuple[str, str, bool], requests.Session] = {}
+_site_slots: Dict[str, threading.BoundedSemaphore] = {}
+_base_sessions_lock = threading.Lock()
+
+
+class _SiteLimitedAdapter(HTTPAdapter):
+    """HTTPAdapter that waits for one of the site's request slots before sending."""
+
+    def __init__(self, slots: threading.BoundedSemaphore, **kwargs) -> None:
+        self._slots = slots
+        super().__init__(**kwargs)
+
+    def send(self, request, **kwargs):
+        with self._slots:
+            return super().send(request, **kwargs)
+
 
 def safe_request(sess: requests.Session, method: str, url: str, **kwargs) -> requests.Response:
     try:
@@ -24,7 +47,7 @@ def need_login_redirect(html_text: str) -> bool:
 def login_with_password(sess: requests.Session, base_url: str, username: str, password: str, *, timeout: int = 20) -> None:
     login_url = f"{base_url}/login/index.php"
     resp = safe_request(sess, "GET", login_url, headers=HEADERS, timeout=timeout)
-    soup = BeautifulSoup(resp.text, "html.parser")
+    soup = BeautifulSoup(resp.text, "html.parser", parse_only=LOGIN_TOKEN_STRAINER)
     token_input = soup.find("input", {"name": "logintoken"})
     token = token_input["value"] if token_input and token_input.has_attr("value") else ""
     payload = {"username": username, "password": password, "logintoken": token, "anchor": ""}
@@ -34,7 +57,7 @@ def login_with_password(sess: requests.Session, base_url: str, username: str, pa
 
 
 def apply_cookie(sess: requests.Session, base_url: str, moodle_session_value: str) -> None:
-    domain = re.sub(r"^https?://", "", base_url).split("/")[0]
+    domain = urlsplit(base_url).hostname or ""
     sess.cookies.set("MoodleSession", moodle_session_value, domain=domain)
 
 
@@ -44,3 +67,26 @@ def configure_tls(sess: requests.Session, *, cafile: Optional[str], insecure: bo
     elif insecure:
         sess.verify = False
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
+
+
+def pooled_session(base_url: str, *, cafile: Optional[str] = None, insecure: bool = False) -> requests.Session:
+    """Return a session with its own cookie jar on connection pools shared per site and TLS setup."""
+    key = (base_url, cafile or "", bool(insecure))
+    with _base_sessions_lock:
+        base = _base_sessions.get(key)
+        if base is None:
+            site = urlsplit(base_url).hostname or base_url
+            slots = _site_slots.get(site)
+            if slots is None:
+                slots = _site_slots[site] = threading.BoundedSemaphore(E3_POOL_MAXSIZE)
+            base = requests.Session()
+            configure_tls(base, cafile=cafile, insecure=insecure)
+            adapter = _SiteLimitedAdapter(slots, pool_connections=4, pool_maxsize=E3_POOL_MAXSIZE)
+            base.mount("https://", adapter)
+            base.mount("http://", adapter)
+            _base_sessions[key] = base
+    sess = requests.Session()
+    sess.verify = base.verify
+    # Sharing the adapters reuses kept-alive TLS connections; cookies stay per user.
+    sess.adapters = base.adapters
+    return sess
@@ -1,12 +1,18 @@
 import re
 from typing import Dict, Set
+from zoneinfo import ZoneInfo
 
-import pytz
-
-TAIPEI_TZ = pytz.timezone("Asia/Taipei")
+TAIPEI_TZ_NAME = "Asia/Taipei"
+TAIPEI_TZ = ZoneInfo(TAIPEI_TZ_NAME)
 
 ASSIGN_LINK_RE = re.compile(r"/mod/assign/view\.php\?id=\d+")
 COURSE_LINK_RE = re.compile(r"/course/view\.php\?id=(\d+)")
+COURSE_ANCHOR_RE = re.compile(
+    r"""<a\b[^>]*?\shref\s*=\s*(["'])([^"'>]*/course/view\.php\?id=\d+[^"'>]*)\1[^>]*>(.*?)</a\s*>""",
+    re.IGNORECASE | re.DOTALL,
+)
+# Tags and comments only, so a bare "<" in text survives like it does in html.parser.
+HTML_TAG_RE = re.compile(r"<!--.*?-->|</?[A-Za-z][^>]*>", re.DOTALL)
 
 COMPLETED_KEYWORDS: Set[str] = {
     "已繳交",
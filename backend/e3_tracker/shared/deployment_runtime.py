@@ -6,7 +6,7 @@ from datetime import datetime
 from pathlib import Path
 from typing import Any, Dict, List, Mapping
 
-from flask import Response, flash, redirect, render_template_string, request, session, url_for
+from flask import Response, flash, redirect, render_template, request, session, url_for
 from sqlalchemy import inspect, text
 
 from .storage import PersistentStorage
@@ -236,6 +236,7 @@ def _register_player_settings_routes(
 ) -> None:
     if "admin_study_player_settings" in app.view_functions:
         return
+    compiled_template = app.jinja_env.from_string(template)
 
     def require_admin():
         authenticated, is_admin = _admin_access(storage)
@@ -267,8 +268,8 @@ def _register_player_settings_routes(
                 "success",
             )
             return redirect(url_for("admin_study_player_settings"))
-        return render_template_string(
-            template,
+        return render_template(
+            compiled_template,
             settings=storage.load_study_player_settings(),
             rate_options=PLAYER_RATE_OPTIONS,
             username=session.get("username") or "管理員",
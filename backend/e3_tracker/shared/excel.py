@@ -1,16 +1,34 @@
 import io
 from datetime import datetime
-from typing import Any, Dict, List, Union
+from typing import Any, Dict, List, Optional, Tuple, Union
 
 from openpyxl import Workbook
+from openpyxl.cell import WriteOnlyCell
 from openpyxl.styles import Alignment, Border, Font, PatternFill, Side
 
 from .constants import TAIPEI_TZ
 
-
-def _weekday_name(dt: datetime) -> str:
-    names = ["一", "二", "三", "四", "五", "六", "日"]
-    return names[dt.weekday()] if 0 <= dt.weekday() <= 6 else ""
+# Style objects are immutable once assigned, so every cell can share these.
+_HEADER_FONT = Font(bold=True, color="FFFFFF")
+_HEADER_FILL = PatternFill("solid", fgColor="4A5568")
+_THIN_BORDER = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+_THICK_TB_BORDER = Border(top=Side(style="thick"), bottom=Side(style="thick"))
+_FONT_TITLE_BIG = Font(bold=True, size=14)
+_FONT_TITLE_SMALL = Font(bold=True, size=12)
+_ALIGN_CENTER = Alignment(horizontal="center")
+_ALIGN_LEFT = Alignment(horizontal="left")
+_ALIGN_WRAP_TOP = Alignment(wrap_text=True, vertical="top")
+_ALIGN_CENTER_TOP = Alignment(horizontal="center", vertical="top", wrap_text=True)
+_ALIGN_LEFT_TOP = Alignment(horizontal="left", vertical="top", wrap_text=True)
+_ROW_ALIGNMENTS = (_ALIGN_WRAP_TOP, _ALIGN_WRAP_TOP, _ALIGN_CENTER_TOP, _ALIGN_LEFT_TOP)
+_OVERDUE_FILL = PatternFill("solid", fgColor="F56565")
+_OVERDUE_ROW_FILL = PatternFill("solid", fgColor="FFF5F5")
+_SECTION_FILL = PatternFill("solid", fgColor="E2E8F0")
+_SUBTITLE_FILL = PatternFill("solid", fgColor="CBD5F5")
+_ZEBRA2_FILL = PatternFill("solid", fgColor="F7FAFC")
+
+
+_WEEKDAY_NAMES = ("一", "二", "三", "四", "五", "六", "日")
 
 
 def build_excel(
@@ -29,69 +47,68 @@ def build_excel(
     Returns:
         若 return_bytes=False 則回傳檔名，否則回傳 BytesIO 物件
     """
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "待繳作業"
-
-    header_font = Font(bold=True, color="FFFFFF")
-    header_fill = PatternFill("solid", fgColor="4A5568")
-    border = Border(left=Side(style="thin"), right=Side(style="thin"), top=Side(style="thin"), bottom=Side(style="thin"))
+    # Write-only mode streams rows to the file instead of keeping every cell
+    # object around, so rows are staged here and widths are set before writing.
+    wb = Workbook(write_only=True)
+    ws = wb.create_sheet("待繳作業")
+    rows: List[List[WriteOnlyCell]] = []
+    max_len = [0, 0, 0, 0]
+
+    def stage_row(row: List[WriteOnlyCell]) -> None:
+        # Column widths are tracked while staging so the rows are never walked again.
+        for col_idx, cell in enumerate(row):
+            value = cell.value
+            if value is not None:
+                length = len(str(value))
+                if length > max_len[col_idx]:
+                    max_len[col_idx] = length
+        rows.append(row)
 
     headers = ["課程", "作業", "截止", "狀態"]
-    ws.append(headers)
-    for col in range(1, 5):
-        cell = ws.cell(row=1, column=col)
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.border = border
-        cell.alignment = Alignment(horizontal="center")
-
-    overdue_assignments = [a for a in assignments if a.get("overdue") and not a.get("completed")]
-    future_assignments = [a for a in assignments if not a.get("overdue") and not a.get("completed")]
-
-    overdue_fill = PatternFill("solid", fgColor="F56565")
-    overdue_row_fill = PatternFill("solid", fgColor="FFF5F5")
-    section_fill = PatternFill("solid", fgColor="E2E8F0")
-    subtitle_fill = PatternFill("solid", fgColor="CBD5F5")
-    zebra2_fill = PatternFill("solid", fgColor="F7FAFC")
+    header_row = []
+    for text in headers:
+        cell = WriteOnlyCell(ws, value=text)
+        cell.font = _HEADER_FONT
+        cell.fill = _HEADER_FILL
+        cell.border = _THIN_BORDER
+        cell.alignment = _ALIGN_CENTER
+        header_row.append(cell)
+    stage_row(header_row)
+
+    def write_blank_row() -> None:
+        stage_row([WriteOnlyCell(ws, value="") for _ in range(4)])
 
     def write_title_row(text: str, fill: PatternFill, *, big: bool = False) -> None:
         safe = ("'" + text) if text.startswith("=") else text
-        ws.append([safe, "", "", ""])
-        row_idx = ws.max_row
-        row_border = Border(top=Side(style="thick"), bottom=Side(style="thick")) if big else None
-        for col_idx in range(1, 5):
-            cell = ws.cell(row=row_idx, column=col_idx)
+        row = []
+        for value in (safe, "", "", ""):
+            cell = WriteOnlyCell(ws, value=value)
             cell.fill = fill
-            if big and row_border:
-                cell.border = row_border
-        target = ws.cell(row=row_idx, column=1)
-        target.font = Font(bold=True, size=14 if big else 12)
-        target.alignment = Alignment(horizontal="left")
+            if big:
+                cell.border = _THICK_TB_BORDER
+            row.append(cell)
+        target = row[0]
+        target.font = _FONT_TITLE_BIG if big else _FONT_TITLE_SMALL
+        target.alignment = _ALIGN_LEFT
+        stage_row(row)
         if big:
-            ws.row_dimensions[row_idx].height = 22
+            ws.row_dimensions[len(rows)].height = 22
 
     def write_rows(items: List[Dict[str, Any]], fill: PatternFill) -> None:
         for entry in items:
-            ws.append(
-                [
-                    entry.get("course_title", ""),
-                    entry.get("title", ""),
-                    entry.get("due_at", "") or "無截止",
-                    "作業連結",
-                ]
-            )
-            row_idx = ws.max_row
-            for col_idx in range(1, 5):
-                cell = ws.cell(row=row_idx, column=col_idx)
+            values = [
+                entry.get("course_title", ""),
+                entry.get("title", ""),
+                entry.get("due_at", "") or "無截止",
+                "作業連結",
+            ]
+            row = []
+            for value, alignment in zip(values, _ROW_ALIGNMENTS):
+                cell = WriteOnlyCell(ws, value=value)
                 cell.fill = fill
-                if col_idx in (1, 2):
-                    cell.alignment = Alignment(wrap_text=True, vertical="top")
-                elif col_idx == 3:
-                    cell.alignment = Alignment(horizontal="center", vertical="top", wrap_text=True)
-                else:
-                    cell.alignment = Alignment(horizontal="left", vertical="top", wrap_text=True)
-            link_cell = ws.cell(row=row_idx, column=4)
+                cell.alignment = alignment
+                row.append(cell)
+            link_cell = row[3]
             url = entry.get("url", "")
             if isinstance(url, str) and url.startswith("http"):
                 try:
@@ -99,57 +116,65 @@ def build_excel(
                     link_cell.style = "Hyperlink"
                 except Exception:
                     pass
-
-    future_by_date: Dict[str, List[Dict[str, Any]]] = {}
-    for item in future_assignments:
+            stage_row(row)
+
+    overdue_assignments: List[Dict[str, Any]] = []
+    # Each date bucket keeps the weekday of its due date for the subtitle row.
+    future_by_date: Dict[str, Tuple[Optional[int], List[Dict[str, Any]]]] = {}
+    for item in assignments:
+        if item.get("completed"):
+            continue
+        if item.get("overdue"):
+            overdue_assignments.append(item)
+            continue
         due_ts = item.get("due_ts")
         if due_ts:
-            key = datetime.fromtimestamp(due_ts, tz=TAIPEI_TZ).strftime("%Y-%m-%d")
+            due_dt = datetime.fromtimestamp(due_ts, tz=TAIPEI_TZ)
+            key = due_dt.strftime("%Y-%m-%d")
+            weekday: Optional[int] = due_dt.weekday()
         else:
             key = "無期限"
-        future_by_date.setdefault(key, []).append(item)
+            weekday = None
+        future_by_date.setdefault(key, (weekday, []))[1].append(item)
 
     ordered_dates = sorted(future_by_date.keys(), key=lambda x: x)
 
     if overdue_assignments:
-        write_title_row("===== 逾期未繳 =====", overdue_fill, big=True)
-        write_rows(overdue_assignments, overdue_row_fill)
+        write_title_row("===== 逾期未繳 =====", _OVERDUE_FILL, big=True)
+        write_rows(overdue_assignments, _OVERDUE_ROW_FILL)
 
     if overdue_assignments and ordered_dates:
-        ws.append(["", "", "", ""])
+        write_blank_row()
 
     if ordered_dates:
-        write_title_row("===== 未繳交 =====", section_fill, big=True)
+        write_title_row("===== 未繳交 =====", _SECTION_FILL, big=True)
         for key in ordered_dates:
-            items = sorted(future_by_date.get(key, []), key=lambda x: x.get("due_ts") or float("inf"))
+            weekday, bucket = future_by_date[key]
+            items = sorted(bucket, key=lambda x: x.get("due_ts") or float("inf"))
             if not items:
                 continue
             subtitle = f"-- {key}"
-            try:
-                dt_for_week = datetime.strptime(key, "%Y-%m-%d").replace(tzinfo=TAIPEI_TZ)
-                subtitle += f" (週{_weekday_name(dt_for_week)}) --"
-            except ValueError:
+            if weekday is None:
                 subtitle += " --"
-            write_title_row(subtitle, subtitle_fill)
-            write_rows(items, zebra2_fill)
+            else:
+                subtitle += f" (週{_WEEKDAY_NAMES[weekday]}) --"
+            write_title_row(subtitle, _SUBTITLE_FILL)
+            write_rows(items, _ZEBRA2_FILL)
 
     for col_idx in range(1, 5):
-        max_len = 0
-        for row in ws.iter_rows(min_row=1, max_row=ws.max_row, min_col=col_idx, max_col=col_idx):
-            value = row[0].value
-            if value is None:
-                continue
-            max_len = max(max_len, len(str(value)))
         base = 18 if col_idx in (1, 3) else 28 if col_idx == 2 else 14
-        width = max(base, min(max_len + 2, 80))
+        width = max(base, min(max_len[col_idx - 1] + 2, 80))
         if col_idx in (1, 2):
             width = min(int(round(width * 1.2)), 100)
         ws.column_dimensions[chr(ord("A") + col_idx - 1)].width = width
 
     ws.freeze_panes = "A2"
 
-    if ws.max_row <= 1:
-        ws.append(["", "", "", ""])
+    if len(rows) <= 1:
+        write_blank_row()
+
+    for row in rows:
+        ws.append(row)
 
     if return_bytes:
         buf = io.BytesIO()
@@ -1,8 +1,10 @@
 import re
-from datetime import datetime
-from typing import List, Optional, Sequence, Set, Tuple
+from datetime import date, datetime
+from functools import lru_cache
+from html import unescape
+from typing import Dict, List, Optional, Sequence, Tuple
 
-from bs4 import BeautifulSoup
+from bs4 import BeautifulSoup, SoupStrainer
 from dateutil import parser as dtparser
 
 from .constants import (
@@ -10,13 +12,65 @@ from .constants import (
     COMPLETED_KEYWORDS,
     DUE_LABELS,
     GRADE_LABELS,
+    HTML_TAG_RE,
     INCOMPLETE_KEYWORDS,
     TAIPEI_TZ,
 )
 
+# The labelled fields of an assignment page live in table rows or dt/dd pairs.
+ASSIGN_FIELD_STRAINER = SoupStrainer(["tr", "dt", "dd"])
+# List pages are read through their tables, plus bare links when there is no table.
+LIST_PAGE_STRAINER = SoupStrainer(["table", "a"])
+
+_WS_RE = re.compile(r"\s+")
+_PLACEHOLDER_COMPACT_RE = re.compile(r"[\s\[\]]+")
+_DATE_RE = re.compile(r"(\d{4}[/-]\d{1,2}[/-]\d{1,2}(\s+\d{1,2}:\d{2}(:\d{2})?)?)")
+_REMAINING_RE = re.compile(
+    r"((?:提早|提前|逾期)\s*\d+\s*[日天](?:\s*\d+\s*小時)?(?:\s*\d+\s*分鐘)?(?:\s*就)?繳交作業)"
+)
+_REMAINING_LOOSE_RE = re.compile(
+    r"((?:提早|提前|逾期|準時)(?:\s*\d+\s*[日天])?(?:\s*\d+\s*小時)?(?:\s*\d+\s*分鐘)?(?:\s*就)?繳交作業)"
+)
+_SUBMITTED_COUNT_RE = re.compile(r"(\d+)\s*(?:個)?已繳")
+_UNSUBMITTED_COUNT_RE = re.compile(r"(\d+)\s*(?:個)?未繳")
+
+# Label and keyword sets are matched against lower-cased text, so lower them once here.
+_DUE_LABELS_LOWER = tuple({label.lower() for label in DUE_LABELS})
+_COMPLETED_KEYWORDS_LOWER = tuple({keyword.lower() for keyword in COMPLETED_KEYWORDS})
+_INCOMPLETE_KEYWORDS_LOWER = tuple({keyword.lower() for keyword in INCOMPLETE_KEYWORDS})
+_STATUS_LABELS = ("submission status", "繳交狀態", "提交狀態")
+_REMAINING_LABELS = ("剩餘時間", "time remaining")
+# Shapes Moodle renders most often; anything else falls through to dateutil's fuzzy parser.
+_FAST_FORMATS = (
+    "%Y-%m-%d %H:%M",
+    "%Y-%m-%d %H:%M:%S",
+    "%Y/%m/%d %H:%M",
+    "%Y/%m/%d %H:%M:%S",
+    "%Y-%m-%d",
+    "%Y/%m/%d",
+    "%Y-%m-%dT%H:%M:%S",
+)
+_SUBMISSION_LABELS = (
+    "submission time",
+    "submitted on",
+    "last submission",
+    "last modified",
+    "繳交時間",
+    "提交時間",
+    "最後修改",
+    "最後繳交",
+    "最後提交",
+)
+
 
 def extract_text(el) -> str:
-    return re.sub(r"\s+", " ", el.get_text(strip=True)) if el else ""
+    return _WS_RE.sub(" ", el.get_text(strip=True)) if el else ""
+
+
+def fragment_text(fragment: str) -> str:
+    """Text of an HTML fragment as extract_text would give it, without building a tree."""
+    text = "".join(unescape(part).strip() for part in HTML_TAG_RE.split(fragment))
+    return _WS_RE.sub(" ", text)
 
 
 def _is_placeholder_title(title: str) -> bool:
@@ -25,12 +79,12 @@ def _is_placeholder_title(title: str) -> bool:
     normalized = title.strip().lower()
     if len(normalized) <= 2:
         return True
-    compact = re.sub(r"[\s\[\]]+", "", normalized)
+    compact = _PLACEHOLDER_COMPACT_RE.sub("", normalized)
     return compact in {"view", "檢視", "查看", "assignment", "作業"}
 
 
 def _normalize_label(text: str) -> str:
-    return re.sub(r"\s+", " ", text or "").strip().strip(":：").lower()
+    return _WS_RE.sub(" ", text or "").strip().strip(":：").lower()
 
 
 def _matches_labeled_field(label: str, candidates: Sequence[str]) -> bool:
@@ -42,137 +96,130 @@ def _matches_labeled_field(label: str, candidates: Sequence[str]) -> bool:
 
 
 def _clean_grade_text(value: Optional[str]) -> Optional[str]:
-    text = re.sub(r"\s+", " ", value or "").strip()
+    text = _WS_RE.sub(" ", value or "").strip()
     if not text or text in {"-", "—", "N/A"}:
         return None
     return text
 
 
+def status_text_flags(text: str) -> Tuple[bool, bool]:
+    """Return (is_complete, is_incomplete) for a submission status text."""
+    low = text.lower()
+    is_complete = any(kw in low for kw in _COMPLETED_KEYWORDS_LOWER)
+    is_incomplete = any(kw in low for kw in _INCOMPLETE_KEYWORDS_LOWER)
+    if is_complete and is_incomplete:
+        is_complete = False
+    return is_complete, is_incomplete
+
+
 def find_due_and_status_from_assign_page(
     html: str,
 ) -> Tuple[bool, Optional[bool], Optional[datetime], str, Optional[str], Optional[datetime], Optional[str]]:
-    soup = BeautifulSoup(html, "html.parser")
+    soup = BeautifulSoup(html, "html.parser", parse_only=ASSIGN_FIELD_STRAINER)
     status_cell_text = ""
     due_str = None
     grade_text = None
     submitted_str = None
     remaining_text = None
-    submission_labels = [
-        "submission time",
-        "submitted on",
-        "last submission",
-        "last modified",
-        "繳交時間",
-        "提交時間",
-        "最後修改",
-        "最後繳交",
-        "最後提交",
-    ]
 
     for tr in soup.find_all("tr"):
         th = tr.find(["th", "td"])
         tds = tr.find_all("td")
         label = extract_text(th) if th else ""
         label_lower = label.lower()
-        if any(lbl in label_lower for lbl in ["submission status", "繳交狀態", "提交狀態"]):
+        if any(lbl in label_lower for lbl in _STATUS_LABELS):
             status_cell_text = extract_text(tds[-1]) if tds else extract_text(tr)
-        if any(lbl.lower() in label_lower for lbl in [s.lower() for s in DUE_LABELS]):
+        if any(lbl in label_lower for lbl in _DUE_LABELS_LOWER):
             if tds:
                 due_str = extract_text(tds[-1])
         if _matches_labeled_field(label, GRADE_LABELS):
             grade_text = _clean_grade_text(extract_text(tds[-1]) if tds else extract_text(tr))
-        if not submitted_str and any(lbl in label_lower for lbl in submission_labels):
+        if not submitted_str and any(lbl in label_lower for lbl in _SUBMISSION_LABELS):
             submitted_str = extract_text(tds[-1]) if tds else extract_text(tr)
-        if not remaining_text and any(lbl in label_lower for lbl in ["剩餘時間", "time remaining"]):
+        if not remaining_text and any(lbl in label_lower for lbl in _REMAINING_LABELS):
             remaining_text = extract_text(tds[-1]) if tds else extract_text(tr)
 
     for dt in soup.find_all("dt"):
         label = extract_text(dt)
         label_lower = label.lower()
-        if not status_cell_text and any(lbl in label_lower for lbl in ["submission status", "繳交狀態", "提交狀態"]):
+        if not status_cell_text and any(lbl in label_lower for lbl in _STATUS_LABELS):
             status_cell_text = extract_text(dt.find_next_sibling("dd"))
-        if not due_str and any(lbl.lower() in label_lower for lbl in [s.lower() for s in DUE_LABELS]):
+        if not due_str and any(lbl in label_lower for lbl in _DUE_LABELS_LOWER):
             due_str = extract_text(dt.find_next_sibling("dd"))
         if grade_text is None and _matches_labeled_field(label, GRADE_LABELS):
             grade_text = _clean_grade_text(extract_text(dt.find_next_sibling("dd")))
-        if not submitted_str and any(lbl in label_lower for lbl in submission_labels):
+        if not submitted_str and any(lbl in label_lower for lbl in _SUBMISSION_LABELS):
             submitted_str = extract_text(dt.find_next_sibling("dd"))
-        if not remaining_text and any(lbl in label_lower for lbl in ["剩餘時間", "time remaining"]):
+        if not remaining_text and any(lbl in label_lower for lbl in _REMAINING_LABELS):
             remaining_text = extract_text(dt.find_next_sibling("dd"))
 
+    # Whole-page text is only needed by the fallbacks below, so the full parse is deferred to them.
+    block_text = None
     if not due_str:
-        block_text = extract_text(soup)
-        for label in DUE_LABELS:
-            if label.lower() in block_text.lower():
-                match = re.search(r"(\d{4}[/-]\d{1,2}[/-]\d{1,2}(\s+\d{1,2}:\d{2}(:\d{2})?)?)", block_text)
-                if match:
-                    due_str = match.group(1)
-                    break
-    else:
-        block_text = extract_text(soup)
+        block_text = extract_text(BeautifulSoup(html, "html.parser"))
+        block_lower = block_text.lower()
+        if any(label in block_lower for label in _DUE_LABELS_LOWER):
+            match = _DATE_RE.search(block_text)
+            if match:
+                due_str = match.group(1)
 
     if not remaining_text:
-        remaining_match = re.search(
-            r"((?:提早|提前|逾期)\s*\d+\s*[日天](?:\s*\d+\s*小時)?(?:\s*\d+\s*分鐘)?(?:\s*就)?繳交作業)",
-            block_text,
-        )
+        if block_text is None:
+            block_text = extract_text(BeautifulSoup(html, "html.parser"))
+        remaining_match = _REMAINING_RE.search(block_text)
         if not remaining_match:
-            remaining_match = re.search(
-                r"((?:提早|提前|逾期|準時)(?:\s*\d+\s*[日天])?(?:\s*\d+\s*小時)?(?:\s*\d+\s*分鐘)?(?:\s*就)?繳交作業)",
-                block_text,
-            )
+            remaining_match = _REMAINING_LOOSE_RE.search(block_text)
         if remaining_match:
             remaining_text = remaining_match.group(1)
 
-    low = status_cell_text.lower()
-    status_is_complete = any(kw in low for kw in [s.lower() for s in COMPLETED_KEYWORDS])
-    status_is_incomplete = any(kw in low for kw in [s.lower() for s in INCOMPLETE_KEYWORDS])
-    if status_is_complete and status_is_incomplete:
-        status_is_complete = False
+    status_is_complete, status_is_incomplete = status_text_flags(status_cell_text)
 
-    due_dt = None
-    if due_str:
-        try:
-            due_dt = dtparser.parse(due_str, dayfirst=False, fuzzy=True)
-            if due_dt.tzinfo is None:
-                due_dt = TAIPEI_TZ.localize(due_dt)
-            else:
-                due_dt = due_dt.astimezone(TAIPEI_TZ)
-        except Exception:
-            due_dt = None
-
-    submitted_dt = None
-    if submitted_str:
-        try:
-            submitted_dt = dtparser.parse(submitted_str, dayfirst=False, fuzzy=True)
-            if submitted_dt.tzinfo is None:
-                submitted_dt = TAIPEI_TZ.localize(submitted_dt)
-            else:
-                submitted_dt = submitted_dt.astimezone(TAIPEI_TZ)
-        except Exception:
-            submitted_dt = None
+    due_dt = parse_due_text_to_dt(due_str)
+    submitted_dt = parse_due_text_to_dt(submitted_str)
 
     return status_is_complete, status_is_incomplete, due_dt, status_cell_text.strip(), grade_text, submitted_dt, remaining_text
 
 
-def parse_due_text_to_dt(due_text: Optional[str]):
-    if not due_text:
-        return None
+def _parse_known_format(due_text: str) -> Optional[datetime]:
+    text = due_text.strip()
     try:
-        value = dtparser.parse(due_text, dayfirst=False, fuzzy=True)
+        return datetime.fromisoformat(text.replace("/", "-"))
+    except ValueError:
+        pass
+    for fmt in _FAST_FORMATS:
+        try:
+            return datetime.strptime(text, fmt)
+        except ValueError:
+            continue
+    return None
+
+
+@lru_cache(maxsize=4096)
+def _parse_due_cached(due_text: str, today: date) -> Optional[datetime]:
+    # dateutil fills missing date parts from the current day, so `today` is part of the key.
+    try:
+        value = _parse_known_format(due_text)
+        if value is None:
+            value = dtparser.parse(due_text, dayfirst=False, fuzzy=True)
         if value.tzinfo is None:
-            return TAIPEI_TZ.localize(value)
+            return value.replace(tzinfo=TAIPEI_TZ)
         return value.astimezone(TAIPEI_TZ)
     except Exception:
         return None
 
 
+def parse_due_text_to_dt(due_text: Optional[str]):
+    # Placeholders such as "n/a", "-" or "未設定" carry no digits; skip them before dateutil's fuzzy scan.
+    if not due_text or not any(ch.isdigit() for ch in due_text):
+        return None
+    return _parse_due_cached(due_text, date.today())
+
+
 def gather_assign_links_from_list_page(
     html: str, base_url: str
-) -> List[Tuple[str, str, Optional[str], Optional[int], Optional[int]]]:
-    soup = BeautifulSoup(html, "html.parser")
-    links: List[Tuple[str, str, Optional[str], Optional[int], Optional[int]]] = []
-    date_pattern = re.compile(r"\d{4}[/-]\d{1,2}[/-]\d{1,2}(?:\s+\d{1,2}:\d{2}(?::\d{2})?)?")
+) -> List[Tuple[str, str, Optional[str], Optional[int], Optional[int], Optional[str]]]:
+    soup = BeautifulSoup(html, "html.parser", parse_only=LIST_PAGE_STRAINER)
+    links: List[Tuple[str, str, Optional[str], Optional[int], Optional[int], Optional[str]]] = []
 
     for table in soup.find_all("table"):
         headers: Sequence[str] = []
@@ -183,28 +230,25 @@ def gather_assign_links_from_list_page(
         due_col_idx = -1
         status_col_idx = -1
         for idx, header in enumerate(headers):
-            if any(lbl in header for lbl in DUE_LABELS) or any(lbl.lower() in header.lower() for lbl in DUE_LABELS):
+            header_lower = header.lower()
+            if any(lbl in header_lower for lbl in _DUE_LABELS_LOWER):
                 due_col_idx = idx
-            if "繳交狀態" in header or "submission status" in header.lower():
+            if "繳交狀態" in header or "submission status" in header_lower:
                 status_col_idx = idx
 
         for tr in table.find_all("tr"):
-            cells = tr.find_all(["td", "th"])
-            candidates = tr.find_all("a", href=True)
-            target = None
-            for a_tag in candidates:
-                if ASSIGN_LINK_RE.search(a_tag["href"]):
-                    target = a_tag
-                    break
+            # bs4 matches the pattern against each href while walking, stopping at the first assignment link.
+            target = tr.find("a", href=ASSIGN_LINK_RE)
             if not target:
                 continue
+            cells = tr.find_all(["td", "th"])
             href = target["href"]
             url = href if href.startswith("http") else base_url.rstrip("/") + "/" + href.lstrip("/")
             title = extract_text(target)
             if _is_placeholder_title(title):
                 alt_title = target.get("data-activityname") or target.get("aria-label") or target.get("title")
                 if alt_title:
-                    title = extract_text(BeautifulSoup(str(alt_title), "html.parser"))
+                    title = fragment_text(str(alt_title))
             
             if _is_placeholder_title(title) and cells:
                 guessed = extract_text(cells[0])
@@ -216,49 +260,50 @@ def gather_assign_links_from_list_page(
                 due_text = extract_text(cells[due_col_idx])
             if not due_text:
                 row_text = extract_text(tr)
-                match = date_pattern.search(row_text)
+                match = _DATE_RE.search(row_text)
                 if match:
                     due_text = match.group(0)
 
             submitted_count, participant_count = None, None
+            list_status = None
             if status_col_idx != -1 and len(cells) > status_col_idx:
                 status_text = extract_text(cells[status_col_idx])
-                s_match = re.search(r"(\d+)\s*(?:個)?已繳", status_text)
-                u_match = re.search(r"(\d+)\s*(?:個)?未繳", status_text)
+                s_match = _SUBMITTED_COUNT_RE.search(status_text)
+                u_match = _UNSUBMITTED_COUNT_RE.search(status_text)
                 submitted = int(s_match.group(1)) if s_match else 0
                 unsubmitted = int(u_match.group(1)) if u_match else 0
                 
                 if s_match or u_match:
                     submitted_count = submitted
                     participant_count = submitted + unsubmitted
+                else:
+                    # A per-student status (not class-wide counts) lets callers skip finished work early.
+                    list_status = status_text or None
 
-            links.append((title, url, due_text, submitted_count, participant_count))
+            links.append((title, url, due_text, submitted_count, participant_count, list_status))
 
     if not links:
         # Fallback for when there's no table structure
-        for a_tag in soup.find_all("a", href=True):
+        for a_tag in soup.find_all("a", href=ASSIGN_LINK_RE):
             href = a_tag["href"]
-            if ASSIGN_LINK_RE.search(href):
-                url = href if href.startswith("http") else base_url.rstrip("/") + "/" + href.lstrip("/")
-                title = extract_text(a_tag)
-                if _is_placeholder_title(title):
-                    alt_title = a_tag.get("data-activityname") or a_tag.get("aria-label") or a_tag.get("title")
-                    if alt_title:
-                        title = extract_text(BeautifulSoup(str(alt_title), "html.parser"))
-                if _is_placeholder_title(title):
-                    tr_parent = a_tag.find_parent("tr")
-                    if tr_parent:
-                        tds = tr_parent.find_all(["td", "th"])
-                        if tds:
-                            guessed = extract_text(tds[0])
-                            if guessed:
-                                title = guessed
-                links.append((title, url, None, None, None))
-
-    uniq = []
-    seen: Set[str] = set()
-    for title, url, due_text, s_count, p_count in links:
-        if url not in seen:
-            uniq.append((title, url, due_text, s_count, p_count))
-            seen.add(url)
-    return uniq
+            url = href if href.startswith("http") else base_url.rstrip("/") + "/" + href.lstrip("/")
+            title = extract_text(a_tag)
+            if _is_placeholder_title(title):
+                alt_title = a_tag.get("data-activityname") or a_tag.get("aria-label") or a_tag.get("title")
+                if alt_title:
+                    title = fragment_text(str(alt_title))
+            if _is_placeholder_title(title):
+                tr_parent = a_tag.find_parent("tr")
+                if tr_parent:
+                    tds = tr_parent.find_all(["td", "th"])
+                    if tds:
+                        guessed = extract_text(tds[0])
+                        if guessed:
+                            title = guessed
+            links.append((title, url, None, None, None, None))
+
+    # Dicts keep insertion order, so the first row seen for each URL wins.
+    by_url: Dict[str, Tuple[str, str, Optional[str], Optional[int], Optional[int], Optional[str]]] = {}
+    for link in links:
+        by_url.setdefault(link[1], link)
+    return list(by_url.values())
@@ -1,3 +1,4 @@
+import hashlib
 import json
 import math
 import os
@@ -9,6 +10,7 @@ from difflib import SequenceMatcher
 from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Tuple
 
+import orjson
 from fsrs import Card as FSRSCard
 from fsrs import Rating as FSRSRating
 from fsrs import Scheduler as FSRSScheduler
@@ -22,11 +24,14 @@ from sqlalchemy import (
     Table,
     Text,
     UniqueConstraint,
+    case,
     create_engine,
     delete,
+    event,
     inspect,
     insert,
     func,
+    or_,
     select,
     text,
     update,
@@ -293,6 +298,7 @@ user_fetch_state_table = Table(
     Column("fetched_ts", Integer),
     Column("excel_data", Text),
     Column("error_count", Integer, nullable=False, default=0),
+    Column("content_hash", String(32)),
 )
 
 fetch_errors_table = Table(
@@ -363,6 +369,7 @@ feedback_table = Table(
     Column("message", Text, nullable=False),
     Column("status", String(32)),
     Column("created_at", String(64)),
+    Column("created_label", String(32)),
 )
 Index("ix_feedback_user_id", feedback_table.c.user_id)
 Index("ix_feedback_status", feedback_table.c.status)
@@ -553,6 +560,37 @@ study_recall_card_reviews_table = Table(
 Index("ix_study_recall_card_reviews_session", study_recall_card_reviews_table.c.session_id)
 Index("ix_study_recall_card_reviews_next_review", study_recall_card_reviews_table.c.next_review_at)
 
+
+def _configure_sqlite_connection(dbapi_connection, _connection_record) -> None:
+    # WAL lets readers proceed while a write commits, and NORMAL only syncs at checkpoints
+    # instead of on every commit; both are safe for this single-host deployment.
+    cursor = dbapi_connection.cursor()
+    try:
+        cursor.execute("PRAGMA journal_mode=WAL")
+        cursor.execute("PRAGMA synchronous=NORMAL")
+        cursor.execute("PRAGMA temp_store=MEMORY")
+        cursor.execute("PRAGMA mmap_size=134217728")
+        cursor.execute("PRAGMA busy_timeout=5000")
+    finally:
+        cursor.close()
+
+
+def _feedback_created_label_backfill():
+    # Typed String operands make "+" render as || on SQLite/PostgreSQL and as concat() on MySQL,
+    # where || is a logical OR by default.
+    created_at = feedback_table.c.created_at
+    label = (
+        func.substr(created_at, 1, 10, type_=String)
+        + " "
+        + func.substr(created_at, 12, 5, type_=String)
+    )
+    return (
+        update(feedback_table)
+        .where(feedback_table.c.created_label.is_(None), created_at.like("____-__-__T__:__%"))
+        .values(created_label=label)
+    )
+
+
 class PersistentStorage:
     """Database-backed persistence with normalized storage."""
 
@@ -565,6 +603,8 @@ class PersistentStorage:
             future=True,
             pool_pre_ping=True,
         )
+        if self._engine.dialect.name == "sqlite" and self._engine.url.database not in (None, "", ":memory:"):
+            event.listen(self._engine, "connect", _configure_sqlite_connection)
         self._lock = threading.Lock()
         self._recall_search_cache_lock = threading.Lock()
         self._recall_search_cache_signature: tuple[tuple[int, str], ...] = ()
@@ -653,6 +693,18 @@ class PersistentStorage:
                 with self._lock, self._engine.begin() as conn:
                     for column_name, column_type in missing_study_video_columns:
                         conn.execute(text(f"ALTER TABLE study_plan_videos ADD COLUMN {column_name} {column_type}"))
+        if inspector.has_table("user_fetch_state"):
+            fetch_state_columns = {col["name"] for col in inspector.get_columns("user_fetch_state")}
+            if "content_hash" not in fetch_state_columns:
+                with self._lock, self._engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE user_fetch_state ADD COLUMN content_hash VARCHAR(32)"))
+        if inspector.has_table("feedback"):
+            feedback_columns = {col["name"] for col in inspector.get_columns("feedback")}
+            if "created_label" not in feedback_columns:
+                with self._lock, self._engine.begin() as conn:
+                    conn.execute(text("ALTER TABLE feedback ADD COLUMN created_label VARCHAR(32)"))
+                    # created_at has always been written as a Taipei-local ISO timestamp.
+                    conn.execute(_feedback_created_label_backfill())
         if not inspector.has_table("assignments"):
             return
         existing_columns = {col["name"] for col in inspector.get_columns("assignments")}
@@ -845,19 +897,22 @@ class PersistentStorage:
         if not username:
             return {}
         with self._lock, self._engine.connect() as conn:
-            row = conn.execute(
-                select(
-                    user_preferences_table.c.view_mode,
-                    user_preferences_table.c.status_filter,
-                    user_preferences_table.c.include_ignored_overdue,
-                    user_preferences_table.c.show_overdue,
-                    user_preferences_table.c.show_completed,
-                    user_preferences_table.c.show_graded,
-                    user_preferences_table.c.ignored_overdue_uids,
-                )
-                .select_from(user_preferences_table.join(users_table, user_preferences_table.c.user_id == users_table.c.id))
-                .where(users_table.c.username == username)
-            ).fetchone()
+            return self._read_user_preferences(conn, username)
+
+    def _read_user_preferences(self, conn, username: str) -> Dict[str, Any]:
+        row = conn.execute(
+            select(
+                user_preferences_table.c.view_mode,
+                user_preferences_table.c.status_filter,
+                user_preferences_table.c.include_ignored_overdue,
+                user_preferences_table.c.show_overdue,
+                user_preferences_table.c.show_completed,
+                user_preferences_table.c.show_graded,
+                user_preferences_table.c.ignored_overdue_uids,
+            )
+            .select_from(user_preferences_table.join(users_table, user_preferences_table.c.user_id == users_table.c.id))
+            .where(users_table.c.username == username)
+        ).fetchone()
         if not row:
             return {}
         ignored_overdue_uids: List[str] = []
@@ -2635,8 +2690,23 @@ class PersistentStorage:
         except (TypeError, ValueError):
             fetched_ts = int(datetime.utcnow().timestamp())
         fetched_at = datetime.utcfromtimestamp(fetched_ts).isoformat()
+        content_hash = self._fetch_content_hash(courses, errors)
         with self._lock, self._engine.begin() as conn:
             user_id = self._ensure_user(conn, username)
+            if content_hash is not None:
+                # An unchanged crawl only moves the fetch time forward (and attaches a new export
+                # if one came along) instead of rewriting every course and assignment row.
+                touched_values: Dict[str, Any] = {"fetched_at": fetched_at, "fetched_ts": fetched_ts}
+                if excel_data is not None:
+                    touched_values["excel_data"] = excel_data
+                touched = conn.execute(
+                    update(user_fetch_state_table)
+                    .where(user_fetch_state_table.c.user_id == user_id)
+                    .where(user_fetch_state_table.c.content_hash == content_hash)
+                    .values(**touched_values)
+                )
+                if touched.rowcount:
+                    return
             conn.execute(delete(user_fetch_state_table).where(user_fetch_state_table.c.user_id == user_id))
             conn.execute(
                 insert(user_fetch_state_table).values(
@@ -2645,6 +2715,7 @@ class PersistentStorage:
                     fetched_ts=fetched_ts,
                     excel_data=excel_data,
                     error_count=len(errors),
+                    content_hash=content_hash,
                 )
             )
             conn.execute(delete(fetch_errors_table).where(fetch_errors_table.c.user_id == user_id))
@@ -2742,6 +2813,35 @@ class PersistentStorage:
             if error_rows:
                 conn.execute(insert(fetch_errors_table), error_rows)
 
+    @staticmethod
+    def _fetch_content_hash(courses: List[Any], errors: List[Any]) -> Optional[str]:
+        try:
+            encoded = orjson.dumps(
+                {"courses": courses, "errors": errors},
+                option=orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS,
+            )
+        except TypeError:
+            return None
+        return hashlib.blake2b(encoded, digest_size=16).hexdigest()
+
+    def save_user_excel_data(self, username: str, excel_data: str, *, fetched_ts: int) -> bool:
+        """Attach an export to the cached fetch taken at ``fetched_ts``; a newer fetch is left untouched."""
+        if not username or not excel_data:
+            return False
+        with self._lock, self._engine.begin() as conn:
+            user_row = conn.execute(
+                select(users_table.c.id).where(users_table.c.username == username)
+            ).fetchone()
+            if not user_row:
+                return False
+            result = conn.execute(
+                update(user_fetch_state_table)
+                .where(user_fetch_state_table.c.user_id == user_row.id)
+                .where(user_fetch_state_table.c.fetched_ts == int(fetched_ts))
+                .values(excel_data=excel_data)
+            )
+        return bool(result.rowcount)
+
     def mark_assignment_views(
         self,
         username: str,
@@ -2813,119 +2913,142 @@ class PersistentStorage:
         return {str(row.assignment_uid): int(row.first_seen_ts) for row in rows}
 
     def load_user_cache(self, username: str) -> Optional[Dict[str, Any]]:
+        cache, prefs = self.load_user_cache_and_preferences(username)
+        if cache is not None and prefs:
+            cache["preferences"] = prefs
+        return cache
+
+    def load_user_cache_and_preferences(self, username: str) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any]]:
+        """Read the cached fetch result and the stored preferences on one connection."""
         if not username:
-            return None
+            return None, {}
         with self._lock, self._engine.connect() as conn:
-            user_row = conn.execute(
-                select(users_table.c.id).where(users_table.c.username == username)
-            ).fetchone()
-            if not user_row:
-                return None
-            state_row = conn.execute(
-                select(
-                    user_fetch_state_table.c.fetched_ts,
-                    user_fetch_state_table.c.excel_data,
-                )
-                .where(user_fetch_state_table.c.user_id == user_row.id)
-                .limit(1)
-            ).fetchone()
-            if not state_row:
-                return None
+            return self._read_user_cache(conn, username), self._read_user_preferences(conn, username)
 
-            course_rows = conn.execute(
-                select(
-                    courses_table.c.id,
-                    courses_table.c.course_code,
-                    courses_table.c.title,
-                    courses_table.c.url,
-                )
-                .where(courses_table.c.user_id == user_row.id)
-            ).fetchall()
+    def load_user_bundle(
+        self, username: str
+    ) -> Tuple[Optional[Dict[str, Any]], Dict[str, Any], Optional[Dict[str, Any]]]:
+        """Read the cached fetch result, preferences and Google tokens on one connection."""
+        if not username:
+            return None, {}, None
+        with self._lock, self._engine.connect() as conn:
+            return (
+                self._read_user_cache(conn, username),
+                self._read_user_preferences(conn, username),
+                self._read_google_tokens(conn, username),
+            )
 
-            courses: List[Dict[str, Any]] = []
-            course_map: Dict[int, Dict[str, Any]] = {}
-            for row in course_rows:
-                entry = {
-                    "id": row.course_code,
-                    "title": row.title,
-                    "url": row.url,
-                    "assignments": [],
-                    "detected_assign_links": 0,
-                }
-                courses.append(entry)
-                course_map[int(row.id)] = entry
+    def _read_user_cache(self, conn, username: str) -> Optional[Dict[str, Any]]:
+        user_row = conn.execute(
+            select(users_table.c.id).where(users_table.c.username == username)
+        ).fetchone()
+        if not user_row:
+            return None
+        state_row = conn.execute(
+            select(
+                user_fetch_state_table.c.fetched_ts,
+                user_fetch_state_table.c.excel_data,
+            )
+            .where(user_fetch_state_table.c.user_id == user_row.id)
+            .limit(1)
+        ).fetchone()
+        if not state_row:
+            return None
 
-            course_ids = [row.id for row in course_rows]
-            all_assignments: List[Dict[str, Any]] = []
-            if course_ids:
-                assignment_rows = conn.execute(
-                    select(
-                        assignments_table.c.course_id,
-                        assignments_table.c.title,
-                        assignments_table.c.url,
-                        assignments_table.c.due_at,
-                        assignments_table.c.due_ts,
-                        assignments_table.c.overdue,
-                        assignments_table.c.completed,
-                        assignments_table.c.raw_status_text,
-                        assignments_table.c.grade_text,
-                        assignments_table.c.submitted_at,
-                        assignments_table.c.submitted_ts,
-                        assignments_table.c.remaining_text,
-                        assignments_table.c.submitted_count,
-                        assignments_table.c.participant_count,
-                    )
-                    .where(assignments_table.c.course_id.in_(course_ids))
-                ).fetchall()
-                for row in assignment_rows:
-                    course_entry = course_map.get(int(row.course_id))
-                    if not course_entry:
-                        continue
-                    course_title = course_entry["title"]
-                    item = {
-                        "course_id": course_entry["id"],
-                        "course_title": course_title,
-                        "title": row.title,
-                        "url": row.url,
-                        "due_at": row.due_at,
-                        "due_ts": row.due_ts,
-                        "overdue": bool(row.overdue),
-                        "completed": bool(row.completed),
-                        "raw_status_text": row.raw_status_text,
-                        "grade_text": row.grade_text,
-                        "submitted_at": row.submitted_at,
-                        "submitted_ts": row.submitted_ts,
-                        "remaining_text": row.remaining_text,
-                        "submitted_count": row.submitted_count,
-                        "participant_count": row.participant_count,
-                    }
-                    course_entry["assignments"].append(item)
-                    course_entry["detected_assign_links"] += 1
-                    all_assignments.append(item)
+        course_rows = conn.execute(
+            select(
+                courses_table.c.id,
+                courses_table.c.course_code,
+                courses_table.c.title,
+                courses_table.c.url,
+            )
+            .where(courses_table.c.user_id == user_row.id)
+        ).fetchall()
 
-            for course_entry in courses:
-                course_entry["assignments"].sort(key=self._course_sort_key)
-            all_assignments.sort(key=self._global_sort_key)
+        courses: List[Dict[str, Any]] = []
+        course_map: Dict[int, Dict[str, Any]] = {}
+        for row in course_rows:
+            entry = {
+                "id": row.course_code,
+                "title": row.title,
+                "url": row.url,
+                "assignments": [],
+                "detected_assign_links": 0,
+            }
+            courses.append(entry)
+            course_map[int(row.id)] = entry
 
-            error_rows = conn.execute(
+        course_ids = [row.id for row in course_rows]
+        all_assignments: List[Dict[str, Any]] = []
+        if course_ids:
+            assignment_rows = conn.execute(
                 select(
-                    fetch_errors_table.c.course_code,
-                    fetch_errors_table.c.course_title,
-                    fetch_errors_table.c.assignment_title,
-                    fetch_errors_table.c.message,
-                ).where(fetch_errors_table.c.user_id == user_row.id)
+                    assignments_table.c.course_id,
+                    assignments_table.c.title,
+                    assignments_table.c.url,
+                    assignments_table.c.due_at,
+                    assignments_table.c.due_ts,
+                    assignments_table.c.overdue,
+                    assignments_table.c.completed,
+                    assignments_table.c.raw_status_text,
+                    assignments_table.c.grade_text,
+                    assignments_table.c.submitted_at,
+                    assignments_table.c.submitted_ts,
+                    assignments_table.c.remaining_text,
+                    assignments_table.c.submitted_count,
+                    assignments_table.c.participant_count,
+                )
+                .where(assignments_table.c.course_id.in_(course_ids))
             ).fetchall()
-            errors = [
-                {
-                    "course_id": row.course_code,
-                    "course_title": row.course_title,
-                    "assignment_title": row.assignment_title,
-                    "message": row.message,
+            for row in assignment_rows:
+                course_entry = course_map.get(int(row.course_id))
+                if not course_entry:
+                    continue
+                course_title = course_entry["title"]
+                item = {
+                    "course_id": course_entry["id"],
+                    "course_title": course_title,
+                    "title": row.title,
+                    "url": row.url,
+                    "due_at": row.due_at,
+                    "due_ts": row.due_ts,
+                    "overdue": bool(row.overdue),
+                    "completed": bool(row.completed),
+                    "raw_status_text": row.raw_status_text,
+                    "grade_text": row.grade_text,
+                    "submitted_at": row.submitted_at,
+                    "submitted_ts": row.submitted_ts,
+                    "remaining_text": row.remaining_text,
+                    "submitted_count": row.submitted_count,
+                    "participant_count": row.participant_count,
                 }
-                for row in error_rows
-            ]
+                course_entry["assignments"].append(item)
+                course_entry["detected_assign_links"] += 1
+                all_assignments.append(item)
+
+        for course_entry in courses:
+            course_entry["assignments"].sort(key=self._course_sort_key)
+        all_assignments.sort(key=self._global_sort_key)
 
-        cache: Dict[str, Any] = {
+        error_rows = conn.execute(
+            select(
+                fetch_errors_table.c.course_code,
+                fetch_errors_table.c.course_title,
+                fetch_errors_table.c.assignment_title,
+                fetch_errors_table.c.message,
+            ).where(fetch_errors_table.c.user_id == user_row.id)
+        ).fetchall()
+        errors = [
+            {
+                "course_id": row.course_code,
+                "course_title": row.course_title,
+                "assignment_title": row.assignment_title,
+                "message": row.message,
+            }
+            for row in error_rows
+        ]
+
+        return {
             "result": {
                 "courses": courses,
                 "all_assignments": all_assignments,
@@ -2934,10 +3057,6 @@ class PersistentStorage:
             "excel_data": state_row.excel_data,
             "ts": state_row.fetched_ts,
         }
-        prefs = self.load_user_preferences(username)
-        if prefs:
-            cache["preferences"] = prefs
-        return cache
 
     def list_cached_users(self, limit: int = 500) -> List[Dict[str, Any]]:
         with self._lock, self._engine.connect() as conn:
@@ -3229,17 +3348,20 @@ class PersistentStorage:
         if not username:
             return None
         with self._lock, self._engine.connect() as conn:
-            row = conn.execute(
-                select(
-                    google_tokens_table.c.access_token,
-                    google_tokens_table.c.refresh_token,
-                    google_tokens_table.c.scope,
-                    google_tokens_table.c.token_type,
-                    google_tokens_table.c.expires_at,
-                )
-                .select_from(google_tokens_table.join(users_table, google_tokens_table.c.user_id == users_table.c.id))
-                .where(users_table.c.username == username)
-            ).fetchone()
+            return self._read_google_tokens(conn, username)
+
+    def _read_google_tokens(self, conn, username: str) -> Optional[Dict[str, Any]]:
+        row = conn.execute(
+            select(
+                google_tokens_table.c.access_token,
+                google_tokens_table.c.refresh_token,
+                google_tokens_table.c.scope,
+                google_tokens_table.c.token_type,
+                google_tokens_table.c.expires_at,
+            )
+            .select_from(google_tokens_table.join(users_table, google_tokens_table.c.user_id == users_table.c.id))
+            .where(users_table.c.username == username)
+        ).fetchone()
         if not row:
             return None
         return {
@@ -3437,12 +3559,12 @@ class PersistentStorage:
         if not row:
             return None
         try:
-            return json.loads(row[0])
+            return orjson.loads(row[0])
         except Exception:
             return None
 
     def save_traffic_state(self, payload: Dict[str, Any]) -> None:
-        data = json.dumps(payload, ensure_ascii=False)
+        data = orjson.dumps(payload, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
         now = self._now_iso()
         with self._lock, self._engine.begin() as conn:
             result = conn.execute(
@@ -3454,30 +3576,38 @@ class PersistentStorage:
                 conn.execute(traffic_state_table.insert().values(id=1, payload=data, updated_at=now))
 
     def append_traffic_event(self, event: Dict[str, Any], max_events: int) -> None:
-        record = dict(event)
-        meta = record.get("meta") or {}
-        meta_json = json.dumps(meta, ensure_ascii=False)
-        username = meta.get("username") if isinstance(meta, dict) else None
-        is_guest = meta.get("is_guest") if isinstance(meta, dict) else None
-        is_admin = meta.get("is_admin") if isinstance(meta, dict) else None
-        with self._lock, self._engine.begin() as conn:
-            result = conn.execute(
-                traffic_events_table.insert().values(
-                    ts=record.get("ts"),
-                    ip=record.get("ip"),
-                    action=record.get("action"),
-                    status=record.get("status"),
-                    username=username,
-                    is_guest=self._coerce_bool_int(is_guest) if is_guest is not None else None,
-                    is_admin=self._coerce_bool_int(is_admin) if is_admin is not None else None,
-                    meta=meta_json,
-                )
+        self.append_traffic_events_many([event], max_events)
+
+    def append_traffic_events_many(self, events: List[Dict[str, Any]], max_events: int) -> None:
+        """Insert a batch of traffic events in one transaction and trim the table to ``max_events``."""
+        rows: List[Dict[str, Any]] = []
+        for event in events:
+            meta = event.get("meta") or {}
+            meta_json = orjson.dumps(meta, option=orjson.OPT_NON_STR_KEYS).decode("utf-8")
+            username = meta.get("username") if isinstance(meta, dict) else None
+            is_guest = meta.get("is_guest") if isinstance(meta, dict) else None
+            is_admin = meta.get("is_admin") if isinstance(meta, dict) else None
+            rows.append(
+                {
+                    "ts": event.get("ts"),
+                    "ip": event.get("ip"),
+                    "action": event.get("action"),
+                    "status": event.get("status"),
+                    "username": username,
+                    "is_guest": self._coerce_bool_int(is_guest) if is_guest is not None else None,
+                    "is_admin": self._coerce_bool_int(is_admin) if is_admin is not None else None,
+                    "meta": meta_json,
+                }
             )
-            event_id = result.inserted_primary_key[0] if result.inserted_primary_key else None
-            if event_id is not None:
+        if not rows:
+            return
+        with self._lock, self._engine.begin() as conn:
+            conn.execute(traffic_events_table.insert(), rows)
+            last_id = conn.execute(select(func.max(traffic_events_table.c.id))).scalar()
+            if last_id is not None:
                 conn.execute(
                     delete(traffic_events_table).where(
-                        traffic_events_table.c.id <= max(0, int(event_id) - max(1, int(max_events)))
+                        traffic_events_table.c.id <= max(0, int(last_id) - max(1, int(max_events)))
                     )
                 )
 
@@ -3498,7 +3628,7 @@ class PersistentStorage:
         for row in reversed(rows):
             meta_raw = row.meta
             try:
-                meta = json.loads(meta_raw) if meta_raw else {}
+                meta = orjson.loads(meta_raw) if meta_raw else {}
             except Exception:
                 meta = {}
             events.append(
@@ -3543,6 +3673,7 @@ class PersistentStorage:
                     message=record.get("message"),
                     status=record.get("status"),
                     created_at=record.get("created_at"),
+                    created_label=record.get("created_label"),
                 )
             )
             inserted = result.inserted_primary_key
@@ -3553,15 +3684,29 @@ class PersistentStorage:
                     return 0
             return 0
 
-    def list_feedback(self, limit: int) -> List[Dict[str, Any]]:
+    def list_feedback(self, limit: int, before_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        query = select(feedback_table)
+        if before_id is not None:
+            query = query.where(feedback_table.c.id < int(before_id))
         with self._lock, self._engine.connect() as conn:
-            rows = conn.execute(
-                select(feedback_table)
-                .order_by(feedback_table.c.id.desc())
-                .limit(limit)
-            ).fetchall()
+            rows = conn.execute(query.order_by(feedback_table.c.id.desc()).limit(limit)).fetchall()
         return [dict(row._mapping) for row in rows]
 
+    def feedback_counts(self) -> Dict[str, int]:
+        is_open = or_(
+            feedback_table.c.status.is_(None),
+            feedback_table.c.status == "",
+            feedback_table.c.status == "open",
+        )
+        with self._lock, self._engine.connect() as conn:
+            row = conn.execute(
+                select(
+                    func.count().label("total"),
+                    func.sum(case((is_open, 1), else_=0)).label("open"),
+                ).select_from(feedback_table)
+            ).fetchone()
+        return {"total": int(row.total or 0), "open": int(row.open or 0)}
+
     def update_feedback_status(self, feedback_id: int, status: str) -> bool:
         with self._lock, self._engine.begin() as conn:
             result = conn.execute(
@@ -0,0 +1,131 @@
+import threading
+import unittest
+from unittest.mock import patch
+
+from e3_tracker.services import collector
+from e3_tracker.services.collector import (
+    CollectOptions,
+    _current_term_labels,
+    collect_assignments,
+    gather_my_courses,
+)
+
+BASE_URL = "https://e3.example.edu"
+
+
+class _FakeResponse:
+    def __init__(self, text):
+        self.text = text
+
+
+def _list_page(course_id, count):
+    rows = "".join(
+        f'<tr><td><a href="{BASE_URL}/mod/assign/view.php?id={course_id}{index}">HW {course_id}-{index}</a></td></tr>'
+        for index in range(count)
+    )
+    return f"<table><tr><th>作業</th></tr>{rows}</table>"
+
+
+def _assign_page(due):
+    return (
+        "<table>"
+        "<tr><th>繳交狀態</th><td>未繳交</td></tr>"
+        f"<tr><th>截止時間</th><td>{due}</td></tr>"
+        "</table>"
+    )
+
+
+class CollectAssignmentsTests(unittest.TestCase):
+    def _options(self, course_id):
+        return CollectOptions(base_url=BASE_URL, course_id=course_id, moodle_session="cookie")
+
+    def test_assignment_pages_are_fetched_concurrently_and_kept_in_order(self):
+        threads = set()
+
+        def fake_request(sess, method, url, **kwargs):
+            threads.add(threading.current_thread().name)
+            if "courseextension" in url:
+                return _FakeResponse(_list_page(7, 3))
+            if url.endswith("71"):
+                raise ValueError("boom")
+            return _FakeResponse(_assign_page("2030-01-1%s 23:59" % url[-1]))
+
+        with patch.object(collector, "safe_request", side_effect=fake_request):
+            result = collect_assignments(self._options(7))
+
+        self.assertTrue(all(name.startswith("e3-collect") for name in threads))
+        self.assertEqual([item["title"] for item in result["courses"][0]["assignments"]], ["HW 7-0", "HW 7-2"])
+        self.assertEqual([error["assignment_title"] for error in result["errors"]], ["HW 7-1"])
+        self.assertEqual(result["courses"][0]["detected_assign_links"], 3)
+
+    def test_fallback_pages_are_merged_by_url(self):
+        def fake_request(sess, method, url, **kwargs):
+            if "courseextension" in url:
+                return _FakeResponse("<p>no table</p>")
+            if "course/view.php" in url:
+                return _FakeResponse(_list_page(7, 2))
+            if "mod/assign/index.php" in url:
+                return _FakeResponse(_list_page(7, 3))
+            return _FakeResponse(_assign_page("2030-01-10 23:59"))
+
+        with patch.object(collector, "safe_request", side_effect=fake_request):
+            result = collect_assignments(self._options(7))
+
+        self.assertEqual(result["courses"][0]["detected_assign_links"], 3)
+        self.assertEqual(
+            [item["title"] for item in result["courses"][0]["assignments"]], ["HW 7-0", "HW 7-1", "HW 7-2"]
+        )
+
+    def test_completed_list_status_skips_the_assignment_page(self):
+        list_page = (
+            "<table><tr><th>作業</th><th>繳交狀態</th></tr>"
+            f'<tr><td><a href="{BASE_URL}/mod/assign/view.php?id=1">Done</a></td><td>已繳交</td></tr>'
+            f'<tr><td><a href="{BASE_URL}/mod/assign/view.php?id=2">Open</a></td><td>未繳交</td></tr>'
+            f'<tr><td><a href="{BASE_URL}/mod/assign/view.php?id=3">Counts</a></td><td>3 已繳 2 未繳</td></tr>'
+            "</table>"
+        )
+        fetched = []
+
+        def fake_request(sess, method, url, **kwargs):
+            if "courseextension" in url:
+                return _FakeResponse(list_page)
+            fetched.append(url)
+            return _FakeResponse(_assign_page("2030-01-10 23:59"))
+
+        with patch.object(collector, "safe_request", side_effect=fake_request):
+            result = collect_assignments(self._options(7))
+
+        self.assertEqual(sorted(url[-1] for url in fetched), ["2", "3"])
+        self.assertEqual([item["title"] for item in result["courses"][0]["assignments"]], ["Open", "Counts"])
+        self.assertEqual(result["courses"][0]["detected_assign_links"], 3)
+
+    def test_expired_session_is_raised(self):
+        with patch.object(
+            collector,
+            "safe_request",
+            return_value=_FakeResponse('<a href="/login/index.php">login</a>'),
+        ):
+            with self.assertRaisesRegex(RuntimeError, "Cookie"):
+                collect_assignments(self._options(7))
+
+    def test_course_list_keeps_current_term_links(self):
+        tag = _current_term_labels()[0]
+        page = (
+            "<div><p>menu</p>"
+            f'<a href="/course/view.php?id=3"><span>{tag}</span> Algebra</a>'
+            '<a href="/course/view.php?id=4">【100上】 Old</a>'
+            '<a href="/user/profile.php">me</a></div>'
+        )
+        with patch.object(collector, "safe_request", return_value=_FakeResponse(page)):
+            courses = gather_my_courses(object(), BASE_URL)
+        self.assertEqual(courses, [{"id": 3, "title": f"{tag}Algebra", "url": f"{BASE_URL}/course/view.php?id=3"}])
+
+    def test_unquoted_course_links_fall_back_to_the_parser(self):
+        page = '<a href=/course/view.php?id=9>Data&nbsp;Structures</a>'
+        with patch.object(collector, "safe_request", return_value=_FakeResponse(page)):
+            courses = gather_my_courses(object(), BASE_URL, only_current_term=False)
+        self.assertEqual([(course["id"], course["title"]) for course in courses], [(9, "Data Structures")])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,38 @@
+import unittest
+
+from openpyxl import load_workbook
+
+from e3_tracker.shared.excel import build_excel
+
+
+class ExcelExportTests(unittest.TestCase):
+    def test_sections_links_and_widths(self):
+        assignments = [
+            {"course_title": "線性代數", "title": "HW1", "due_at": "2025-03-01 23:59", "overdue": True, "url": "https://e3/a"},
+            {"course_title": "Algorithms", "title": "=HW2", "due_at": "", "due_ts": 1_740_900_000, "url": ""},
+            {"course_title": "Done", "title": "HW3", "completed": True},
+        ]
+        ws = load_workbook(build_excel(assignments, return_bytes=True)).active
+
+        self.assertEqual(ws.title, "待繳作業")
+        self.assertEqual(ws.freeze_panes, "A2")
+        self.assertEqual([cell.value for cell in ws[1]], ["課程", "作業", "截止", "狀態"])
+        self.assertTrue(ws["A1"].font.b)
+        self.assertEqual(ws["A2"].value, "'===== 逾期未繳 =====")
+        self.assertEqual(ws.row_dimensions[2].height, 22)
+        self.assertEqual(ws["D3"].hyperlink.target, "https://e3/a")
+        self.assertEqual(ws["A5"].value, "'===== 未繳交 =====")
+        self.assertEqual(ws["B7"].value, "=HW2")
+        self.assertEqual(ws["C7"].value, "無截止")
+        self.assertIsNone(ws["D7"].hyperlink)
+        self.assertEqual(ws.max_row, 7)
+        self.assertEqual(ws.column_dimensions["A"].width, 28)
+        self.assertEqual(ws.column_dimensions["B"].width, 34)
+
+    def test_empty_export_still_has_a_body_row(self):
+        ws = load_workbook(build_excel([], return_bytes=True)).active
+        self.assertEqual(ws.max_row, 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
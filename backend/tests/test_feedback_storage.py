@@ -0,0 +1,63 @@
+import sqlite3
+import tempfile
+import unittest
+from pathlib import Path
+
+from sqlalchemy.dialects import mysql
+
+from e3_tracker.shared.storage import PersistentStorage, _feedback_created_label_backfill
+
+
+class FeedbackStorageTests(unittest.TestCase):
+    def test_legacy_feedback_rows_get_a_created_label(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            db_path = Path(temp_dir) / "feedback.sqlite3"
+            with sqlite3.connect(db_path) as conn:
+                conn.execute(
+                    "CREATE TABLE feedback ("
+                    "id INTEGER PRIMARY KEY AUTOINCREMENT, user_id INTEGER, username VARCHAR(191), "
+                    "email VARCHAR(191), message TEXT NOT NULL, status VARCHAR(32), created_at VARCHAR(64))"
+                )
+                conn.execute(
+                    "INSERT INTO feedback (message, status, created_at) VALUES (?, ?, ?)",
+                    ("hello", "open", "2024-11-19T21:05:33.123456+08:00"),
+                )
+            storage = PersistentStorage(str(db_path))
+            try:
+                storage.add_feedback(
+                    {
+                        "message": "new",
+                        "status": "open",
+                        "created_at": "2024-11-20T08:00:00+08:00",
+                        "created_label": "2024-11-20 08:00",
+                    }
+                )
+                labels = [row["created_label"] for row in storage.list_feedback(10)]
+                self.assertEqual(labels, ["2024-11-20 08:00", "2024-11-19 21:05"])
+            finally:
+                storage._engine.dispose()
+
+    def test_created_label_backfill_concatenates_on_mysql(self):
+        sql = str(_feedback_created_label_backfill().compile(dialect=mysql.dialect()))
+        self.assertIn("SET created_label=(concat(substr(feedback.created_at", sql)
+        self.assertNotIn("||", sql)
+
+    def test_feedback_pages_by_id_and_counts_open_entries(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = PersistentStorage(str(Path(temp_dir) / "feedback.sqlite3"))
+            try:
+                ids = [
+                    storage.add_feedback({"message": f"m{index}", "status": "open" if index % 2 else "resolved"})
+                    for index in range(5)
+                ]
+                first_page = storage.list_feedback(2)
+                self.assertEqual([row["id"] for row in first_page], ids[:-3:-1])
+                older_page = storage.list_feedback(2, before_id=first_page[-1]["id"])
+                self.assertEqual([row["id"] for row in older_page], [ids[2], ids[1]])
+                self.assertEqual(storage.feedback_counts(), {"total": 5, "open": 2})
+            finally:
+                storage._engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()
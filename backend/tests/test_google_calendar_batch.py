@@ -0,0 +1,76 @@
+import json
+import unittest
+from unittest.mock import patch
+
+from e3_tracker.services import google_calendar
+from e3_tracker.services.google_calendar import (
+    GOOGLE_BATCH_SIZE,
+    GOOGLE_BATCH_URL,
+    GoogleUnauthorizedError,
+    sync_assignments_to_google_calendar,
+)
+
+
+class _FakeResponse:
+    def __init__(self, statuses, status_code=200):
+        self.status_code = status_code
+        self.headers = {"Content-Type": "multipart/mixed; boundary=batch_reply"}
+        parts = [
+            "--batch_reply\r\nContent-Type: application/http\r\n\r\n"
+            f"HTTP/1.1 {status} Status\r\nContent-Type: application/json\r\n\r\n"
+            f"{json.dumps({'status': status})}\r\n"
+            for status in statuses
+        ]
+        self.text = "".join(parts) + "--batch_reply--\r\n"
+
+
+def _assignments(count):
+    return [
+        {"course_id": 1, "course_title": "C", "title": f"HW{index}", "url": f"u{index}", "due_ts": 1_700_000_000}
+        for index in range(count)
+    ]
+
+
+class GoogleCalendarBatchTests(unittest.TestCase):
+    def test_imports_are_sent_in_batches(self):
+        sent = []
+
+        def fake_post(url, headers, data, timeout):
+            body = data.decode("utf-8")
+            sent.append((url, headers["Content-Type"], body))
+            return _FakeResponse([200] * body.count("Content-Type: application/http"))
+
+        with patch.object(google_calendar._GOOGLE_SESSION, "post", side_effect=fake_post):
+            synced = sync_assignments_to_google_calendar(
+                _assignments(GOOGLE_BATCH_SIZE + 2) + [{"title": "no due date"}],
+                access_token="token",
+                calendar_id="primary",
+            )
+
+        self.assertEqual(synced, GOOGLE_BATCH_SIZE + 2)
+        self.assertEqual([url for url, _, _ in sent], [GOOGLE_BATCH_URL, GOOGLE_BATCH_URL])
+        _, content_type, body = min(sent, key=lambda item: len(item[2]))
+        boundary = content_type.split("boundary=", 1)[1]
+        self.assertTrue(body.endswith(f"--{boundary}--\r\n"))
+        self.assertIn("POST /calendar/v3/calendars/primary/events/import\r\n", body)
+        self.assertEqual(body.count("Content-Type: application/http"), 2)
+
+    def test_failed_parts_are_reported(self):
+        with patch.object(
+            google_calendar._GOOGLE_SESSION,
+            "post",
+            return_value=_FakeResponse([200, 409]),
+        ):
+            with self.assertRaisesRegex(RuntimeError, "409"):
+                sync_assignments_to_google_calendar(_assignments(2), access_token="token", calendar_id="primary")
+        with patch.object(
+            google_calendar._GOOGLE_SESSION,
+            "post",
+            return_value=_FakeResponse([200, 401]),
+        ):
+            with self.assertRaises(GoogleUnauthorizedError):
+                sync_assignments_to_google_calendar(_assignments(2), access_token="token", calendar_id="primary")
+
+
+if __name__ == "__main__":
+    unittest.main()
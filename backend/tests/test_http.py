@@ -0,0 +1,48 @@
+import threading
+import time
+import unittest
+from unittest.mock import patch
+
+from requests.adapters import HTTPAdapter
+from requests.models import Response
+
+from e3_tracker.services import http
+from e3_tracker.services.http import pooled_session
+
+
+class PooledSessionTests(unittest.TestCase):
+    def test_requests_to_one_site_share_a_concurrency_cap(self):
+        lock = threading.Lock()
+        in_flight = [0, 0]
+
+        def fake_send(adapter, request, **kwargs):
+            with lock:
+                in_flight[0] += 1
+                in_flight[1] = max(in_flight[1], in_flight[0])
+            time.sleep(0.05)
+            with lock:
+                in_flight[0] -= 1
+            response = Response()
+            response.status_code = 200
+            return response
+
+        with patch.object(http, "E3_POOL_MAXSIZE", 2), patch.object(HTTPAdapter, "send", fake_send):
+            sessions = [
+                pooled_session("https://limit.example"),
+                pooled_session("https://limit.example", insecure=True),
+            ]
+            threads = [
+                threading.Thread(target=sessions[index % 2].get, args=("https://limit.example/x",))
+                for index in range(6)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+        self.assertEqual(in_flight[1], 2)
+        self.assertIsNot(sessions[0].cookies, sessions[1].cookies)
+
+
+if __name__ == "__main__":
+    unittest.main()
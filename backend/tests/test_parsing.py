@@ -0,0 +1,82 @@
+import unittest
+
+from dateutil import parser as dtparser
+
+from e3_tracker.shared.constants import TAIPEI_TZ
+from e3_tracker.shared.parsing import (
+    _parse_due_cached,
+    fragment_text,
+    gather_assign_links_from_list_page,
+    parse_due_text_to_dt,
+)
+
+BASE_URL = "https://e3.example.edu"
+
+
+class ListPageParsingTests(unittest.TestCase):
+    def test_placeholder_titles_fall_back_to_link_attributes(self):
+        page = (
+            "<table><tr><th>作業</th><th>截止時間</th></tr>"
+            '<tr><td><a href="/mod/assign/view.php?id=1" aria-label="Lab &lt;1&gt; &amp; <b>notes</b>">檢視</a></td>'
+            "<td>2030-01-10 23:59</td></tr></table>"
+        )
+        links = gather_assign_links_from_list_page(page, BASE_URL)
+        self.assertEqual(
+            links,
+            [("Lab <1> &notes", f"{BASE_URL}/mod/assign/view.php?id=1", "2030-01-10 23:59", None, None, None)],
+        )
+
+    def test_duplicate_links_keep_the_first_row(self):
+        page = (
+            "<table>"
+            '<tr><td><a href="/mod/assign/view.php?id=1">A</a></td></tr>'
+            '<tr><td><a href="/mod/assign/view.php?id=2">B</a></td></tr>'
+            '<tr><td><a href="/mod/assign/view.php?id=1">A again</a></td></tr>'
+            "</table>"
+        )
+        links = gather_assign_links_from_list_page(page, BASE_URL)
+        self.assertEqual([(title, url[-1]) for title, url, *_ in links], [("A", "1"), ("B", "2")])
+
+    def test_fragment_text_matches_parsed_text(self):
+        self.assertEqual(fragment_text("  <b>HW</b> 2 <!-- note -->"), "HW2")
+        self.assertEqual(fragment_text("x < y > z"), "x < y > z")
+        self.assertEqual(fragment_text("Data&nbsp;Structures"), "Data Structures")
+
+
+class DueTextParsingTests(unittest.TestCase):
+    def test_repeated_due_strings_hit_the_cache(self):
+        _parse_due_cached.cache_clear()
+        first = parse_due_text_to_dt("2030-01-10 23:59")
+        second = parse_due_text_to_dt("2030-01-10 23:59")
+        self.assertEqual(first.tzinfo, TAIPEI_TZ)
+        self.assertEqual((first.year, first.month, first.day, first.hour, first.minute), (2030, 1, 10, 23, 59))
+        self.assertIs(first, second)
+        self.assertEqual(_parse_due_cached.cache_info().hits, 1)
+
+    def test_due_text_matches_dateutil(self):
+        for text in (
+            "2030-01-10 23:59",
+            "2030/1/5 8:05:07",
+            "2030-01-10",
+            "2030-01-10T10:00:00",
+            " 2030/12/31 00:00 ",
+            "2030年1月5日 12:00",
+            "截止 2030-01-05 12:00 前",
+        ):
+            with self.subTest(text=text):
+                expected = dtparser.parse(text, dayfirst=False, fuzzy=True).replace(tzinfo=TAIPEI_TZ)
+                self.assertEqual(parse_due_text_to_dt(text), expected)
+        expected = dtparser.parse("2030/01/10 08:00+00:00", dayfirst=False, fuzzy=True).astimezone(TAIPEI_TZ)
+        self.assertEqual(parse_due_text_to_dt("2030/01/10 08:00+00:00"), expected)
+        self.assertEqual(expected.hour, 16)
+
+    def test_unparseable_due_text_is_none(self):
+        self.assertIsNone(parse_due_text_to_dt(""))
+        self.assertIsNone(parse_due_text_to_dt(None))
+        for placeholder in (" ", "n/a", "-", "TBD", "無", "未設定"):
+            self.assertIsNone(parse_due_text_to_dt(placeholder))
+        self.assertIsNone(parse_due_text_to_dt("2030-13-45"))
+
+
+if __name__ == "__main__":
+    unittest.main()
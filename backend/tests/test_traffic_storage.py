@@ -20,6 +20,23 @@ class TrafficStorageTests(unittest.TestCase):
             finally:
                 storage._engine.dispose()
 
+    def test_traffic_event_batch_is_trimmed_to_the_limit(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = PersistentStorage(str(Path(temp_dir) / "traffic.sqlite3"))
+            try:
+                storage.append_traffic_events_many(
+                    [
+                        {"ts": float(index), "ip": "127.0.0.1", "action": f"event-{index}", "meta": {"username": "alice"}}
+                        for index in range(5)
+                    ],
+                    max_events=3,
+                )
+                events = storage.recent_traffic_events(10)
+                self.assertEqual([event["action"] for event in events], ["event-2", "event-3", "event-4"])
+                self.assertEqual(events[-1]["meta"], {"username": "alice"})
+            finally:
+                storage._engine.dispose()
+
     def test_traffic_state_can_be_saved_twice(self):
         with tempfile.TemporaryDirectory() as temp_dir:
             storage = PersistentStorage(str(Path(temp_dir) / "traffic.sqlite3"))
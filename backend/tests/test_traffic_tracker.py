@@ -0,0 +1,228 @@
+import json
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest.mock import patch
+
+from e3_tracker.api.web import TrafficTracker
+
+
+class TrafficTrackerTests(unittest.TestCase):
+    def test_concurrent_visits_are_persisted_by_one_flush(self):
+        saved = []
+        tracker = TrafficTracker(state_saver=saved.append, flush_interval=60)
+
+        def visit(index: int) -> None:
+            for step in range(20):
+                tracker.record_visit(
+                    f"10.0.{index}.{step}",
+                    action="login_success",
+                    metadata={"username": f"user-{index}"},
+                )
+
+        threads = [threading.Thread(target=visit, args=(index,)) for index in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(saved, [])
+        tracker.flush()
+        tracker.flush()
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(saved[-1]["version"], tracker.version())
+        self.assertEqual(saved[-1]["total"], 80)
+        self.assertEqual(tracker.snapshot()["total_users"], 4)
+
+    def test_reset_is_written_immediately(self):
+        saved = []
+        tracker = TrafficTracker(state_saver=saved.append, flush_interval=60)
+        tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": "alice"})
+        tracker.reset()
+        self.assertEqual(len(saved), 1)
+        self.assertEqual(saved[0]["total"], 0)
+        self.assertEqual(saved[0]["user_totals"], {})
+
+    def test_event_log_is_appended_through_one_handle(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            log_path = Path(temp_dir) / "traffic.log"
+            tracker = TrafficTracker(log_path=log_path, flush_interval=60)
+            try:
+                tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": "alice"})
+                tracker.record_visit("10.0.0.1", action="heartbeat", metadata={"username": "alice"})
+                tracker.record_visit("10.0.0.2", action="logout", metadata={"username": "bob"})
+                tracker.flush()
+                lines = log_path.read_text(encoding="utf-8").splitlines()
+                self.assertEqual([json.loads(line)["action"] for line in lines], ["login_success", "logout"])
+
+                reloaded = TrafficTracker(log_path=log_path, max_events=1, flush_interval=60)
+                self.assertEqual([event["action"] for event in reloaded.recent_events()], ["logout"])
+                reloaded.close()
+
+                tracker.reset()
+                tracker.flush()
+                self.assertEqual(log_path.read_text(encoding="utf-8"), "")
+            finally:
+                tracker.close()
+
+    def test_events_are_written_in_batches_on_flush(self):
+        batches = []
+        tracker = TrafficTracker(max_events=2, event_batch_writer=batches.append, flush_interval=60)
+        for index in range(3):
+            tracker.record_visit("10.0.0.1", action=f"event-{index}")
+        self.assertEqual(batches, [])
+        tracker.flush()
+        self.assertEqual([[event["action"] for event in batch] for batch in batches], [["event-1", "event-2"]])
+
+        tracker.record_visit("10.0.0.1", action="dropped")
+        tracker.reset()
+        tracker.flush()
+        self.assertEqual(len(batches), 1)
+
+    def test_hourly_series_counts_distinct_users_per_bucket(self):
+        tracker = TrafficTracker()
+        for username in ("alice", "bob", "alice"):
+            tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": username})
+        tracker.record_visit("10.0.0.2", action="heartbeat", metadata={"username": "carol"})
+        series = tracker.hourly_series()
+        self.assertEqual(len(series), 1)
+        self.assertEqual(series[0]["count"], 2)
+
+        tracker.remove_user_stats("bob")
+        self.assertEqual(tracker.hourly_series()[0]["count"], 1)
+        self.assertEqual(list(tracker.hourly_buckets().values()), [{"alice"}])
+
+    def test_breakdown_entries_are_copies_of_the_cached_view(self):
+        tracker = TrafficTracker()
+        tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": "alice"})
+        tracker.user_breakdown()[0]["count"] = 99
+        tracker.ip_breakdown()[0]["username"] = "mallory"
+        self.assertEqual(tracker.user_breakdown()[0]["count"], 1)
+        self.assertEqual(tracker.ip_breakdown()[0]["username"], "alice")
+
+    def test_idle_users_expire_from_online_counts(self):
+        tracker = TrafficTracker(activity_window=60)
+        with patch("e3_tracker.api.web.time.time", return_value=1000.0):
+            tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": "alice"})
+        with patch("e3_tracker.api.web.time.time", return_value=1030.0):
+            tracker.record_visit("10.0.0.2", action="login_success", metadata={"username": "bob"})
+            self.assertEqual(tracker.snapshot()["online"], 2)
+        with patch("e3_tracker.api.web.time.time", return_value=1070.0):
+            self.assertEqual(tracker.snapshot()["online"], 1)
+            self.assertEqual(tracker.ip_summary()["online"], 1)
+        with patch("e3_tracker.api.web.time.time", return_value=1100.0):
+            self.assertEqual(tracker.snapshot()["online"], 0)
+
+    def test_total_users_excludes_guests_and_removed_users(self):
+        tracker = TrafficTracker()
+        tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": "alice"})
+        tracker.record_visit("10.0.0.2", action="guest_login", metadata={"username": "訪客1", "is_guest": True})
+        tracker.record_visit("10.0.0.3", action="login_success", metadata={"username": "bob"})
+        self.assertEqual(tracker.snapshot()["total_users"], 2)
+
+        tracker.remove_user_stats("bob")
+        self.assertEqual(tracker.snapshot()["total_users"], 1)
+        self.assertEqual(
+            {entry["ip"]: entry["username"] for entry in tracker.ip_breakdown()},
+            {"10.0.0.1": "alice", "10.0.0.2": "訪客1", "10.0.0.3": None},
+        )
+
+        restored = TrafficTracker(state_loader=lambda: tracker._state_payload(), flush_interval=60)
+        self.assertEqual(restored.snapshot()["total_users"], 1)
+
+    def test_guest_summary_tracks_flag_changes(self):
+        tracker = TrafficTracker()
+        tracker.record_visit("10.0.0.1", action="guest_login", metadata={"username": "訪客_a", "is_guest": True})
+        tracker.record_visit("10.0.0.2", action="guest_login", metadata={"username": "訪客_b", "is_guest": True})
+        tracker.record_visit("10.0.0.3", action="login_success", metadata={"username": "alice"})
+        self.assertEqual(tracker.guest_summary(), {"total": 2, "online": 2})
+
+        tracker.remove_user_stats("訪客_b")
+        self.assertEqual(tracker.guest_summary(), {"total": 1, "online": 1})
+        restored = TrafficTracker(state_loader=lambda: tracker._state_payload())
+        self.assertEqual(restored.guest_summary()["total"], 1)
+
+    def test_daily_users_roll_off_after_a_day(self):
+        tracker = TrafficTracker()
+        with patch("e3_tracker.api.web.time.time", return_value=100_000.0):
+            tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": "alice"})
+        with patch("e3_tracker.api.web.time.time", return_value=150_000.0):
+            tracker.record_visit("10.0.0.2", action="login_success", metadata={"username": "bob"})
+            tracker.record_visit("10.0.0.2", action="heartbeat", metadata={"username": "carol"})
+            self.assertEqual(tracker.snapshot()["daily_users"], 2)
+        with patch("e3_tracker.api.web.time.time", return_value=190_000.0):
+            self.assertEqual(tracker.snapshot()["daily_users"], 1)
+
+    def test_recent_events_keep_only_the_newest_entries(self):
+        tracker = TrafficTracker(max_events=3)
+        for index in range(5):
+            tracker.record_visit("10.0.0.1", action=f"event-{index}")
+        self.assertEqual(
+            [event["action"] for event in tracker.recent_events(2)],
+            ["event-3", "event-4"],
+        )
+        self.assertEqual(len(tracker.recent_events(10)), 3)
+
+    def test_actions_are_stored_lower_case_and_passive_ones_skipped(self):
+        tracker = TrafficTracker()
+        tracker.record_visit("10.0.0.1", action="Login_Success")
+        tracker.record_visit("10.0.0.1", action="HEARTBEAT")
+        self.assertEqual([event["action"] for event in tracker.recent_events()], ["login_success"])
+
+    def test_closed_days_persist_hour_masks_instead_of_hourly_lists(self):
+        day = 1_700_000_000 - 1_700_000_000 % 86400 - 8 * 3600
+        state = {
+            "hourly_series": [{"ts": day, "count": 2}, {"ts": day + 3600, "count": 2}, {"ts": day + 7200, "count": 4}],
+            "hourly_buckets": {str(day): ["alice", "bob"], str(day + 3600): ["bob", "carol"]},
+        }
+        tracker = TrafficTracker(state_loader=lambda: state)
+        self.assertEqual(tracker.daily_series(), [{"ts": day, "count": 3}])
+
+        payload = tracker._state_payload()
+        self.assertEqual(payload["hourly_buckets"], {})
+        self.assertEqual(payload["daily_members"], {day: {"alice": 0b01, "bob": 0b11, "carol": 0b10}})
+        self.assertEqual(len(payload["hourly_series"]), 3)
+
+        restored = TrafficTracker(state_loader=lambda: payload)
+        self.assertEqual(restored.daily_series(), [{"ts": day, "count": 3}])
+        self.assertEqual(
+            restored.hourly_buckets(),
+            {day: {"alice", "bob"}, day + 3600: {"bob", "carol"}, day + 7200: set()},
+        )
+
+    def test_removing_a_user_updates_closed_days(self):
+        day = 1_700_000_000 - 1_700_000_000 % 86400 - 8 * 3600
+        state = {
+            "hourly_series": [{"ts": day, "count": 2}, {"ts": day + 3600, "count": 2}],
+            "hourly_buckets": {str(day): ["alice", "bob"], str(day + 3600): ["bob", "carol"]},
+        }
+        tracker = TrafficTracker(state_loader=lambda: state)
+        self.assertTrue(tracker.remove_user_stats("bob"))
+        self.assertEqual([item["count"] for item in tracker.hourly_series()], [1, 1])
+        self.assertEqual(tracker.daily_series(), [{"ts": day, "count": 2}])
+        self.assertEqual(tracker._state_payload()["daily_members"], {day: {"alice": 0b01, "carol": 0b10}})
+
+    def test_legacy_state_without_flags_classifies_guests_by_name(self):
+        state = {
+            "user_totals": {"alice": 3, "訪客_abc": 1},
+            "user_last_seen": {"alice": 10.0, "訪客_abc": 10.0},
+        }
+        tracker = TrafficTracker(state_loader=lambda: state)
+        self.assertEqual(tracker.snapshot()["total_users"], 1)
+        self.assertEqual([entry["username"] for entry in tracker.user_breakdown()], ["alice"])
+
+    def test_state_file_round_trips(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage_path = Path(temp_dir) / "traffic.json"
+            tracker = TrafficTracker(storage_path=storage_path, flush_interval=60)
+            tracker.record_visit("10.0.0.1", action="login_success", metadata={"username": "alice"})
+            tracker.flush()
+
+            restored = TrafficTracker(storage_path=storage_path, flush_interval=60)
+            self.assertEqual(restored.snapshot()["total"], 1)
+            self.assertEqual(restored.version(), tracker.version())
+
+
+if __name__ == "__main__":
+    unittest.main()
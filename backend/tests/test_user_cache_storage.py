@@ -0,0 +1,87 @@
+import tempfile
+import unittest
+from pathlib import Path
+
+from e3_tracker.shared.storage import PersistentStorage
+
+
+class UserCacheStorageTests(unittest.TestCase):
+    def test_cache_and_preferences_are_loaded_together(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = PersistentStorage(str(Path(temp_dir) / "cache.sqlite3"))
+            try:
+                self.assertEqual(storage.load_user_cache_and_preferences("alice"), (None, {}))
+
+                storage.save_user_preferences("alice", {"view_mode": "due", "show_completed": True})
+                cache, prefs = storage.load_user_cache_and_preferences("alice")
+                self.assertIsNone(cache)
+                self.assertEqual(prefs["view_mode"], "due")
+
+                storage.save_user_cache(
+                    "alice",
+                    {
+                        "result": {"courses": [{"id": 1, "title": "Algebra", "url": "u", "assignments": []}]},
+                        "excel_data": None,
+                        "ts": 100,
+                    },
+                )
+                cache, prefs = storage.load_user_cache_and_preferences("alice")
+                self.assertEqual(cache["ts"], 100)
+                self.assertEqual([course["title"] for course in cache["result"]["courses"]], ["Algebra"])
+                self.assertNotIn("preferences", cache)
+                self.assertTrue(prefs["show_completed"])
+                self.assertEqual(storage.load_user_cache("alice")["preferences"], prefs)
+            finally:
+                storage._engine.dispose()
+
+    def test_user_bundle_includes_google_tokens(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = PersistentStorage(str(Path(temp_dir) / "cache.sqlite3"))
+            try:
+                self.assertEqual(storage.load_user_bundle("alice"), (None, {}, None))
+
+                storage.save_google_tokens("alice", {"access_token": "token", "expires_at": 10})
+                cache, prefs, tokens = storage.load_user_bundle("alice")
+                self.assertIsNone(cache)
+                self.assertEqual(prefs, {})
+                self.assertEqual(tokens["access_token"], "token")
+            finally:
+                storage._engine.dispose()
+
+    def test_excel_data_is_only_attached_to_the_matching_fetch(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = PersistentStorage(str(Path(temp_dir) / "cache.sqlite3"))
+            try:
+                storage.save_user_cache("alice", {"result": {"courses": []}, "excel_data": None, "ts": 100})
+                self.assertFalse(storage.save_user_excel_data("alice", "stale", fetched_ts=99))
+                self.assertIsNone(storage.load_user_cache("alice")["excel_data"])
+
+                self.assertTrue(storage.save_user_excel_data("alice", "fresh", fetched_ts=100))
+                self.assertEqual(storage.load_user_cache("alice")["excel_data"], "fresh")
+                self.assertFalse(storage.save_user_excel_data("bob", "fresh", fetched_ts=100))
+            finally:
+                storage._engine.dispose()
+
+    def test_unchanged_fetch_only_moves_the_timestamp(self):
+        with tempfile.TemporaryDirectory() as temp_dir:
+            storage = PersistentStorage(str(Path(temp_dir) / "cache.sqlite3"))
+            try:
+                result = {"courses": [{"id": 1, "title": "Algebra", "url": "u", "assignments": []}]}
+                storage.save_user_cache("alice", {"result": result, "excel_data": "export", "ts": 100})
+                storage.save_user_cache("alice", {"result": dict(result), "excel_data": None, "ts": 200})
+                cache = storage.load_user_cache("alice")
+                self.assertEqual(cache["ts"], 200)
+                self.assertEqual(cache["excel_data"], "export")
+                self.assertTrue(storage.save_user_excel_data("alice", "fresh", fetched_ts=200))
+
+                changed = {"courses": [{"id": 2, "title": "Calculus", "url": "v", "assignments": []}]}
+                storage.save_user_cache("alice", {"result": changed, "excel_data": None, "ts": 300})
+                cache = storage.load_user_cache("alice")
+                self.assertEqual([course["title"] for course in cache["result"]["courses"]], ["Calculus"])
+                self.assertIsNone(cache["excel_data"])
+            finally:
+                storage._engine.dispose()
+
+
+if __name__ == "__main__":
+    unittest.main()